@@ -0,0 +1,140 @@
+# Benchmark query compilation;
+import argparse
+import time
+
+from elasticmagic import Bool, Document, Field, FunctionScore, SearchQuery
+from elasticmagic import agg
+from elasticmagic.compiler import Compiled, all_compilers
+from elasticmagic.function import FieldValueFactor, Weight
+from elasticmagic.types import Date, Float, Integer, Keyword, List, Text
+
+
+class ProductDocument(Document):
+    __doc_type__ = 'product'
+
+    name = Field(Text)
+    status = Field(Integer)
+    category = Field(Integer)
+    tags = Field(List(Keyword))
+    price = Field(Float)
+    rank = Field(Float)
+    created_at = Field(Date)
+
+
+def setup():
+    ap = argparse.ArgumentParser(description='Compile benchmark')
+    ap.add_argument('-n', '--number', dest='number',
+                    type=int, default=2000,
+                    help="Number of compilations per compiler")
+    ap.add_argument('-s', '--size', dest='size',
+                    type=int, default=20,
+                    help="Number of clauses in bool queries "
+                         "and aggregations")
+    ap.add_argument('--legacy', dest='legacy',
+                    action='store_true', default=False,
+                    help="Compare with string formatted getattr dispatching")
+    return ap
+
+
+def make_query(size):
+    return (
+        SearchQuery(
+            FunctionScore(
+                Bool.should(*[
+                    ProductDocument.name.match('product {}'.format(i))
+                    for i in range(size)
+                ]),
+                functions=[
+                    Weight(2, filter=ProductDocument.status == 0),
+                    FieldValueFactor(ProductDocument.rank, missing=1),
+                ],
+            )
+        )
+        .filter(
+            Bool.must_not(*[
+                ProductDocument.category == i for i in range(size)
+            ]),
+            ProductDocument.tags.in_(['tag{}'.format(i) for i in range(size)]),
+            ProductDocument.price.range(gte=1, lt=1000),
+        )
+        .aggs({
+            'cat_{}'.format(i): agg.Filter(
+                ProductDocument.category == i,
+                aggs={
+                    'tags': agg.Terms(ProductDocument.tags, size=10),
+                    'price': agg.Stats(ProductDocument.price),
+                    'created': agg.DateHistogram(
+                        ProductDocument.created_at, interval='month'
+                    ),
+                }
+            )
+            for i in range(size)
+        })
+        .order_by(ProductDocument.rank.desc())
+        .limit(20)
+    )
+
+
+def legacy_visit(self, expr, **kwargs):
+    visit_name = None
+    if hasattr(expr, '__visit_name__'):
+        visit_name = expr.__visit_name__
+
+    if visit_name:
+        visit_func = getattr(self, 'visit_{}'.format(visit_name))
+        return visit_func(expr, **kwargs)
+
+    if isinstance(expr, dict):
+        return self.visit_dict(expr)
+
+    if isinstance(expr, (list, tuple)):
+        return self.visit_list(expr)
+
+    return expr
+
+
+def bench(compiler, sq, number):
+    compiled_query = compiler.compiled_query
+    compiled_query(sq)
+    start = time.perf_counter()
+    for _ in range(number):
+        compiled_query(sq)
+    return time.perf_counter() - start
+
+
+def main():
+    options = setup().parse_args()
+    sq = make_query(options.size)
+
+    print("{:<14} {:>12} {:>12}".format('compiler', 'ms/query', 'queries/s'))
+    results = []
+    for compiler in all_compilers:
+        duration = bench(compiler, sq, options.number)
+        results.append(duration)
+        print("{:<14} {:>12.3f} {:>12.0f}".format(
+            compiler.__name__,
+            duration * 1000 / options.number,
+            options.number / duration,
+        ))
+
+    if not options.legacy:
+        return
+
+    dispatch_visit = Compiled.visit
+    Compiled.visit = legacy_visit
+    try:
+        print()
+        print("{:<14} {:>12} {:>12}".format('legacy', 'ms/query', 'speedup'))
+        for compiler, duration in zip(all_compilers, results):
+            legacy_duration = bench(compiler, sq, options.number)
+            print("{:<14} {:>12.3f} {:>11.2f}x".format(
+                compiler.__name__,
+                legacy_duration * 1000 / options.number,
+                legacy_duration / duration,
+            ))
+    finally:
+        Compiled.visit = dispatch_visit
+
+
+if __name__ == '__main__':
+    main()
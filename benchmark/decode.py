@@ -0,0 +1,147 @@
+# Benchmark decoding query filter parameters from request multidicts;
+import argparse
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode
+
+from elasticmagic import Document, Field
+from elasticmagic.ext.queryfilter import (
+    FacetFilter, OrderingFilter, OrderingValue, PageFilter, QueryFilter,
+    RangeFilter,
+)
+from elasticmagic.ext.queryfilter.codec import SimpleCodec
+from elasticmagic.types import Date, Float, Integer, Keyword
+
+try:
+    from webob.multidict import MultiDict
+except ImportError:
+    MultiDict = None
+
+
+class WebobMultiDict(object):
+    """Implements the part of ``webob.multidict.MultiDict`` the codec uses.
+    """
+
+    def __init__(self, items):
+        self._items = list(items)
+
+    def getall(self, key):
+        return [v for k, v in self._items if k == key]
+
+    def dict_of_lists(self):
+        result = {}
+        for k, v in self._items:
+            result.setdefault(k, []).append(v)
+        return result
+
+
+class DjangoQueryDict(object):
+    """Implements the part of ``django.http.QueryDict`` the codec uses.
+    """
+
+    def __init__(self, items):
+        self._lists = OrderedDict()
+        for k, v in items:
+            self._lists.setdefault(k, []).append(v)
+
+    def getlist(self, key):
+        return list(self._lists.get(key, []))
+
+    def lists(self):
+        return ((k, list(v)) for k, v in self._lists.items())
+
+
+class ProductDocument(Document):
+    __doc_type__ = 'product'
+
+    category = Field(Integer)
+    brand = Field(Keyword)
+    color = Field(Keyword)
+    price = Field(Float)
+    rating = Field(Float)
+    created = Field(Date)
+    rank = Field(Integer)
+
+
+class ProductQueryFilter(QueryFilter):
+    category = FacetFilter(ProductDocument.category)
+    brand = FacetFilter(ProductDocument.brand)
+    color = FacetFilter(ProductDocument.color)
+    price = RangeFilter(ProductDocument.price)
+    rating = RangeFilter(ProductDocument.rating)
+    created = RangeFilter(ProductDocument.created)
+    sort = OrderingFilter(
+        OrderingValue('rank', [ProductDocument.rank.desc()]),
+        OrderingValue('price', [ProductDocument.price]),
+    )
+    page = PageFilter(per_page_values=[24, 48])
+
+
+QUERIES = [
+    (
+        'typical',
+        urlencode([
+            ('category', '12'), ('category', '14'),
+            ('brand', 'acme'), ('brand', 'globex'), ('color', 'red'),
+            ('price__gte', '100'), ('price__lte', '2500.50'),
+            ('created__gte', '2020-01-01'),
+            ('sort', 'price'), ('page', '3'), ('per_page', '48'),
+            ('utm_source', 'newsletter'), ('utm_campaign', 'spring'),
+            ('gclid', 'abc123'),
+        ]),
+    ),
+    (
+        'hostile',
+        urlencode(
+            [('category', str(i)) for i in range(5000)] +
+            [('junk{}'.format(i), 'x') for i in range(1000)] +
+            [('price__gte', 'NaN')] * 1000
+        ),
+    ),
+]
+
+
+def setup():
+    ap = argparse.ArgumentParser(description='Decode benchmark')
+    ap.add_argument('-n', '--number', dest='number',
+                    type=int, default=2000,
+                    help="Number of decoded requests")
+    return ap
+
+
+def bench(codec, params, types, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        codec.decode(params, types)
+    return time.perf_counter() - start
+
+
+def main():
+    options = setup().parse_args()
+    qf = ProductQueryFilter(codec=SimpleCodec(max_values=100))
+    codec = qf._codec
+    types = qf.get_types()
+    multidicts = [('django', DjangoQueryDict)]
+    if MultiDict is not None:
+        multidicts.append(('webob', MultiDict))
+    else:
+        multidicts.append(('webob', WebobMultiDict))
+
+    print("{:<20} {:>12} {:>12}".format('', 'decode us', 'params'))
+    for query_name, query_string in QUERIES:
+        items = parse_qsl(query_string)
+        number = options.number
+        if query_name == 'hostile':
+            number = max(number // 100, 1)
+        for multidict_name, multidict_cls in multidicts:
+            params = multidict_cls(items)
+            duration = bench(codec, params, types, number)
+            print("{:<20} {:>12.1f} {:>12}".format(
+                '{} {}'.format(query_name, multidict_name),
+                duration * 1000000 / number,
+                len(items),
+            ))
+
+
+if __name__ == '__main__':
+    main()
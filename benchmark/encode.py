@@ -0,0 +1,141 @@
+# Benchmark serialization of compiled bodies;
+import argparse
+import datetime
+import time
+
+from elasticsearch.serializer import JSONSerializer
+
+from elasticmagic import actions
+from elasticmagic.compiler import all_compilers, with_body_encoder
+
+from compile import ProductDocument, make_query
+
+
+def setup():
+    ap = argparse.ArgumentParser(description='Encode benchmark')
+    ap.add_argument('-n', '--number', dest='number',
+                    type=int, default=1000,
+                    help="Number of iterations per compiler")
+    ap.add_argument('-s', '--size', dest='size',
+                    type=int, default=20,
+                    help="Number of clauses in bool queries "
+                         "and aggregations")
+    ap.add_argument('-b', '--bulk-size', dest='bulk_size',
+                    type=int, default=500,
+                    help="Number of actions in a bulk request")
+    return ap
+
+
+def client_dumps(serializer, body):
+    # the same as the Elasticsearch client does
+    return serializer.dumps(body).encode('utf-8', 'surrogatepass')
+
+
+def client_dumps_ndjson(serializer, body):
+    return (
+        '\n'.join(map(serializer.dumps, body)) + '\n'
+    ).encode('utf-8', 'surrogatepass')
+
+
+def make_actions(size):
+    return [
+        actions.Index(
+            ProductDocument(
+                _id=i,
+                name='product {}'.format(i),
+                status=i % 3,
+                category=i % 10,
+                tags=['tag{}'.format(t) for t in range(i % 7)],
+                price=i * 1.5,
+                rank=i / 10.0,
+                created_at=datetime.datetime(2020, 1, 1 + i % 28),
+            )
+        )
+        for i in range(size)
+    ]
+
+
+def bench(func, number):
+    func()
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return time.perf_counter() - start
+
+
+def print_row(name, dict_duration, bytes_duration, number):
+    print("{:<14} {:>14.3f} {:>14.3f} {:>9.2f}x".format(
+        name,
+        dict_duration * 1000 / number,
+        bytes_duration * 1000 / number,
+        dict_duration / bytes_duration,
+    ))
+
+
+def main():
+    options = setup().parse_args()
+    serializer = JSONSerializer()
+    sq = make_query(options.size)
+    bulk_actions = make_actions(options.bulk_size)
+    bulk_number = max(1, options.number // 10)
+
+    header = "{:<14} {:>14} {:>14} {:>10}".format(
+        '', 'dict+dumps ms', 'bytes ms', 'speedup'
+    )
+    for title, number in [('search', options.number), ('bulk', bulk_number)]:
+        print(title)
+        print(header)
+        for compiler in all_compilers:
+            encoding_compiler = with_body_encoder(compiler)
+            if title == 'search':
+                def dict_func():
+                    return client_dumps(
+                        serializer, compiler.compiled_query(sq).body
+                    )
+
+                def bytes_func():
+                    return encoding_compiler.compiled_query(sq) \
+                        .get_request_body()
+            else:
+                def dict_func():
+                    return client_dumps_ndjson(
+                        serializer, compiler.compiled_bulk(bulk_actions).body
+                    )
+
+                def bytes_func():
+                    return encoding_compiler.compiled_bulk(bulk_actions) \
+                        .get_request_body()
+
+            print_row(
+                compiler.__name__,
+                bench(dict_func, number),
+                bench(bytes_func, number),
+                number,
+            )
+        print()
+
+    # serialization only, it does not depend on a compiler
+    compiler = all_compilers[-1]
+    body_encoder = with_body_encoder(compiler).body_encoder
+    search_body = compiler.compiled_query(sq).body
+    bulk_body = compiler.compiled_bulk(bulk_actions).body
+    print('serialization only')
+    print(header)
+    print_row(
+        'search',
+        bench(lambda: client_dumps(serializer, search_body), options.number),
+        bench(lambda: body_encoder.encode(search_body), options.number),
+        options.number,
+    )
+    print_row(
+        'bulk',
+        bench(
+            lambda: client_dumps_ndjson(serializer, bulk_body), bulk_number
+        ),
+        bench(lambda: body_encoder.encode_ndjson(bulk_body), bulk_number),
+        bulk_number,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# Benchmark creating documents from search hits;
+import argparse
+import time
+
+from elasticmagic.result import SearchResult
+
+from run import (
+    ListsDocument, SimpleDocument, gen_lists_document, gen_simple_document,
+)
+
+
+def setup():
+    ap = argparse.ArgumentParser(description='Hydrate benchmark')
+    ap.add_argument('-n', '--number', dest='number',
+                    type=int, default=100,
+                    help="Number of iterations per document class")
+    ap.add_argument('-s', '--size', dest='size',
+                    type=int, default=1000,
+                    help="Number of hits in a search result")
+    return ap
+
+
+def bench(raw_result, doc_cls, number):
+    doc_cls_map = {doc_cls.__doc_type__: doc_cls}
+    start = time.perf_counter()
+    for _ in range(number):
+        for _ in SearchResult(raw_result, doc_cls_map=doc_cls_map):
+            pass
+    return time.perf_counter() - start
+
+
+def main():
+    options = setup().parse_args()
+    print("{:<16} {:>14} {:>14}".format('', 'result ms', 'per hit us'))
+    for doc_cls, gen_documents in [
+            (SimpleDocument, gen_simple_document),
+            (ListsDocument, gen_lists_document),
+    ]:
+        raw_result = {
+            'hits': {
+                'total': options.size,
+                'max_score': 0,
+                'hits': list(gen_documents(options.size)),
+            }
+        }
+        duration = bench(raw_result, doc_cls, options.number)
+        print("{:<16} {:>14.3f} {:>14.3f}".format(
+            doc_cls.__name__,
+            duration * 1000 / options.number,
+            duration * 1000000 / options.number / options.size,
+        ))
+
+
+if __name__ == '__main__':
+    main()
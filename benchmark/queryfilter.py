@@ -0,0 +1,117 @@
+# Benchmark applying a query filter with many filters to a search query;
+import argparse
+import time
+
+from elasticmagic import Document, Field, SearchQuery
+from elasticmagic.ext.queryfilter import (
+    FacetFilter, OrderingFilter, OrderingValue, PageFilter, QueryFilter,
+    RangeFilter,
+)
+from elasticmagic.search import BaseSearchQuery
+from elasticmagic.types import Integer, Keyword
+
+FACETS = 24
+RANGES = 4
+
+
+class ProductDocument(Document):
+    __doc_type__ = 'product'
+
+    rank = Field(Integer)
+
+
+for i in range(FACETS):
+    setattr(ProductDocument, 'attr_{}'.format(i), Field(Keyword))
+for i in range(RANGES):
+    setattr(ProductDocument, 'range_{}'.format(i), Field(Integer))
+
+
+class ProductQueryFilter(QueryFilter):
+    sort = OrderingFilter(
+        OrderingValue('rank', [ProductDocument.rank.desc()]),
+        OrderingValue('-rank', [ProductDocument.rank]),
+    )
+    page = PageFilter(per_page_values=[24, 48])
+
+
+for i in range(FACETS):
+    setattr(
+        ProductQueryFilter, 'attr_{}'.format(i),
+        FacetFilter(getattr(ProductDocument, 'attr_{}'.format(i)), size=50)
+    )
+for i in range(RANGES):
+    setattr(
+        ProductQueryFilter, 'range_{}'.format(i),
+        RangeFilter(getattr(ProductDocument, 'range_{}'.format(i)))
+    )
+
+
+def setup():
+    ap = argparse.ArgumentParser(description='Query filter benchmark')
+    ap.add_argument('-n', '--number', dest='number',
+                    type=int, default=1000,
+                    help="Number of requests")
+    ap.add_argument('-f', '--selected', dest='selected',
+                    type=int, default=5,
+                    help="Number of facet filters with selected values")
+    return ap
+
+
+class CountClones(object):
+    def __init__(self):
+        self.count = 0
+        self._clone = BaseSearchQuery.clone
+
+    def __enter__(self):
+        def clone(query):
+            self.count += 1
+            return self._clone(query)
+        BaseSearchQuery.clone = clone
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        BaseSearchQuery.clone = self._clone
+
+
+class WithoutBuilder(object):
+    """Makes query filters clone a query on every change like before the
+    builder mode was added.
+    """
+
+    def __enter__(self):
+        self._builder = BaseSearchQuery.builder
+        BaseSearchQuery.builder = BaseSearchQuery.build
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        BaseSearchQuery.builder = self._builder
+
+
+def bench(qf, params, number):
+    with CountClones() as clones:
+        qf.apply(SearchQuery(), params, state=qf.create_state())
+    start = time.perf_counter()
+    for _ in range(number):
+        qf.apply(SearchQuery(), params, state=qf.create_state())
+    return time.perf_counter() - start, clones.count
+
+
+def main():
+    options = setup().parse_args()
+    qf = ProductQueryFilter()
+    params = {'sort': ['-rank'], 'page': ['2'], 'range_0__gte': ['10']}
+    for i in range(options.selected):
+        params['attr_{}'.format(i)] = ['a', 'b']
+
+    print('{} filters'.format(len(qf.filters)))
+    print("{:<16} {:>12} {:>12}".format('', 'apply ms', 'clones'))
+    with WithoutBuilder():
+        results = [('clone per call',) + bench(qf, params, options.number)]
+    results.append(('builder',) + bench(qf, params, options.number))
+    for name, duration, clones in results:
+        print("{:<16} {:>12.3f} {:>12}".format(
+            name, duration * 1000 / options.number, clones
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -6,7 +6,6 @@ import json
 import time
 import cProfile
 import gc
-import coverage
 
 from collections import OrderedDict
 
@@ -15,7 +14,7 @@ from elasticmagic import (
     SearchQuery,
     MatchAll,
     )
-from elasticmagic.result import SearchResult
+from elasticmagic.compiler import Compiler_7_0
 from elasticmagic.types import (
     Boolean, Integer, Float, String, Date,
     List,
@@ -125,9 +124,13 @@ def gen_sample(options):
 def run(options):
     """Run benchmark."""
     prof = cProfile.Profile()
-    cov = coverage.Coverage()
+    if options.profile:
+        import coverage
+        cov = coverage.Coverage()
 
-    times = OrderedDict.fromkeys(['data_load', 'json_loads', 'searchResult'])
+    times = OrderedDict.fromkeys(
+        ['data_load', 'json_loads', 'searchResult', 'rawHitsResult']
+    )
     start = time.monotonic() * 1000
 
     raw_data = options.input.read()
@@ -141,21 +144,27 @@ def run(options):
                         doc_cls=SimpleDocument)
     if 'aggregations' in raw_results:
         query = query.aggs(terms=Terms(SimpleDocument.integer_0))
+    queries = [
+        ('searchResult', query),
+        ('rawHitsResult', query.with_raw_hits()),
+    ]
     gc.disable()
     if options.profile:
         cov.start()
         prof.enable()
 
-    SearchResult(
-        raw_results,
-        query._aggregations,
-        doc_cls=query._get_doc_cls(),
-        instance_mapper=query._instance_mapper)
-    times['searchResult'] = time.monotonic() * 1000 - start
+    for key, q in queries:
+        compiled_query = Compiler_7_0.compiled_query(q)
+        start = time.monotonic() * 1000
+        # documents are created lazily so iterate over all the hits
+        for _ in compiled_query.process_result(raw_results):
+            pass
+        times[key] = time.monotonic() * 1000 - start
+
     if options.profile:
         prof.disable()
         cov.stop()
-        gc.enable()
+    gc.enable()
 
     for key, duration in times.items():
         print("Took {} {:10.3f}ms".format(key, duration))
@@ -231,7 +240,7 @@ def gen_terms_buckets(N):
 
 
 def gen_lists_document(N):
-    K = len(N * .1)
+    K = max(1, int(N * .1))
     for i in range(N):
         yield {
             '_index': _INDEX,
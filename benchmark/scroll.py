@@ -0,0 +1,130 @@
+# Benchmark scrolling throughput against a stub client;
+import argparse
+import itertools
+import json
+import threading
+import time
+
+from elasticmagic import Cluster
+from elasticmagic.compiler import Compiler_7_0
+
+from run import SimpleDocument, gen_simple_document
+
+
+def setup():
+    ap = argparse.ArgumentParser(description='Scroll benchmark')
+    ap.add_argument('-n', '--number', dest='number',
+                    type=int, default=100000,
+                    help="Number of documents to scroll")
+    ap.add_argument('-s', '--size', dest='size',
+                    type=int, default=1000,
+                    help="Number of hits per page")
+    ap.add_argument('-l', '--latency', dest='latency',
+                    type=float, default=20,
+                    help="Latency of a stub request, ms")
+    ap.add_argument('--slices', dest='slices',
+                    type=int, nargs='+', default=[2, 4, 8],
+                    help="Numbers of slices for sliced scroll")
+    return ap
+
+
+class StubClient(object):
+    """Serves scroll pages of pregenerated documents. Every request sleeps
+    ``latency`` seconds and parses a page from JSON as the real client does.
+    """
+
+    def __init__(self, total, latency):
+        self.total = total
+        self.latency = latency
+        self._raw_pages = {}
+        self._cursors = {}
+        self._lock = threading.Lock()
+        self._scroll_ids = itertools.count()
+
+    def _get_raw_page(self, size):
+        with self._lock:
+            raw_page = self._raw_pages.get(size)
+            if raw_page is None:
+                raw_page = self._raw_pages[size] = json.dumps({
+                    'hits': {
+                        'total': size,
+                        'hits': list(gen_simple_document(size)),
+                    }
+                })
+            return raw_page
+
+    def _next_page(self, scroll_id):
+        with self._lock:
+            total, pos, size = self._cursors[scroll_id]
+            page_size = min(size, total - pos)
+            self._cursors[scroll_id] = (total, pos + page_size, size)
+        time.sleep(self.latency)
+        page = json.loads(self._get_raw_page(page_size))
+        page['_scroll_id'] = scroll_id
+        return page
+
+    def search(self, body, **kwargs):
+        total = self.total
+        slice_params = body.get('slice')
+        if slice_params:
+            slice_id = slice_params['id']
+            max_slices = slice_params['max']
+            total = total // max_slices + (
+                1 if slice_id < total % max_slices else 0
+            )
+        scroll_id = 'scroll{}'.format(next(self._scroll_ids))
+        with self._lock:
+            self._cursors[scroll_id] = (total, 0, body.get('size', 10))
+        return self._next_page(scroll_id)
+
+    def scroll(self, scroll_id, scroll, **kwargs):
+        return self._next_page(scroll_id)
+
+    def clear_scroll(self, scroll_id, **kwargs):
+        with self._lock:
+            self._cursors.pop(scroll_id, None)
+        return {'succeeded': True}
+
+
+def bench(hits):
+    start = time.perf_counter()
+    count = 0
+    for doc in hits:
+        count += 1
+    return count, time.perf_counter() - start
+
+
+def main():
+    options = setup().parse_args()
+    client = StubClient(options.number, options.latency / 1000)
+    cluster = Cluster(client, compiler=Compiler_7_0)
+    sq = cluster['test'].search_query(doc_cls=SimpleDocument)
+
+    modes = [
+        ('scroll', lambda: sq.iter_scroll(size=options.size, prefetch=0)),
+        ('scroll prefetch', lambda: sq.iter_scroll(size=options.size)),
+    ]
+    for slices in options.slices:
+        modes.append((
+            'sliced x{}'.format(slices),
+            lambda slices=slices: sq.iter_sliced_scroll(
+                slices, size=options.size
+            )
+        ))
+
+    print("{:<16} {:>10} {:>12} {:>9}".format(
+        '', 'total s', 'docs/s', 'speedup'
+    ))
+    base_duration = None
+    for name, make_hits in modes:
+        count, duration = bench(make_hits())
+        assert count == options.number, count
+        if base_duration is None:
+            base_duration = duration
+        print("{:<16} {:>10.3f} {:>12.0f} {:>8.2f}x".format(
+            name, duration, count / duration, base_duration / duration
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+# Benchmark serializing documents for indexing;
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from elasticmagic import actions, Document, Field
+from elasticmagic.bulk import encode_actions
+from elasticmagic.compiler import Compiler_7_0
+from elasticmagic.types import Integer, List, Nested, Object, String
+
+from run import (
+    ListsDocument, SimpleDocument, gen_lists_document, gen_simple_document,
+)
+
+
+class TagDocument(Document):
+    id = Field(Integer)
+    name = Field(String)
+
+
+class NestedDocument(Document):
+    __doc_type__ = 'nested'
+
+    simple = Field(Object(SimpleDocument))
+    lists = Field(Object(ListsDocument))
+    tags = Field(List(Nested(TagDocument)))
+
+
+def gen_nested_document(size):
+    for simple_hit, lists_hit in zip(
+            gen_simple_document(size), gen_lists_document(size)
+    ):
+        yield NestedDocument(
+            _id=simple_hit['_id'],
+            simple=SimpleDocument(_hit=simple_hit),
+            lists=ListsDocument(_hit=lists_hit),
+            tags=[
+                TagDocument(id=i, name='tag {}'.format(i)) for i in range(5)
+            ],
+        )
+
+
+def setup():
+    ap = argparse.ArgumentParser(description='Serialize benchmark')
+    ap.add_argument('-n', '--number', dest='number',
+                    type=int, default=10,
+                    help="Number of iterations per document class")
+    ap.add_argument('-s', '--size', dest='size',
+                    type=int, default=1000,
+                    help="Number of documents")
+    ap.add_argument('-w', '--workers', dest='workers',
+                    type=int, nargs='+', default=[1, 2, 4, 8],
+                    help="Numbers of worker processes to encode bulk actions")
+    return ap
+
+
+def bench_to_source(docs, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        for doc in docs:
+            doc.to_source(Compiler_7_0)
+    return time.perf_counter() - start
+
+
+def bench_bulk(docs, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        Compiler_7_0.compiled_bulk([actions.Index(doc) for doc in docs])
+    return time.perf_counter() - start
+
+
+def bench_workers(docs, number, workers):
+    bulk_actions = [actions.Index(doc) for doc in docs]
+    if not workers:
+        start = time.perf_counter()
+        for _ in range(number):
+            encode_actions(Compiler_7_0, bulk_actions)
+        return time.perf_counter() - start
+
+    with ProcessPoolExecutor(workers) as executor:
+        # start worker processes
+        encode_actions(Compiler_7_0, bulk_actions[:1], executor=executor)
+        start = time.perf_counter()
+        for _ in range(number):
+            encode_actions(Compiler_7_0, bulk_actions, executor=executor)
+        return time.perf_counter() - start
+
+
+def main():
+    options = setup().parse_args()
+    print("{:<16} {:>16} {:>16}".format(
+        '', 'to_source doc/s', 'bulk doc/s'
+    ))
+    documents = [
+        (
+            SimpleDocument,
+            [
+                SimpleDocument(_hit=hit)
+                for hit in gen_simple_document(options.size)
+            ],
+        ),
+        (
+            ListsDocument,
+            [
+                ListsDocument(_hit=hit)
+                for hit in gen_lists_document(options.size)
+            ],
+        ),
+        (NestedDocument, list(gen_nested_document(options.size))),
+    ]
+    for doc_cls, docs in documents:
+        total = options.number * options.size
+        print("{:<16} {:>16.0f} {:>16.0f}".format(
+            doc_cls.__name__,
+            total / bench_to_source(docs, options.number),
+            total / bench_bulk(docs, options.number),
+        ))
+
+    print()
+    print("{:<16} {:>16} {:>16}".format('encode_actions', 'doc/s', 'speedup'))
+    total = options.number * options.size
+    for doc_cls, docs in documents:
+        print(doc_cls.__name__)
+        base_duration = None
+        for workers in [0] + options.workers:
+            duration = bench_workers(docs, options.number, workers)
+            if base_duration is None:
+                base_duration = duration
+            print("{:<16} {:>16.0f} {:>15.2f}x".format(
+                '  {} workers'.format(workers) if workers else '  in process',
+                total / duration,
+                base_duration / duration,
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -7,10 +7,10 @@ from .expression import (
     Bool, Query, DisMax, Filtered, Ids, Prefix, Limit,
     And, Or, Not, Sort, Boosting, Common, ConstantScore, FunctionScore,
     Field, SpanFirst, SpanMulti, SpanNear, SpanNot, SpanOr, SpanTerm,
-    Nested, HasParent, HasChild, QueryRescorer, Script, SortScript
+    Nested, HasParent, HasChild, QueryRescorer, Script, SortScript, Param,
 )
 from .index import Index
-from .search import SearchQuery
+from .search import PreparedSearchQuery, SearchQuery
 from .types import ValidationError
 from .version import __version__
 from .function import (
@@ -30,11 +30,11 @@ __all__ = [
     'Prefix', 'Limit', 'And', 'Or', 'Not', 'Sort', 'Boosting', 'Common',
     'ConstantScore', 'FunctionScore', 'Field',
     'SpanFirst', 'SpanMulti', 'SpanNear', 'SpanNot', 'SpanOr', 'SpanTerm',
-    'Nested', 'HasParent', 'HasChild', 'QueryRescorer', 'SortScript',
+    'Nested', 'HasParent', 'HasChild', 'QueryRescorer', 'SortScript', 'Param',
 
     'Index',
 
-    'SearchQuery',
+    'SearchQuery', 'PreparedSearchQuery',
 
     'ValidationError',
 
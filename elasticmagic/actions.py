@@ -85,3 +85,26 @@ class Update(Action):
             'script': script,
             'script_id': script_id,
         })
+
+    # meta attributes that identify the document to update
+    CHANGES_META_ATTRS = ('_id', '_index', '_type', '_routing', '_parent')
+
+    @classmethod
+    def from_changes(cls, doc, **kwargs):
+        """Creates an update action with a partial document that contains
+        only fields modified since :meth:`.Document.track_changes`.
+        Returns ``None`` when nothing was modified.
+
+        Removed fields are sent as ``null``.
+        """
+        changed_fields = doc.get_changed_fields()
+        if not changed_fields:
+            return None
+        partial_doc = doc.__class__()
+        for attr_name in cls.CHANGES_META_ATTRS:
+            value = doc.__dict__.get(attr_name)
+            if value is not None:
+                setattr(partial_doc, attr_name, value)
+        for attr_name in changed_fields:
+            setattr(partial_doc, attr_name, doc.__dict__.get(attr_name))
+        return cls(partial_doc, **kwargs)
@@ -27,10 +27,9 @@
 """
 from itertools import chain
 
-from .document import DynamicDocument
-from .document import get_doc_type_for_hit
 from .expression import ParamsExpression, Params
 from .compat import force_unicode
+from .result import LazyHits
 from .types import instantiate, Type
 from .util import _with_clone, cached_property, maybe_float, merge_params
 
@@ -247,11 +246,7 @@ class TopHitsResult(AggResult):
         self.total = hits_data.get('total')
         self.max_score = hits_data.get('max_score')
 
-        self.hits = []
-        for hit in hits_data.get('hits', []):
-            doc_type = get_doc_type_for_hit(hit)
-            doc_cls = doc_cls_map.get(doc_type, DynamicDocument)
-            self.hits.append(doc_cls(_hit=hit, _result=self))
+        self.hits = LazyHits(hits_data.get('hits', []), doc_cls_map, self)
 
         if isinstance(instance_mapper, dict):
             self._instance_mappers = instance_mapper
@@ -276,9 +271,7 @@ class TopHitsResult(AggResult):
         hits = list(chain(
             *(
                 map(
-                    lambda r: filter(
-                        lambda hit: isinstance(hit, doc_cls), r.hits
-                    ),
+                    lambda r: r.hits.iter_docs(doc_cls),
                     self._mapper_registry.get(instance_mapper, [self])
                 )
             )
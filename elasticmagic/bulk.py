@@ -0,0 +1,397 @@
+import sys
+import threading
+import time
+
+from elasticsearch import TransportError
+
+from .compat import zip
+from .encoder import JSONBytesEncoder
+from .result import BulkResult
+from .util import clean_params
+
+__all__ = ['BulkIndexer', 'RETRY_STATUSES', 'encode_actions']
+
+
+RETRY_STATUSES = frozenset([429, 503])
+
+
+def _get_importable_compiler(compiler):
+    # compilers wrapped by with_compiled_cache and with_body_encoder are
+    # created dynamically so we pass the original compiler to processes,
+    # bulk actions are compiled the same way by both of them
+    for cls in compiler.__mro__:
+        module = sys.modules.get(cls.__module__)
+        if getattr(module, cls.__name__, None) is cls:
+            return cls
+    raise ValueError('Cannot find importable compiler: {!r}'.format(compiler))
+
+
+def _get_action_state(compiled_meta, compiled_source, action):
+    # documents are passed as their source so only plain python values
+    # are pickled
+    doc = action.doc
+    if action.__action_name__ == 'delete':
+        doc = None
+    elif not isinstance(doc, dict):
+        doc = compiled_source.visit(doc)
+    return (
+        action.__class__, compiled_meta.visit(action), doc,
+        action.source_params,
+    )
+
+
+def _encode_action_states(compiler, encoder, states):
+    compiled_source = compiler.compiled_bulk.compiled_source(None)
+    payloads = []
+    for action_cls, meta, doc, source_params in states:
+        action = action_cls.__new__(action_cls)
+        action.doc = doc
+        action.meta_params = {}
+        action.source_params = source_params
+        lines = [meta]
+        source = compiled_source.visit(action)
+        if source is not None:
+            lines.append(source)
+        payloads.append(encoder.encode_ndjson(lines))
+    return payloads
+
+
+def encode_actions(compiler, actions, executor=None, chunk_size=100):
+    """Returns a list of ndjson encoded bulk lines for every action.
+
+    When ``executor`` is passed the actions are split into chunks of
+    ``chunk_size`` that are encoded by the executor. Documents are
+    serialized into their source in the calling process, so with
+    :class:`concurrent.futures.ProcessPoolExecutor` worker processes get
+    only plain python values of the actions and encode them.
+    """
+    encoder = compiler.body_encoder or JSONBytesEncoder()
+    if executor is None:
+        compiled_bulk = compiler.compiled_bulk([])
+        return [
+            encoder.encode_ndjson(compiled_bulk.compile_action(action))
+            for action in actions
+        ]
+
+    compiled_meta = compiler.compiled_bulk.compiled_meta(None)
+    compiled_source = compiler.compiled_bulk.compiled_source(None)
+    importable_compiler = _get_importable_compiler(compiler)
+    actions = list(actions)
+    futures = [
+        executor.submit(
+            _encode_action_states, importable_compiler, encoder,
+            [
+                _get_action_state(compiled_meta, compiled_source, action)
+                for action in actions[start:start + chunk_size]
+            ]
+        )
+        for start in range(0, len(actions), chunk_size)
+    ]
+    payloads = []
+    for future in futures:
+        payloads.extend(future.result())
+    return payloads
+
+
+class BulkIndexer(object):
+    """Buffers bulk actions and sends them in chunks.
+
+    A chunk is sent when it has ``chunk_size`` actions, when its serialized
+    size reaches ``chunk_bytes`` or when ``flush_interval`` seconds passed
+    since the first action was buffered. Chunks are sent by a pool of
+    ``concurrency`` threads, so at most ``concurrency`` requests are in
+    flight and :meth:`add` blocks when all of them are busy.
+
+    Items rejected with one of ``retry_statuses`` are resent with
+    exponential backoff up to ``max_retries`` times. Other items are not
+    retried. The same goes for the whole chunk when Elasticsearch rejects
+    the request itself with one of these statuses.
+
+    With ``serialize_executor`` actions are encoded by the executor when
+    their chunk is sent, see :func:`encode_actions`, and ``chunk_bytes``
+    is not applied because sizes of actions are not known beforehand.
+
+    After a chunk is done ``callback`` is called from a sender thread
+    with the chunk actions and a :class:`.result.BulkResult` that holds the
+    final response for every action of the chunk.
+
+    .. code-block:: python
+
+       with index.bulk_indexer(chunk_size=1000, concurrency=4) as indexer:
+           for doc in docs:
+               indexer.add(actions.Index(doc))
+    """
+
+    def __init__(
+            self, cluster, index=None, doc_type=None, refresh=None,
+            timeout=None, chunk_size=500, chunk_bytes=10 * 1024 * 1024,
+            flush_interval=None, concurrency=1, executor=None,
+            max_retries=3, initial_backoff=0.5, max_backoff=30,
+            retry_statuses=RETRY_STATUSES, callback=None,
+            serialize_executor=None, **kwargs
+    ):
+        self._client = cluster.get_client()
+        self._compiler = compiler = cluster.get_compiler()
+        self._compiled_bulk = compiler.compiled_bulk([])
+        self._encoder = compiler.body_encoder or JSONBytesEncoder()
+        self._serialize_executor = serialize_executor
+        self._params = clean_params({
+            'index': index,
+            'doc_type': doc_type,
+            'refresh': refresh,
+            'timeout': timeout,
+        }, **kwargs)
+
+        self.chunk_size = chunk_size
+        self.chunk_bytes = chunk_bytes
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.retry_statuses = frozenset(retry_statuses)
+        self.callback = callback
+
+        self.chunks = 0
+        self.sent_actions = 0
+        self.failed_actions = 0
+        self.retried_actions = 0
+
+        if executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            executor = ThreadPoolExecutor(max_workers=concurrency)
+            self._own_executor = True
+        else:
+            self._own_executor = False
+        self._executor = executor
+        self._slots = threading.BoundedSemaphore(concurrency)
+
+        self._lock = threading.Lock()
+        self._actions = []
+        self._payloads = []
+        self._buffer_bytes = 0
+        self._buffer_started = None
+        self._futures = set()
+        self._errors = []
+
+        self._closed = threading.Event()
+        self._flusher = None
+        if flush_interval:
+            self._flusher = threading.Thread(target=self._flush_periodically)
+            self._flusher.daemon = True
+            self._flusher.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close(discard=exc_type is not None)
+
+    def _encode(self, action):
+        return self._encoder.encode_ndjson(
+            self._compiled_bulk.compile_action(action)
+        )
+
+    def _take_chunk(self):
+        chunk = (self._actions, self._payloads)
+        self._actions = []
+        self._payloads = []
+        self._buffer_bytes = 0
+        self._buffer_started = None
+        return chunk
+
+    def _is_expired(self, now):
+        return (
+            self.flush_interval is not None and
+            self._buffer_started is not None and
+            now - self._buffer_started >= self.flush_interval
+        )
+
+    def add(self, *actions):
+        """Buffers the actions and sends full chunks.
+
+        Raises an exception of a previously failed chunk.
+        """
+        self._raise_errors()
+        for action in actions:
+            if self._serialize_executor is None:
+                payload = self._encode(action)
+            else:
+                # encoded when the chunk is sent
+                payload = b''
+            chunks = []
+            with self._lock:
+                if (
+                        self._actions and
+                        self.chunk_bytes and
+                        self._buffer_bytes + len(payload) > self.chunk_bytes
+                ):
+                    chunks.append(self._take_chunk())
+                if self._buffer_started is None:
+                    self._buffer_started = time.time()
+                self._actions.append(action)
+                self._payloads.append(payload)
+                self._buffer_bytes += len(payload)
+                if (
+                        len(self._actions) >= self.chunk_size or
+                        (
+                            self.chunk_bytes and
+                            self._buffer_bytes >= self.chunk_bytes
+                        ) or
+                        self._is_expired(time.time())
+                ):
+                    chunks.append(self._take_chunk())
+            for chunk in chunks:
+                self._submit(chunk)
+
+    def flush(self):
+        """Sends buffered actions and waits until all the chunks are done.
+        """
+        with self._lock:
+            chunk = self._take_chunk()
+        if chunk[0]:
+            self._submit(chunk)
+        self._wait()
+        self._raise_errors()
+
+    def close(self, discard=False):
+        """Flushes buffered actions and releases the resources. If
+        ``discard`` is ``True`` buffered actions are dropped but in flight
+        chunks are still waited for.
+        """
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        try:
+            if discard:
+                with self._lock:
+                    self._take_chunk()
+                self._wait()
+            else:
+                self.flush()
+        finally:
+            if self._own_executor:
+                self._executor.shutdown(wait=True)
+
+    def _flush_periodically(self):
+        timeout = self.flush_interval
+        while not self._closed.wait(timeout):
+            now = time.time()
+            chunk = None
+            with self._lock:
+                if self._is_expired(now):
+                    chunk = self._take_chunk()
+                elif self._buffer_started is not None:
+                    timeout = (
+                        self._buffer_started + self.flush_interval - now
+                    )
+                    continue
+            timeout = self.flush_interval
+            if chunk is not None:
+                try:
+                    self._submit(chunk)
+                except Exception as e:
+                    self._errors.append(e)
+
+    def _submit(self, chunk):
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(self._send_chunk, *chunk)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._chunk_done)
+
+    def _chunk_done(self, future):
+        with self._lock:
+            self._futures.discard(future)
+        self._slots.release()
+        if not future.cancelled() and future.exception() is not None:
+            self._errors.append(future.exception())
+
+    def _wait(self):
+        from concurrent.futures import wait
+        with self._lock:
+            futures = list(self._futures)
+        wait(futures)
+
+    def _raise_errors(self):
+        if self._errors:
+            raise self._errors.pop(0)
+
+    def _send_chunk(self, actions, payloads):
+        if self._serialize_executor is not None:
+            payloads = encode_actions(
+                self._compiler, actions, self._serialize_executor
+            )
+        raw_items = [None] * len(actions)
+        took = 0
+        pending = list(range(len(actions)))
+        retries = 0
+        while True:
+            try:
+                raw_result = self._client.bulk(
+                    body=b''.join(payloads[ix] for ix in pending),
+                    **self._params
+                )
+            except TransportError as e:
+                if (
+                        e.status_code not in self.retry_statuses or
+                        retries >= self.max_retries
+                ):
+                    raise
+            else:
+                took += raw_result.get('took') or 0
+                pending = _store_items(
+                    raw_items, pending, raw_result, self.retry_statuses
+                )
+                if not pending or retries >= self.max_retries:
+                    break
+            time.sleep(get_backoff(
+                retries, self.initial_backoff, self.max_backoff
+            ))
+            retries += 1
+            with self._lock:
+                self.retried_actions += len(pending)
+
+        result = _make_result(took, raw_items)
+        with self._lock:
+            self.chunks += 1
+            self.sent_actions += len(actions)
+            self.failed_actions += sum(
+                1 for item in result.items if item.error
+            )
+        if self.callback is not None:
+            self.callback(actions, result)
+        return result
+
+
+def get_backoff(retries, initial_backoff, max_backoff):
+    return min(max_backoff, initial_backoff * 2 ** retries)
+
+
+def _store_items(raw_items, positions, raw_result, retry_statuses):
+    """Stores response items at positions of their actions in a chunk.
+    Returns positions of the rejected actions.
+    """
+    rejected = []
+    for ix, raw_item in zip(positions, raw_result['items']):
+        raw_items[ix] = raw_item
+        status = next(iter(raw_item.values())).get('status')
+        if status in retry_statuses:
+            rejected.append(ix)
+    return rejected
+
+
+def _make_result(took, raw_items):
+    return BulkResult({
+        'took': took,
+        'errors': any(
+            next(iter(raw_item.values())).get('error')
+            for raw_item in raw_items
+        ),
+        'items': raw_items,
+    })
@@ -0,0 +1,311 @@
+import datetime
+import threading
+from collections import OrderedDict
+
+from .attribute import AttributedField
+from .compat import int_types
+from .compat import string_types
+from .expression import Field
+from .expression import FieldQueryExpression
+from .expression import Param
+from .expression import Params
+from .expression import Range
+from .expression import Terms
+from .expression import UnboundParamError
+from .search import SearchQueryContext
+from .types import Type
+
+
+DEFAULT_COMPILED_CACHE_SIZE = 1024
+
+# Attributes which values are literals that can be re-bound
+# without recompiling the query
+LITERAL_SLOTS = {
+    FieldQueryExpression: ('query',),
+    Terms: ('terms',),
+    Range: ('params',),
+    SearchQueryContext: (
+        'limit', 'offset', 'min_score', 'search_after', 'pit',
+    ),
+}
+
+# Attributes that do not affect compiled body
+IGNORED_ATTRS = frozenset([
+    '_instance_mapper',
+    'filters_meta',
+    'post_filters_meta',
+    'cluster',
+    'index',
+    'doc_types',
+    'search_params',
+    'instance_mapper',
+    'iter_instances',
+    'raw_hits',
+])
+
+SLOT_TYPES = string_types + int_types + (float, datetime.date)
+
+_SLOT_KEY = object()
+_UNCACHEABLE = object()
+
+
+class UncacheableError(UnboundParamError):
+    pass
+
+
+class Slot(Param):
+    """Placeholder for a literal value inside of a compiled body template.
+
+    Any attempt to inspect the placeholder while compiling means that
+    the compiled body depends on the literal value so the template
+    cannot be reused.
+    """
+    __slots__ = ()
+
+
+_slot_attrs_cache = {}
+
+
+def _get_slot_attrs(cls):
+    slot_attrs = _slot_attrs_cache.get(cls)
+    if slot_attrs is None:
+        slot_attrs = set()
+        for base_cls in cls.__mro__:
+            slot_attrs.update(LITERAL_SLOTS.get(base_cls, ()))
+        slot_attrs = _slot_attrs_cache[cls] = frozenset(slot_attrs)
+    return slot_attrs
+
+
+class _Walker(object):
+    """Walks an expression tree collecting structural key and literal values.
+
+    When ``build`` is ``True`` it also makes a copy of the tree
+    where literals are replaced with :class:`Slot` placeholders.
+    """
+
+    def __init__(self, build=False):
+        self.build = build
+        self.values = []
+
+    def walk(self, obj, in_slot=False):
+        if obj is None or isinstance(obj, bool):
+            return obj, obj
+
+        if isinstance(obj, SLOT_TYPES):
+            if in_slot:
+                slot = Slot(len(self.values))
+                self.values.append(obj)
+                return _SLOT_KEY, slot
+            return (obj.__class__, obj), obj
+
+        if isinstance(obj, (list, tuple)):
+            keys = []
+            items = []
+            for v in obj:
+                k, item = self.walk(v, in_slot)
+                keys.append(k)
+                items.append(item)
+            if not self.build:
+                items = obj
+            elif hasattr(obj, '_fields'):
+                items = obj.__class__(*items)
+            else:
+                items = obj.__class__(items)
+            return (obj.__class__, tuple(keys)), items
+
+        if isinstance(obj, dict):
+            keys, items = self._walk_mapping(obj.items())
+            if self.build:
+                items = obj.__class__(items)
+            else:
+                items = obj
+            return (obj.__class__, keys), items
+
+        if isinstance(obj, Params):
+            keys, items = self._walk_mapping(obj._params.items(), in_slot)
+            if self.build:
+                params = Params.__new__(obj.__class__)
+                params._params = dict(items)
+                items = params
+            else:
+                items = obj
+            return (obj.__class__, keys), items
+
+        if isinstance(obj, Field):
+            return (obj.__class__, obj._name), obj
+
+        if isinstance(obj, AttributedField):
+            parent_key, _ = self.walk(obj._parent)
+            return (obj.__class__, parent_key, obj._field._name), obj
+
+        if isinstance(obj, Type):
+            sub_type_key, _ = self.walk(obj.sub_type)
+            return (obj.__class__, sub_type_key, obj.doc_cls), obj
+
+        if isinstance(obj, type):
+            return obj, obj
+
+        if hasattr(obj, '__visit_name__') and hasattr(obj, '__dict__'):
+            return self._walk_object(obj)
+
+        try:
+            hash(obj)
+        except TypeError:
+            raise UncacheableError(
+                'Cannot make key for object: {!r}'.format(obj)
+            )
+        return obj, obj
+
+    def _walk_mapping(self, items, in_slot=False):
+        keys = []
+        new_items = []
+        for k, v in items:
+            k_key, _ = self.walk(k)
+            v_key, v = self.walk(v, in_slot)
+            keys.append((k_key, v_key))
+            new_items.append((k, v))
+        return tuple(keys), new_items
+
+    def _walk_object(self, obj):
+        slot_attrs = _get_slot_attrs(obj.__class__)
+        keys = [obj.__class__]
+        attrs = {}
+        for attr_name, attr_value in obj.__dict__.items():
+            if attr_name in IGNORED_ATTRS:
+                continue
+            attr_key, attr_value = self.walk(
+                attr_value, attr_name in slot_attrs
+            )
+            keys.append((attr_name, attr_key))
+            attrs[attr_name] = attr_value
+
+        if self.build:
+            new_obj = obj.__class__.__new__(obj.__class__)
+            new_obj.__dict__.update(obj.__dict__)
+            new_obj.__dict__.update(attrs)
+        else:
+            new_obj = obj
+        return tuple(keys), new_obj
+
+
+def make_key(expr):
+    """Returns a structural key of the expression and its literal values.
+    """
+    walker = _Walker()
+    key, _ = walker.walk(expr)
+    return key, walker.values
+
+
+def make_template(expr):
+    """Returns a copy of the expression where all literal values are
+    replaced with :class:`Slot` placeholders.
+    """
+    walker = _Walker(build=True)
+    _, template = walker.walk(expr)
+    return template, walker.values
+
+
+def collect_slots(body, found=None):
+    """Returns names of all the placeholders used in the compiled body.
+    """
+    if found is None:
+        found = set()
+    if isinstance(body, Param):
+        found.add(body.name)
+    elif isinstance(body, dict):
+        for k, v in body.items():
+            if isinstance(k, Param):
+                raise UncacheableError('Literal value is used as a key')
+            collect_slots(v, found)
+    elif isinstance(body, (list, tuple)):
+        for v in body:
+            collect_slots(v, found)
+    return found
+
+
+def rebind(body, values):
+    """Makes a copy of the compiled body template substituting placeholders
+    with the values.
+    """
+    if isinstance(body, Param):
+        return values[body.name]
+    if isinstance(body, dict):
+        return body.__class__(
+            (k, rebind(v, values)) for k, v in body.items()
+        )
+    if isinstance(body, list):
+        return [rebind(v, values) for v in body]
+    if isinstance(body, tuple):
+        return tuple(rebind(v, values) for v in body)
+    return body
+
+
+class CompiledQueryCache(object):
+    """Bounded LRU cache of the compiled search query bodies.
+
+    Bodies are stored as templates keyed by a structural fingerprint of
+    the search query so queries that differ only in literal values
+    share a single cache entry.
+    """
+
+    def __init__(self, max_size=DEFAULT_COMPILED_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _get(self, key):
+        with self._lock:
+            template = self._entries.pop(key, None)
+            if template is None:
+                self.misses += 1
+                return None
+            self._entries[key] = template
+            self.hits += 1
+            return template
+
+    def _put(self, key, template):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = template
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def compile(self, compiled, expr):
+        """Returns compiled body for the expression using ``compiled``
+        instance to compile a template when there is no cached one.
+        """
+        try:
+            key, values = make_key(expr)
+        except UnboundParamError:
+            return compiled.visit(expr)
+        key = (compiled.__class__, key)
+
+        template = self._get(key)
+        if template is None:
+            template = self._compile_template(compiled, expr)
+            self._put(key, template)
+        if template is _UNCACHEABLE:
+            return compiled.visit(expr)
+        return rebind(template, values)
+
+    @staticmethod
+    def _compile_template(compiled, expr):
+        try:
+            template_expr, values = make_template(expr)
+            template = compiled.visit(template_expr)
+            if len(collect_slots(template)) != len(values):
+                return _UNCACHEABLE
+        except UnboundParamError:
+            return _UNCACHEABLE
+        return template
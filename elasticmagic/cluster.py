@@ -1,14 +1,19 @@
 from abc import ABCMeta
 
+from .bulk import BulkIndexer
 from .compat import with_metaclass
 from .compiler import (
     ESVersion,
     get_compiler_by_es_version,
+    with_body_encoder,
+    with_compiled_cache,
 )
 from .index import Index
 from .result import (
     ClearScrollResult,
+    ClosePointInTimeResult,
     FlushResult,
+    OpenPointInTimeResult,
     RefreshResult,
 )
 from .search import SearchQuery
@@ -25,6 +30,7 @@ class BaseCluster(with_metaclass(ABCMeta)):
             self, client, index_cls=None,
             multi_search_raise_on_error=True,
             autodetect_es_version=True, compiler=None,
+            compiled_cache_size=None, body_encoder=None,
     ):
         self._client = client
         self._index_cls = index_cls or self._index_cls
@@ -35,6 +41,9 @@ class BaseCluster(with_metaclass(ABCMeta)):
         )
         self._autodetect_es_version = autodetect_es_version
         self._compiler = compiler
+        self._compiled_cache_size = compiled_cache_size
+        self._body_encoder = body_encoder
+        self._wrapped_compilers = {}
         self._index_cache = {}
         self._es_version = None
 
@@ -62,6 +71,22 @@ class BaseCluster(with_metaclass(ABCMeta)):
     def query(self, *args, **kwargs):
         return self.search_query(*args, **kwargs)
 
+    def _wrap_compiler(self, compiler):
+        if not self._compiled_cache_size and not self._body_encoder:
+            return compiler
+        if compiler not in self._wrapped_compilers:
+            wrapped_compiler = compiler
+            if self._compiled_cache_size:
+                wrapped_compiler = with_compiled_cache(
+                    wrapped_compiler, max_size=self._compiled_cache_size
+                )
+            if self._body_encoder:
+                wrapped_compiler = with_body_encoder(
+                    wrapped_compiler, self._body_encoder
+                )
+            self._wrapped_compilers[compiler] = wrapped_compiler
+        return self._wrapped_compilers[compiler]
+
     def _es_version_result(self, raw_result):
         version_str = raw_result['version']['number']
         version_str, _, snapshot = version_str.partition('-')
@@ -80,26 +105,55 @@ class BaseCluster(with_metaclass(ABCMeta)):
         return self._preprocess_params(params, 'doc_or_id', 'doc_cls')
 
     def _multi_get_params(self, params):
-        return self._preprocess_params(params, 'docs_or_ids', 'doc_cls')
+        return (
+            self._preprocess_params(
+                params, 'docs_or_ids', 'doc_cls', 'raw_hits'
+            ),
+            params['raw_hits']
+        )
 
     def _search_params(self, params):
         return self._preprocess_params(params, 'q')
 
+    def _search_query_params(self, params):
+        return (
+            self._preprocess_params(params, 'q', 'raw_hits'),
+            params['raw_hits']
+        )
+
+    def _search_prepared_params(self, params):
+        return self._preprocess_params(params, 'q', 'bindings')
+
     def _explain_params(self, params):
         return self._preprocess_params(params, 'q', 'doc_or_id', 'doc_cls')
 
     def _scroll_params(self, params):
-        return self._preprocess_params(params, 'doc_cls', 'instance_mapper')
+        return self._preprocess_params(
+            params, 'doc_cls', 'instance_mapper', 'raw_hits'
+        )
 
     def _clear_scroll_result(self, raw_result):
         return ClearScrollResult(raw_result)
 
+    def _open_point_in_time_result(self, raw_result):
+        return OpenPointInTimeResult(raw_result)
+
+    def _close_point_in_time_params(self, params):
+        pit_id = params['pit_id']
+        params = self._preprocess_params(params, 'pit_id')
+        params['body'] = {'id': pit_id}
+        return params
+
+    def _close_point_in_time_result(self, raw_result):
+        return ClosePointInTimeResult(raw_result)
+
     def _multi_search_params(self, params):
-        params = self._preprocess_params(params, 'queries')
+        raw_hits = params['raw_hits']
+        params = self._preprocess_params(params, 'queries', 'raw_hits')
         raise_on_error = params.pop(
             'raise_on_error', self._multi_search_raise_on_error
         )
-        return params, raise_on_error
+        return params, raise_on_error, raw_hits
 
     def _put_mapping_params(self, params):
         return self._preprocess_params(params, 'doc_cls_or_mapping')
@@ -121,7 +175,9 @@ class BaseCluster(with_metaclass(ABCMeta)):
         return self._preprocess_params(params, 'doc_or_id', 'doc_cls')
 
     def _bulk_params(self, params):
-        return self._preprocess_params(params, 'actions')
+        return self._preprocess_params(
+            params, 'actions', 'stream', 'serialize_executor'
+        )
 
     def _refresh_result(self, raw_result):
         return RefreshResult(raw_result)
@@ -137,19 +193,19 @@ class Cluster(BaseCluster):
     def _do_request(self, compiler, *args, **kwargs):
         compiled_query = compiler(*args, **kwargs)
         api_method = compiled_query.api_method(self._client)
-        if compiled_query.body is None:
+        body = compiled_query.get_request_body()
+        if body is None:
             raw_res = api_method(**compiled_query.params)
         else:
-            raw_res = api_method(
-                body=compiled_query.body, **compiled_query.params
-            )
+            raw_res = api_method(body=body, **compiled_query.params)
         return compiled_query.process_result(raw_res)
 
     def get_compiler(self):
         if self._compiler:
-            return self._compiler
+            compiler = self._compiler
         else:
-            return get_compiler_by_es_version(self.get_es_version())
+            compiler = get_compiler_by_es_version(self.get_es_version())
+        return self._wrap_compiler(compiler)
 
     def get_es_version(self):
         if not self._es_version:
@@ -172,11 +228,12 @@ class Cluster(BaseCluster):
     def multi_get(
             self, docs_or_ids, index=None, doc_cls=None, doc_type=None,
             source=None, parent=None, routing=None, preference=None,
-            realtime=None, refresh=None, **kwargs
+            realtime=None, refresh=None, raw_hits=False, **kwargs
     ):
+        params, raw_hits = self._multi_get_params(locals())
         return self._do_request(
             self.get_compiler().compiled_multi_get,
-            docs_or_ids, self._multi_get_params(locals()), doc_cls=doc_cls
+            docs_or_ids, params, doc_cls=doc_cls, raw_hits=raw_hits
         )
 
     mget = multi_get
@@ -184,10 +241,26 @@ class Cluster(BaseCluster):
     def search(
             self, q, index=None, doc_type=None, routing=None, preference=None,
             timeout=None, search_type=None, query_cache=None,
-            terminate_after=None, scroll=None, stats=None, **kwargs
+            terminate_after=None, scroll=None, stats=None, raw_hits=None,
+            **kwargs
     ):
+        params, raw_hits = self._search_query_params(locals())
         return self._do_request(
             self.get_compiler().compiled_search_query,
+            q, params, raw_hits=raw_hits
+        )
+
+    def search_prepared(
+            self, q, bindings=None, index=None, doc_type=None, routing=None,
+            preference=None, search_type=None, scroll=None, **kwargs
+    ):
+        return self._do_request(
+            q.bind, bindings, self._search_prepared_params(locals())
+        )
+
+    def put_search_template(self, q, **kwargs):
+        return self._do_request(
+            self.get_compiler().compiled_put_search_template,
             q, self._search_params(locals())
         )
 
@@ -219,12 +292,13 @@ class Cluster(BaseCluster):
 
     def scroll(
             self, scroll_id, scroll, doc_cls=None, instance_mapper=None,
-            **kwargs
+            raw_hits=False, **kwargs
     ):
         return self._do_request(
             self.get_compiler().compiled_scroll,
             self._scroll_params(locals()),
-            doc_cls=doc_cls, instance_mapper=instance_mapper
+            doc_cls=doc_cls, instance_mapper=instance_mapper,
+            raw_hits=raw_hits,
         )
 
     def clear_scroll(self, scroll_id, **kwargs):
@@ -233,15 +307,33 @@ class Cluster(BaseCluster):
             self._client.clear_scroll(**params)
         )
 
+    def open_point_in_time(
+            self, index=None, keep_alive=None, routing=None,
+            preference=None, **kwargs
+    ):
+        params = self._preprocess_params(locals())
+        return self._open_point_in_time_result(
+            self._client.open_point_in_time(**params)
+        )
+
+    def close_point_in_time(self, pit_id, **kwargs):
+        params = self._close_point_in_time_params(locals())
+        return self._close_point_in_time_result(
+            self._client.close_point_in_time(**params)
+        )
+
     def multi_search(
             self, queries, index=None, doc_type=None,
             routing=None, preference=None, search_type=None,
-            raise_on_error=None, **kwargs
+            raise_on_error=None, raw_hits=None, **kwargs
     ):
-        params, raise_on_error = self._multi_search_params(locals())
+        params, raise_on_error, raw_hits = self._multi_search_params(
+            locals()
+        )
         return self._do_request(
             self.get_compiler().compiled_multi_search,
-            queries, params, raise_on_error=raise_on_error
+            queries, params,
+            raise_on_error=raise_on_error, raw_hits=raw_hits
         )
 
     msearch = multi_search
@@ -290,13 +382,25 @@ class Cluster(BaseCluster):
 
     def bulk(
             self, actions, index=None, doc_type=None, refresh=None,
-            timeout=None, consistency=None, replication=None, **kwargs
+            timeout=None, consistency=None, replication=None, stream=False,
+            serialize_executor=None, **kwargs
     ):
+        """Sends the bulk actions in a single request. Actions are encoded
+        by ``serialize_executor`` when it is passed, see
+        :func:`.bulk.encode_actions`.
+        """
         return self._do_request(
             self.get_compiler().compiled_bulk,
-            actions, self._bulk_params(locals())
+            actions, self._bulk_params(locals()), stream=stream,
+            executor=serialize_executor,
         )
 
+    def bulk_indexer(self, **kwargs):
+        """Returns a :class:`.bulk.BulkIndexer` that sends buffered actions
+        in chunks.
+        """
+        return BulkIndexer(self, **kwargs)
+
     def refresh(self, index=None, **kwargs):
         params = self._preprocess_params(locals())
         return self._refresh_result(
@@ -0,0 +1,217 @@
+import datetime
+from array import array
+from collections import namedtuple
+from collections import OrderedDict
+
+import dateutil.tz
+
+try:
+    import numpy
+    NUMPY_IMPORTED = True
+except ImportError:
+    NUMPY_IMPORTED = False
+
+from .attribute import AttributedField
+from .compat import int_types
+from .compat import string_types
+from .expression import MappingField
+from .types import _Float
+from .types import _Int
+from .types import Boolean
+from .types import Date
+from .types import List
+
+
+try:
+    array('q')
+    INT64_TYPECODE = 'q'
+except ValueError:
+    INT64_TYPECODE = 'l'
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=dateutil.tz.tzutc())
+
+
+class Column(namedtuple('Column', ['values', 'mask'])):
+    """Values of a field extracted from hits.
+
+    ``values`` is an :class:`array.array` for integer, float, boolean and
+    date fields (dates are stored as milliseconds since epoch) and a list
+    for other fields. ``mask`` is an ``array.array('B')`` where ``1`` marks
+    hits that do not have the field.
+    """
+    __slots__ = ()
+
+
+def _to_int(field_type, value):
+    return int(value)
+
+
+def _to_float(field_type, value):
+    return float(value)
+
+
+def _to_bool(field_type, value):
+    return field_type.to_python(value)
+
+
+def _to_epoch_millis(field_type, value):
+    if isinstance(value, int_types):
+        return value
+    dt = field_type.to_python(value)
+    if not isinstance(dt, datetime.datetime):
+        dt = datetime.datetime.combine(dt, datetime.time())
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=EPOCH.tzinfo)
+    delta = dt - EPOCH
+    return (
+        delta.days * 86400000 +
+        delta.seconds * 1000 +
+        delta.microseconds // 1000
+    )
+
+
+def _to_python(field_type, value):
+    if field_type is None:
+        return value
+    return field_type.to_python(value)
+
+
+# (type, typecode, numpy dtype, converter)
+COLUMN_TYPES = [
+    (_Int, INT64_TYPECODE, 'int64', _to_int),
+    (_Float, 'd', 'float64', _to_float),
+    (Boolean, 'b', 'bool', _to_bool),
+    (Date, INT64_TYPECODE, 'datetime64[ms]', _to_epoch_millis),
+]
+
+
+class _ColumnSpec(object):
+    def __init__(self, name, field_type, is_meta):
+        self.name = name
+        self.path = name.split('.')
+        self.is_meta = is_meta
+        self.field_type = field_type
+        self.typecode = None
+        self.dtype = None
+        self.convert = _to_python
+        for type_cls, typecode, dtype, convert in COLUMN_TYPES:
+            if isinstance(field_type, type_cls):
+                self.typecode = typecode
+                self.dtype = dtype
+                self.convert = convert
+                break
+
+    def get_raw_value(self, hit):
+        if self.is_meta:
+            return hit.get(self.name)
+
+        value = hit.get('_source')
+        for key in self.path:
+            if isinstance(value, list):
+                value = value[0] if value else None
+            if not isinstance(value, dict):
+                value = None
+                break
+            value = value.get(key)
+        if value is None:
+            value = (hit.get('fields') or {}).get(self.name)
+            if value is not None and not isinstance(self.field_type, List):
+                value = value[0] if value else None
+        if (
+                self.typecode is not None and
+                isinstance(value, list)
+        ):
+            value = value[0] if value else None
+        return value
+
+    def extract(self, hits):
+        if self.typecode is not None:
+            values = array(self.typecode)
+        else:
+            values = []
+        mask = array('B')
+        convert = self.convert
+        field_type = self.field_type
+        for hit in hits:
+            value = self.get_raw_value(hit)
+            if value is None:
+                values.append(0 if self.typecode else None)
+                mask.append(1)
+            else:
+                values.append(convert(field_type, value))
+                mask.append(0)
+        return Column(values, mask)
+
+    def to_numpy(self, column):
+        mask = numpy.frombuffer(column.mask, dtype='uint8').astype(bool)
+        if self.dtype is None:
+            values = numpy.empty(len(column.values), dtype=object)
+            for ix, value in enumerate(column.values):
+                values[ix] = value
+        elif self.typecode == INT64_TYPECODE:
+            values = numpy.frombuffer(column.values, dtype='int64') \
+                .view(self.dtype)
+        else:
+            values = numpy.frombuffer(column.values, dtype=self.dtype)
+        return numpy.ma.MaskedArray(values, mask=mask)
+
+
+def _find_field_type(doc_classes, name):
+    for doc_cls in doc_classes:
+        field_type = None
+        for field_name in name.split('.'):
+            if doc_cls is None:
+                field_type = None
+                break
+            attr_field = doc_cls._field_name_map.get(field_name)
+            if attr_field is None:
+                field_type = None
+                break
+            field_type = attr_field.get_type()
+            doc_cls = field_type.doc_cls
+        if field_type is not None:
+            return field_type
+
+
+def _make_column_spec(field, doc_classes):
+    if isinstance(field, AttributedField):
+        return _ColumnSpec(
+            field.get_field_name(),
+            field.get_type(),
+            isinstance(field.get_field(), MappingField),
+        )
+    if isinstance(field, string_types):
+        return _ColumnSpec(
+            field,
+            _find_field_type(doc_classes, field),
+            field.startswith('_') and '.' not in field,
+        )
+    raise TypeError(
+        'Expected field or string, got: {!r}'.format(field)
+    )
+
+
+def extract_columns(raw_hits, fields=None, doc_classes=(), use_numpy=False):
+    """Reads values of the fields from raw hits without creating documents.
+
+    Returns an ordered dictionary of :class:`Column` by field names or
+    ``numpy.ma.MaskedArray`` when ``use_numpy`` is ``True``.
+    """
+    if fields is None:
+        if len(doc_classes) != 1:
+            raise ValueError(
+                'Fields must be specified when there is not exactly '
+                'one document class'
+            )
+        fields = list(doc_classes[0].user_fields)
+    if use_numpy and not NUMPY_IMPORTED:
+        raise ImportError('numpy is required to extract numpy arrays')
+
+    columns = OrderedDict()
+    for field in fields:
+        spec = _make_column_spec(field, doc_classes)
+        column = spec.extract(raw_hits)
+        if use_numpy:
+            column = spec.to_numpy(column)
+        columns[spec.name] = column
+    return columns
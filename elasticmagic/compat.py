@@ -23,9 +23,11 @@ else:
 if PY2:
     from itertools import izip as zip
     from itertools import izip_longest as zip_longest
+    import Queue as queue  # noqa:F401
 else:
     zip = zip
     from itertools import zip_longest  # noqa:F401
+    import queue  # noqa:F401
 
 
 def force_unicode(value):
@@ -1,13 +1,21 @@
+import json
 import operator
 from collections import OrderedDict
 from collections import namedtuple
 from functools import partial
 
 from elasticsearch import ElasticsearchException
+from elasticsearch.serializer import JSONSerializer
 
 from elasticmagic.attribute import AttributedField
+from .bulk import encode_actions
+from .cache import CompiledQueryCache
+from .cache import DEFAULT_COMPILED_CACHE_SIZE
+from .cache import collect_slots
+from .cache import rebind
 from .compat import Iterable
 from .compat import Mapping
+from .compat import int_types
 from .compat import string_types
 from .document import DOC_TYPE_JOIN_FIELD
 from .document import DOC_TYPE_FIELD
@@ -17,6 +25,7 @@ from .document import Document
 from .document import DynamicDocument
 from .document import get_doc_type_for_hit
 from .document import mk_uid
+from .encoder import JSONBytesEncoder
 from .expression import Bool
 from .expression import Exists
 from .expression import Filtered
@@ -27,6 +36,8 @@ from .expression import MatchPhrase
 from .expression import MatchPhrasePrefix
 from .expression import Params
 from .expression import Terms
+from .expression import UnboundParamError
+from .optimizer import QueryOptimizer
 from .result import BulkResult
 from .result import CountResult
 from .result import DeleteByQueryResult
@@ -34,10 +45,10 @@ from .result import DeleteResult
 from .result import ExistsResult
 from .result import ExplainResult
 from .result import PutMappingResult
+from .result import PutSearchTemplateResult
 from .result import SearchResult
 from .search import BaseSearchQuery
 from .search import SearchQueryContext
-from .types import ValidationError
 from .util import collect_doc_classes
 
 
@@ -77,6 +88,9 @@ ElasticsearchFeatures = namedtuple(
         'supports_script_file',
         'supports_nested_script',
         'bulk_update_underscore_retry_on_conflict',
+        'supports_stored_search_template',
+        'supports_sliced_scroll',
+        'supports_point_in_time',
     ]
 )
 
@@ -162,10 +176,63 @@ def _mk_doc_cls_map(doc_classes, supports_doc_type):
     return doc_cls_map
 
 
+LITERAL_TYPES = string_types + int_types + (float, bool, type(None))
+
+
+def _visit_literal(compiled, expr, **kwargs):
+    return expr
+
+
+def _visit_mapping(compiled, expr, **kwargs):
+    return compiled.visit_dict(expr)
+
+
+def _visit_sequence(compiled, expr, **kwargs):
+    return compiled.visit_list(expr)
+
+
+def _visit_by_name(compiled, expr, **kwargs):
+    visit_name = None
+    if hasattr(expr, '__visit_name__'):
+        visit_name = expr.__visit_name__
+
+    if visit_name:
+        visit_funcs = compiled._visit_name_dispatch
+        visit_func = visit_funcs.get(visit_name)
+        if visit_func is None:
+            visit_func = visit_funcs[visit_name] = getattr(
+                compiled.__class__, 'visit_{}'.format(visit_name)
+            )
+        return visit_func(compiled, expr, **kwargs)
+
+    if isinstance(expr, dict):
+        return compiled.visit_dict(expr)
+
+    if isinstance(expr, (list, tuple)):
+        return compiled.visit_list(expr)
+
+    return expr
+
+
+def _get_static_visit_name(expr_cls):
+    for cls in expr_cls.__mro__:
+        if '__visit_name__' in cls.__dict__:
+            return cls.__dict__['__visit_name__']
+    return None
+
+
 class Compiled(object):
     compiler = None
     features = None
 
+    def __new__(cls, *args, **kwargs):
+        # every class has its own dispatch tables as visitor functions
+        # can be overridden in subclasses
+        if '_visit_dispatch' not in cls.__dict__:
+            cls._visit_dispatch = dict.fromkeys(LITERAL_TYPES, _visit_literal)
+            cls._visit_name_dispatch = {}
+        return super(Compiled, cls).__new__(cls)
+
     def __init__(self, expression, params=None):
         self.expression = expression
         self.body = self.visit(expression)
@@ -174,22 +241,44 @@ class Compiled(object):
     def prepare_params(self, params):
         return params
 
-    def visit(self, expr, **kwargs):
-        visit_name = None
-        if hasattr(expr, '__visit_name__'):
-            visit_name = expr.__visit_name__
-
-        if visit_name:
-            visit_func = getattr(self, 'visit_{}'.format(visit_name))
-            return visit_func(expr, **kwargs)
-
-        if isinstance(expr, dict):
-            return self.visit_dict(expr)
+    def get_request_body(self):
+        """Returns the body that should be passed to the client. When
+        the compiler has a body encoder the body is serialized to bytes.
+        """
+        body_encoder = getattr(self.compiler, 'body_encoder', None)
+        if body_encoder is None or self.body is None:
+            return self.body
+        return body_encoder.encode(self.body)
 
-        if isinstance(expr, (list, tuple)):
-            return self.visit_list(expr)
+    def visit(self, expr, **kwargs):
+        visit_func = self._visit_dispatch.get(expr.__class__)
+        if visit_func is None:
+            visit_func = self._resolve_visit_func(expr.__class__)
+        return visit_func(self, expr, **kwargs)
 
-        return expr
+    @classmethod
+    def _resolve_visit_func(cls, expr_cls):
+        visit_name = _get_static_visit_name(expr_cls)
+        if isinstance(visit_name, string_types):
+            if visit_name:
+                visit_func = getattr(cls, 'visit_{}'.format(visit_name))
+            else:
+                visit_func = _visit_by_name
+        elif (
+                visit_name is not None or
+                # classes and proxy objects can have dynamic visit name
+                issubclass(expr_cls, type) or
+                hasattr(expr_cls, '__getattr__')
+        ):
+            visit_func = _visit_by_name
+        elif issubclass(expr_cls, dict):
+            visit_func = _visit_mapping
+        elif issubclass(expr_cls, (list, tuple)):
+            visit_func = _visit_sequence
+        else:
+            visit_func = _visit_literal
+        cls._visit_dispatch[expr_cls] = visit_func
+        return visit_func
 
     def visit_params(self, params):
         res = {}
@@ -657,8 +746,11 @@ class CompiledExpression(Compiled):
 
 class CompiledSearchQuery(CompiledExpression, CompiledEndpoint):
     features = None
+    compiled_cache = None
+    optimizer = None
 
-    def __init__(self, query, params=None):
+    def __init__(self, query, params=None, raw_hits=None):
+        self.raw_hits = raw_hits
         if isinstance(query, BaseSearchQuery):
             expression = query.get_context()
             doc_classes = expression.doc_classes
@@ -675,13 +767,38 @@ class CompiledSearchQuery(CompiledExpression, CompiledEndpoint):
             self.doc_types = SearchQueryContext._get_unique_doc_types(
                 doc_classes=doc_classes
             )
-        super(CompiledSearchQuery, self).__init__(
-            expression, params, doc_classes=doc_classes
-        )
+        if (
+                self.compiled_cache is not None and
+                isinstance(expression, SearchQueryContext) and
+                not expression.optimize
+        ):
+            self.doc_classes = doc_classes
+            self.expression = expression
+            self.body = self.compiled_cache.compile(self, expression)
+            self.params = self.prepare_params(params or {})
+        else:
+            super(CompiledSearchQuery, self).__init__(
+                expression, params, doc_classes=doc_classes
+            )
 
     def api_method(self, client):
         return client.search
 
+    @property
+    def rewrites(self):
+        """Rewrites applied by the query optimizer with their counts or
+        ``None`` when the optimization was not enabled.
+        """
+        if self.optimizer is None:
+            return None
+        return self.optimizer.rewrites
+
+    @staticmethod
+    def _make_optimizer(query_ctx):
+        if query_ctx.optimize:
+            return QueryOptimizer()
+        return None
+
     def prepare_params(self, params):
         if isinstance(self.expression, SearchQueryContext):
             search_params = dict(self.expression.search_params)
@@ -692,9 +809,16 @@ class CompiledSearchQuery(CompiledExpression, CompiledEndpoint):
         if self.features.supports_mapping_types and self.doc_types:
             search_params['doc_type'] = _mk_doc_type(self.doc_types)
 
+        if getattr(self.expression, 'pit', None):
+            # point in time already contains indexes
+            search_params.pop('index', None)
+
         return self._patch_doc_type(search_params)
 
     def process_result(self, raw_result):
+        raw_hits = self.raw_hits
+        if raw_hits is None:
+            raw_hits = self.expression.raw_hits
         return SearchResult(
             raw_result,
             aggregations=self.expression.aggregations,
@@ -702,6 +826,8 @@ class CompiledSearchQuery(CompiledExpression, CompiledEndpoint):
                 self.expression.doc_classes, self.features.supports_doc_type
             ),
             instance_mapper=self.expression.instance_mapper,
+            raw_hits=raw_hits,
+            rewrites=self.rewrites,
         )
 
     @classmethod
@@ -723,12 +849,22 @@ class CompiledSearchQuery(CompiledExpression, CompiledEndpoint):
 
     @classmethod
     def get_filtered_query(
-            cls, query_context, wrap_function_score=True, doc_classes=None
+            cls, query_context, wrap_function_score=True, doc_classes=None,
+            optimizer=None,
     ):
         q = cls.get_query(
             query_context, wrap_function_score=wrap_function_score
         )
         filter_clauses = []
+        if (
+                optimizer is not None and
+                q is query_context.q and
+                query_context.min_score is None and
+                not query_context.rescores
+        ):
+            # scores can be changed only when they are not used
+            # by function score queries, min score and rescorers
+            q, filter_clauses = optimizer.optimize_query(q)
         if query_context.filters:
             filter_clauses.extend(query_context.iter_filters())
         if not cls.features.supports_mapping_types and doc_classes:
@@ -740,6 +876,8 @@ class CompiledSearchQuery(CompiledExpression, CompiledEndpoint):
                 filter_clauses.append(
                     Terms(DOC_TYPE_JOIN_FIELD, doc_types)
                 )
+        if optimizer is not None:
+            filter_clauses = optimizer.optimize_filters(filter_clauses)
         if filter_clauses:
             if cls.features.supports_bool_filter:
                 if len(filter_clauses) == 1:
@@ -751,19 +889,24 @@ class CompiledSearchQuery(CompiledExpression, CompiledEndpoint):
         return q
 
     @classmethod
-    def get_post_filter(cls, query_context):
+    def get_post_filter(cls, query_context, optimizer=None):
         post_filters = list(query_context.iter_post_filters())
+        if optimizer is not None:
+            post_filters = optimizer.optimize_filters(post_filters)
         if post_filters:
             return Bool.must(*post_filters)
 
     def visit_search_query_context(self, query_ctx):
         params = {}
 
-        q = self.get_filtered_query(query_ctx, doc_classes=self.doc_classes)
+        self.optimizer = self._make_optimizer(query_ctx)
+        q = self.get_filtered_query(
+            query_ctx, doc_classes=self.doc_classes, optimizer=self.optimizer
+        )
         if q is not None:
             params['query'] = self.visit(q)
 
-        post_filter = self.get_post_filter(query_ctx)
+        post_filter = self.get_post_filter(query_ctx, optimizer=self.optimizer)
         if post_filter:
             params['post_filter'] = self.visit(post_filter)
         if query_ctx.ext:
@@ -815,6 +958,16 @@ class CompiledSearchQuery(CompiledExpression, CompiledEndpoint):
         if query_ctx.search_after:
             params['search_after'] = query_ctx.search_after
 
+        if query_ctx.slice:
+            if not self.features.supports_sliced_scroll:
+                raise CompilationError('Sliced scroll is not supported')
+            params['slice'] = self.visit(query_ctx.slice)
+
+        if query_ctx.pit:
+            if not self.features.supports_point_in_time:
+                raise CompilationError('Point in time is not supported')
+            params['pit'] = self.visit(query_ctx.pit)
+
         if not self.features.supports_mapping_types:
             self._patch_docvalue_fields(params, self.doc_classes)
         return params
@@ -896,7 +1049,8 @@ class CompiledExplain(CompiledSearchQuery):
     def visit_search_query_context(self, query_ctx):
         body = {}
 
-        q = self.get_filtered_query(query_ctx)
+        self.optimizer = self._make_optimizer(query_ctx)
+        q = self.get_filtered_query(query_ctx, optimizer=self.optimizer)
         if q is not None:
             body['query'] = self.visit(q)
 
@@ -906,10 +1060,123 @@ class CompiledExplain(CompiledSearchQuery):
         return body
 
 
+class CompiledPreparedSearchQuery(CompiledSearchQuery):
+    """Search query that is compiled once with :class:`.Param` placeholders.
+    """
+    compiled_cache = None
+
+    def __init__(self, query, params=None, template_id=None):
+        if template_id is not None and (
+                not self.features.supports_stored_search_template
+        ):
+            raise CompilationError(
+                'Stored search templates are not supported'
+            )
+        self.template_id = template_id
+        try:
+            super(CompiledPreparedSearchQuery, self).__init__(query, params)
+            self.param_names = frozenset(collect_slots(self.body))
+        except UnboundParamError as e:
+            raise CompilationError(
+                'Parameter cannot be used here: {}'.format(e)
+            )
+
+    def bind(self, bindings, params=None):
+        return CompiledBoundSearchQuery(self, bindings, params)
+
+    def get_template_source(self):
+        """Returns mustache template of the body
+        for a stored search template.
+        """
+        markers = {
+            name: '\x00{}\x00'.format(name) for name in self.param_names
+        }
+        source = JSONSerializer().dumps(rebind(self.body, markers))
+        for name, marker in markers.items():
+            source = source.replace(
+                json.dumps(marker),
+                '{{{{#toJson}}}}{}{{{{/toJson}}}}'.format(name)
+            )
+        return source
+
+
+class CompiledBoundSearchQuery(object):
+    def __init__(self, prepared_query, bindings, params=None):
+        bindings = bindings or {}
+        missing_names = prepared_query.param_names.difference(bindings)
+        if missing_names:
+            raise ValueError(
+                'Missing values for parameters: {}'.format(
+                    ', '.join(sorted(missing_names))
+                )
+            )
+        unknown_names = set(bindings).difference(prepared_query.param_names)
+        if unknown_names:
+            raise ValueError(
+                'Unknown parameters: {}'.format(
+                    ', '.join(sorted(unknown_names))
+                )
+            )
+
+        self.prepared_query = prepared_query
+        self.expression = prepared_query.expression
+        if prepared_query.template_id is None:
+            self.body = rebind(prepared_query.body, bindings)
+        else:
+            self.body = {
+                'id': prepared_query.template_id,
+                'params': dict(bindings),
+            }
+        self.params = dict(prepared_query.params)
+        self.params.update(params or {})
+
+    def api_method(self, client):
+        if self.prepared_query.template_id is None:
+            return client.search
+        return client.search_template
+
+    def get_request_body(self):
+        body_encoder = self.prepared_query.compiler.body_encoder
+        if body_encoder is None:
+            return self.body
+        return body_encoder.encode(self.body)
+
+    def process_result(self, raw_result):
+        return self.prepared_query.process_result(raw_result)
+
+
+class CompiledPutSearchTemplate(CompiledEndpoint):
+    def __init__(self, prepared_query, params=None):
+        if prepared_query.template_id is None:
+            raise CompilationError('Search template id is not specified')
+        self.expression = prepared_query
+        self.body = {
+            'script': {
+                'lang': 'mustache',
+                'source': prepared_query.get_template_source(),
+            }
+        }
+        self.params = self.prepare_params(params or {})
+
+    def prepare_params(self, params):
+        params = dict(params)
+        params['id'] = self.expression.template_id
+        return params
+
+    def api_method(self, client):
+        return client.put_script
+
+    def process_result(self, raw_result):
+        return PutSearchTemplateResult(raw_result)
+
+
 class CompiledScroll(CompiledEndpoint):
-    def __init__(self, params, doc_cls=None, instance_mapper=None):
+    def __init__(
+            self, params, doc_cls=None, instance_mapper=None, raw_hits=False
+    ):
         self.doc_cls = doc_cls
         self.instance_mapper = instance_mapper
+        self.raw_hits = raw_hits
         super(CompiledScroll, self).__init__(None, params)
 
     def api_method(self, client):
@@ -922,6 +1189,7 @@ class CompiledScroll(CompiledEndpoint):
                 self.doc_cls, self.features.supports_doc_type
             ),
             instance_mapper=self.instance_mapper,
+            raw_hits=self.raw_hits,
         )
 
 
@@ -929,11 +1197,12 @@ class CompiledScalarQuery(CompiledSearchQuery):
     def visit_search_query_context(self, query_ctx):
         params = {}
 
-        q = self.get_filtered_query(query_ctx)
+        self.optimizer = self._make_optimizer(query_ctx)
+        q = self.get_filtered_query(query_ctx, optimizer=self.optimizer)
         if q is not None:
             params['query'] = self.visit(q)
 
-        post_filter = self.get_post_filter(query_ctx)
+        post_filter = self.get_post_filter(query_ctx, optimizer=self.optimizer)
         if post_filter:
             params['post_filter'] = self.visit(post_filter)
 
@@ -993,8 +1262,11 @@ class CompiledMultiSearch(CompiledEndpoint):
         def __iter__(self):
             return iter(self.queries)
 
-    def __init__(self, queries, params=None, raise_on_error=False):
+    def __init__(
+            self, queries, params=None, raise_on_error=False, raw_hits=None
+    ):
         self.raise_on_error = raise_on_error
+        self.raw_hits = raw_hits
         self.compiled_queries = []
         super(CompiledMultiSearch, self).__init__(
             self._MultiQueries(queries), params
@@ -1003,10 +1275,15 @@ class CompiledMultiSearch(CompiledEndpoint):
     def api_method(self, client):
         return client.msearch
 
+    def get_request_body(self):
+        if self.compiler.body_encoder is None:
+            return self.body
+        return self.compiler.body_encoder.encode_ndjson(self.body)
+
     def visit_multi_queries(self, expr):
         body = []
         for q in expr.queries:
-            compiled_query = self.compiled_search(q)
+            compiled_query = self.compiled_search(q, raw_hits=self.raw_hits)
             self.compiled_queries.append(compiled_query)
             params = compiled_query.params
             if isinstance(compiled_query.expression, SearchQueryContext):
@@ -1125,6 +1402,7 @@ class CompiledPutMapping(CompiledEndpoint):
                     mapping.setdefault('fields', {}) \
                         .update(self.visit(subfield))
 
+        mapping.update(field_type.get_mapping_options())
         mapping.update(field._mapping_options)
 
         return {
@@ -1390,7 +1668,10 @@ class CompiledMultiGet(CompiledEndpoint):
         def __iter__(self):
             return iter(self.docs_or_ids)
 
-    def __init__(self, docs_or_ids, params=None, doc_cls=None):
+    def __init__(
+            self, docs_or_ids, params=None, doc_cls=None, raw_hits=False
+    ):
+        self.raw_hits = raw_hits
         default_doc_cls = doc_cls
         if isinstance(default_doc_cls, Iterable):
             self.doc_cls_map = {
@@ -1455,6 +1736,12 @@ class CompiledMultiGet(CompiledEndpoint):
         return {'docs': docs}
 
     def process_result(self, raw_result):
+        if self.raw_hits:
+            return [
+                raw_doc if raw_doc.get('found') else None
+                for raw_doc in raw_result['docs']
+            ]
+
         docs = []
         for doc_cls, raw_doc in zip(self.doc_classes, raw_result['docs']):
             doc_type = get_doc_type_for_hit(raw_doc)
@@ -1491,21 +1778,56 @@ class CompiledBulk(CompiledEndpoint):
         def __iter__(self):
             return iter(self.actions)
 
-    def __init__(self, actions, params=None):
+    def __init__(self, actions, params=None, stream=False, executor=None):
+        # the same visitors compile every action
+        self._meta_compiler = self.compiled_meta(None)
+        self._source_compiler = self.compiled_source(None)
+        self.stream = stream
+        self.executor = executor
         super(CompiledBulk, self).__init__(self._Actions(actions), params)
 
     def api_method(self, client):
         return client.bulk
 
-    def visit_actions(self, actions):
-        body = []
+    def get_request_body(self):
+        if self.executor is not None:
+            return self.body
+        if self.compiler.body_encoder is None:
+            return self.body
+        return self.compiler.body_encoder.encode_ndjson(self.body)
+
+    def compile_action(self, action):
+        """Returns bulk lines of a single action: its meta and source
+        when the action has one.
+        """
+        lines = [self._meta_compiler.visit(action)]
+        source = self._source_compiler.visit(action)
+        if source is not None:
+            lines.append(source)
+        return lines
+
+    def iter_lines(self, actions):
+        """Lazily yields bulk lines of the actions.
+        """
+        visit_meta = self._meta_compiler.visit
+        visit_source = self._source_compiler.visit
         for action in actions:
-            meta = self.compiled_meta(action).body
-            body.append(meta)
-            source = self.compiled_source(action).body
+            yield visit_meta(action)
+            source = visit_source(action)
             if source is not None:
-                body.append(source)
-        return body
+                yield source
+
+    def visit_actions(self, actions):
+        if self.executor is not None:
+            # actions are encoded into bytes by the executor
+            return b''.join(
+                encode_actions(self.compiler, actions, self.executor)
+            )
+        if self.stream:
+            # actions are compiled while the client serializes the body,
+            # so compiled lines are not held in memory all at once
+            return self.iter_lines(actions)
+        return list(self.iter_lines(actions))
 
     def process_result(self, raw_result):
         return BulkResult(raw_result)
@@ -1598,60 +1920,22 @@ class CompiledSource(CompiledExpression):
                 doc.pop(exclude_field.get_field().get_name(), None)
 
         if action.__action_name__ == 'update':
-            script = action.source_params.pop('script', None)
+            source_params = dict(action.source_params)
+            script = source_params.pop('script', None)
             if script:
                 source = {'script': self.visit(script)}
             else:
                 source = {'doc': doc}
-            source.update(self.visit(action.source_params))
+            source.update(self.visit(source_params))
         else:
             source = doc
 
         return source
 
     def visit_document(self, doc):
-        source = {}
-        doc_cls = doc.__class__
-        for key, value in doc.__dict__.items():
-            # skip mapping fields
-            if key in doc_cls.mapping_fields:
-                continue
-
-            # ignore private attributes
-            if key.startswith('_Document__'):
-                continue
-
-            attr_field = doc_cls.fields.get(key)
-            if not attr_field:
-                continue
-
-            if value is None or value == '' or value == []:
-                if (
-                        self._validate and
-                        attr_field.get_field().get_mapping_options().get(
-                            'required'
-                        )
-                ):
-                    raise ValidationError("'{}' is required".format(
-                        attr_field.get_attr_name()
-                    ))
-            else:
-                value = attr_field.get_type() \
-                    .from_python(value, self.compiler, validate=self._validate)
-            source[attr_field.get_field().get_name()] = value
-
-        for attr_field in doc._fields.values():
-            if not self._validate:
-                continue
-
-            field = attr_field.get_field()
-            if (
-                    field.get_mapping_options().get('required') and
-                    field.get_name() not in source
-            ):
-                raise ValidationError(
-                    "'{}' is required".format(attr_field.get_attr_name())
-                )
+        source = doc.__class__._get_serializer()(
+            doc, self, validate=self._validate
+        )
 
         if _is_emulate_doc_types_mode(self.features, doc):
             doc_type_source = {}
@@ -1667,7 +1951,9 @@ class CompiledSource(CompiledExpression):
         return source
 
 
-def _featured_compiler(elasticsearch_features):
+def _featured_compiler(
+        elasticsearch_features, cache=None, body_encoder=None
+):
     def inject_features(cls):
         class _CompiledExpression(CompiledExpression):
             compiler = cls
@@ -1676,6 +1962,15 @@ def _featured_compiler(elasticsearch_features):
         class _CompiledSearchQuery(CompiledSearchQuery):
             compiler = cls
             features = elasticsearch_features
+            compiled_cache = cache
+
+        class _CompiledPreparedSearchQuery(CompiledPreparedSearchQuery):
+            compiler = cls
+            features = elasticsearch_features
+
+        class _CompiledPutSearchTemplate(CompiledPutSearchTemplate):
+            compiler = cls
+            features = elasticsearch_features
 
         class _CompiledScroll(CompiledScroll):
             compiler = cls
@@ -1684,10 +1979,12 @@ def _featured_compiler(elasticsearch_features):
         class _CompiledCountQuery(CompiledCountQuery):
             compiler = cls
             features = elasticsearch_features
+            compiled_cache = cache
 
         class _CompiledExistsQuery(CompiledExistsQuery):
             compiler = cls
             features = elasticsearch_features
+            compiled_cache = cache
 
         class _CompiledExplain(CompiledExplain):
             compiler = cls
@@ -1696,6 +1993,7 @@ def _featured_compiler(elasticsearch_features):
         class _CompiledDeleteByQuery(CompiledDeleteByQuery):
             compiler = cls
             features = elasticsearch_features
+            compiled_cache = cache
 
         class _CompiledMultiSearch(CompiledMultiSearch):
             compiler = cls
@@ -1738,9 +2036,13 @@ def _featured_compiler(elasticsearch_features):
             compiled_put_mapping = _CompiledPutMapping
 
         cls.features = elasticsearch_features
+        cls.compiled_cache = cache
+        cls.body_encoder = body_encoder
         cls.compiled_expression = _CompiledExpression
         cls.compiled_search_query = _CompiledSearchQuery
         cls.compiled_query = cls.compiled_search_query
+        cls.compiled_prepared_query = _CompiledPreparedSearchQuery
+        cls.compiled_put_search_template = _CompiledPutSearchTemplate
         cls.compiled_scroll = _CompiledScroll
         cls.compiled_count_query = _CompiledCountQuery
         cls.compiled_exists_query = _CompiledExistsQuery
@@ -1779,6 +2081,9 @@ def _featured_compiler(elasticsearch_features):
         supports_script_file=True,
         supports_nested_script=False,
         bulk_update_underscore_retry_on_conflict=True,
+        supports_stored_search_template=False,
+        supports_sliced_scroll=False,
+        supports_point_in_time=False,
     )
 )
 class Compiler_1_0(object):
@@ -1806,6 +2111,9 @@ class Compiler_1_0(object):
         supports_script_file=True,
         supports_nested_script=True,
         bulk_update_underscore_retry_on_conflict=True,
+        supports_stored_search_template=False,
+        supports_sliced_scroll=False,
+        supports_point_in_time=False,
     )
 )
 class Compiler_2_0(object):
@@ -1833,6 +2141,9 @@ class Compiler_2_0(object):
         supports_script_file=True,
         supports_nested_script=True,
         bulk_update_underscore_retry_on_conflict=True,
+        supports_stored_search_template=False,
+        supports_sliced_scroll=True,
+        supports_point_in_time=False,
     )
 )
 class Compiler_5_0(object):
@@ -1860,6 +2171,9 @@ class Compiler_5_0(object):
         supports_script_file=True,
         supports_nested_script=True,
         bulk_update_underscore_retry_on_conflict=True,
+        supports_stored_search_template=True,
+        supports_sliced_scroll=True,
+        supports_point_in_time=False,
     )
 )
 class Compiler_5_6(object):
@@ -1887,6 +2201,9 @@ class Compiler_5_6(object):
         supports_script_file=False,
         supports_nested_script=True,
         bulk_update_underscore_retry_on_conflict=True,
+        supports_stored_search_template=True,
+        supports_sliced_scroll=True,
+        supports_point_in_time=False,
     )
 )
 class Compiler_6_0(object):
@@ -1914,12 +2231,52 @@ class Compiler_6_0(object):
         supports_script_file=False,
         supports_nested_script=True,
         bulk_update_underscore_retry_on_conflict=False,
+        supports_stored_search_template=True,
+        supports_sliced_scroll=True,
+        supports_point_in_time=True,
     )
 )
 class Compiler_7_0(object):
     pass
 
 
+def with_compiled_cache(compiler, max_size=DEFAULT_COMPILED_CACHE_SIZE):
+    """Returns a copy of the compiler that caches compiled search queries.
+
+    Queries which have the same structure and differ only in literal values
+    (term values, ranges, limit, offset etc.) are compiled only once.
+    Cache statistics are available via ``compiled_cache`` attribute of the
+    returned compiler.
+    """
+    cached_compiler = type(
+        'Cached{}'.format(compiler.__name__), (compiler,), {}
+    )
+    return _featured_compiler(
+        compiler.features,
+        cache=CompiledQueryCache(max_size),
+        body_encoder=compiler.body_encoder,
+    )(cached_compiler)
+
+
+def with_body_encoder(compiler, body_encoder=None):
+    """Returns a copy of the compiler which compiled queries serialize their
+    bodies into bytes using ``body_encoder``
+    (:class:`.encoder.JSONBytesEncoder` by default) so the Elasticsearch
+    client does not need to encode them once more.
+
+    Bodies are still compiled into dicts first, the encoder is just a hook
+    that serializes them before they are passed to the client.
+    """
+    encoding_compiler = type(
+        'Encoding{}'.format(compiler.__name__), (compiler,), {}
+    )
+    return _featured_compiler(
+        compiler.features,
+        cache=compiler.compiled_cache,
+        body_encoder=body_encoder or JSONBytesEncoder(),
+    )(encoding_compiler)
+
+
 Compiler10 = Compiler_1_0
 
 Compiler20 = Compiler_2_0
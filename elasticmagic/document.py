@@ -1,9 +1,11 @@
-from .types import Type, String, Integer, Float, Date
+from .types import Type, String, Integer, Float, Date, Boolean, List
+from .types import _Float, _Int, Ip, Object, ValidationError
 from .attribute import AttributedField, DynamicAttributedField
 from .attribute import _attributed_field_factory
 from .expression import Field, MappingField
 from .datastructures import OrderedAttributes
 from .util import cached_property
+from .compat import text_type
 from .compat import with_metaclass
 
 
@@ -31,6 +33,283 @@ def get_doc_type_for_hit(hit):
     return hit['_type']
 
 
+def _lookup_class_attr(cls, name):
+    for klass in cls.__mro__:
+        if name in klass.__dict__:
+            return klass.__dict__[name]
+
+
+def _get_fast_class(field_type):
+    """Returns a class of values for which ``field_type.to_python`` returns
+    the value as is, ``None`` if the values are always returned as is
+    or ``False`` if every value must be converted.
+    """
+    to_python = _lookup_class_attr(type(field_type), 'to_python')
+    if to_python is Type.__dict__['to_python']:
+        return field_type.python_type
+    if to_python is Boolean.__dict__['to_python']:
+        return bool
+    return False
+
+
+def _make_list_to_python(list_type):
+    sub_type = list_type.sub_type
+    sub_fast_cls = _get_fast_class(sub_type)
+    if sub_fast_cls is None:
+        return False, list_type.to_python
+    sub_to_python = sub_type.to_python
+    to_python = list_type.to_python
+
+    def list_to_python(value):
+        if value.__class__ is not list:
+            return to_python(value)
+        return [
+            v if v.__class__ is sub_fast_cls else sub_to_python(v)
+            for v in value
+        ]
+    return False, list_to_python
+
+
+def _make_converter(field_type):
+    to_python = _lookup_class_attr(type(field_type), 'to_python')
+    if to_python is List.__dict__['to_python']:
+        return _make_list_to_python(field_type)
+    fast_cls = _get_fast_class(field_type)
+    if fast_cls is None:
+        return None, None
+    return fast_cls, field_type.to_python
+
+
+def _make_hydrator(cls):
+    """Generates a function that populates a document of the ``cls``
+    from a raw hit. Mapping fields are assigned without loops and source
+    values are not converted when they already have a proper type.
+    """
+    direct = (
+        _lookup_class_attr(cls, '__setattr__') is
+        object.__dict__['__setattr__']
+    )
+    process_source = (
+        _lookup_class_attr(cls, '_process_source_key_value') is
+        Document.__dict__['_process_source_key_value']
+    )
+
+    lines = []
+
+    def line(code, indent=1):
+        lines.append('    ' * indent + code)
+
+    def assign(name, value_code, indent=1):
+        attr = _lookup_class_attr(cls, name)
+        if direct and not hasattr(type(attr), '__set__'):
+            line('d[{!r}] = {}'.format(name, value_code), indent)
+        else:
+            line('setattr(self, {!r}, {})'.format(name, value_code), indent)
+
+    line('def hydrate(self, _hit):', 0)
+    line('d = self.__dict__')
+    line('_hit_get = _hit.get')
+    for name in (
+            '_Document__hit_fields', '_Document__highlight',
+            '_Document__matched_queries', '_Document__explanation',
+            '_index', '_type', '_id',
+    ):
+        assign(name, 'None')
+    assign('_score', "_hit_get('_score')")
+    line("source = _hit_get('_source')")
+    line("fields = _hit_get('fields')")
+    assign('_Document__sort_values', "_hit_get('sort')")
+    for attr_field in cls._mapping_fields:
+        assign(
+            attr_field._attr_name,
+            '_hit_get({!r})'.format(attr_field._field._name)
+        )
+
+    line('if fields:')
+    line('custom_doc_type = fields.get(', 2)
+    line('DOC_TYPE_NAME_FIELD, fields.get(DOC_TYPE_JOIN_FIELD)', 3)
+    line(')', 2)
+    line('if custom_doc_type:', 2)
+    line(
+        'self._process_custom_doc_type(_hit, fields, custom_doc_type[0])', 3
+    )
+
+    line('if source:')
+    if process_source:
+        line('for key, value in source.items():', 2)
+        line('spec = source_specs_get(key)', 3)
+        line('if spec is not None:', 3)
+        line('key, fast_cls, to_python = spec', 4)
+        line(
+            'if to_python is not None and value.__class__ is not fast_cls:',
+            4
+        )
+        line('value = to_python(value)', 5)
+        if direct:
+            line('d[key] = value', 3)
+        else:
+            line('setattr(self, key, value)', 3)
+    else:
+        line('process = self._process_source_key_value', 2)
+        line('for key, value in source.items():', 2)
+        line('setattr(self, *process(key, value))', 3)
+
+    line('if fields:')
+    assign('_Document__hit_fields', 'self._process_fields(fields)', 2)
+    for name, key in (
+            ('_Document__highlight', 'highlight'),
+            ('_Document__matched_queries', 'matched_queries'),
+            ('_Document__explanation', '_explanation'),
+    ):
+        line('value = _hit_get({!r})'.format(key))
+        line('if value:')
+        assign(name, 'value', 2)
+
+    source_specs = {}
+    for field_name, attr_field in cls._field_name_map.items():
+        fast_cls, to_python = _make_converter(attr_field.get_type())
+        source_specs[field_name] = (attr_field._attr_name, fast_cls, to_python)
+    namespace = {
+        'DOC_TYPE_NAME_FIELD': DOC_TYPE_NAME_FIELD,
+        'DOC_TYPE_JOIN_FIELD': DOC_TYPE_JOIN_FIELD,
+        'source_specs_get': source_specs.get,
+    }
+    exec('\n'.join(lines), namespace)
+    return namespace['hydrate']
+
+
+# these types return values as is when validation is disabled
+_PASSTHROUGH_FROM_PYTHON = frozenset([
+    Type.__dict__['from_python'],
+    _Int.__dict__['from_python'],
+    _Float.__dict__['from_python'],
+    Date.__dict__['from_python'],
+    Ip.__dict__['from_python'],
+])
+
+
+def _string_from_python(value, compiled):
+    if value.__class__ is text_type:
+        return value
+    return text_type(value)
+
+
+def _boolean_from_python(value, compiled):
+    return bool(value)
+
+
+def _make_from_python(field_type):
+    """Returns a function that converts a value of the ``field_type``
+    without validation or ``None`` when values are passed as is.
+    """
+    from_python = _lookup_class_attr(type(field_type), 'from_python')
+    if from_python in _PASSTHROUGH_FROM_PYTHON:
+        return None
+    if from_python is String.__dict__['from_python']:
+        return _string_from_python
+    if from_python is Boolean.__dict__['from_python']:
+        return _boolean_from_python
+    if from_python is Object.__dict__['from_python']:
+        doc_cls = field_type.doc_cls
+
+        def object_from_python(value, compiled):
+            if isinstance(value, doc_cls):
+                return compiled.visit(value)
+            return value
+        return object_from_python
+    if from_python is List.__dict__['from_python']:
+        sub_from_python = _make_from_python(field_type.sub_type)
+
+        def list_from_python(value, compiled):
+            if not isinstance(value, list):
+                value = [value]
+            if sub_from_python is None:
+                return list(value)
+            return [sub_from_python(v, compiled) for v in value]
+        return list_from_python
+
+    def type_from_python(value, compiled):
+        return field_type.from_python(value, compiled.compiler)
+    return type_from_python
+
+
+def _make_source_spec(attr_field):
+    field = attr_field.get_field()
+    field_type = attr_field.get_type()
+    return (
+        field.get_name(),
+        field_type,
+        _make_from_python(field_type),
+        bool(field.get_mapping_options().get('required')),
+        attr_field.get_attr_name(),
+    )
+
+
+def _make_serializer(cls):
+    """Generates a function that converts a document of the ``cls`` into
+    a source. Fields and type conversions are resolved once, values that
+    do not need conversion are taken as is.
+    """
+    source_specs = {}
+    for attr_name, attr_field in cls._fields.items():
+        if attr_name not in cls._mapping_fields:
+            source_specs[attr_name] = _make_source_spec(attr_field)
+    source_specs_get = source_specs.get
+    required_fields = [
+        (attr_field.get_field().get_name(), attr_field.get_attr_name())
+        for attr_field in cls._fields.values()
+        if attr_field.get_field().get_mapping_options().get('required')
+    ]
+    mapping_fields = cls._mapping_fields
+    fields = cls._fields
+
+    def serialize(doc, compiled, validate=False):
+        source = {}
+        for key, value in doc.__dict__.items():
+            spec = source_specs_get(key)
+            if spec is None:
+                if key in mapping_fields or key.startswith('_Document__'):
+                    continue
+                # dynamic fields
+                attr_field = fields.get(key)
+                if not attr_field:
+                    continue
+                spec = _make_source_spec(attr_field)
+            field_name, field_type, from_python, required, attr_name = spec
+
+            if value is None or value == '' or value == []:
+                if validate and required:
+                    raise ValidationError(
+                        "'{}' is required".format(attr_name)
+                    )
+            elif validate:
+                value = field_type.from_python(
+                    value, compiled.compiler, validate=True
+                )
+            elif from_python is not None:
+                value = from_python(value, compiled)
+            source[field_name] = value
+
+        if validate:
+            for field_name, attr_name in required_fields:
+                if field_name not in source:
+                    raise ValidationError(
+                        "'{}' is required".format(attr_name)
+                    )
+        return source
+    return serialize
+
+
+def _snapshot_value(value):
+    if isinstance(value, list):
+        return [_snapshot_value(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _snapshot_value(v) for k, v in value.items()}
+    if isinstance(value, Document):
+        return value.__class__, value._get_source_snapshot()
+    return value
+
+
 class DocumentMeta(type):
     def __new__(meta, name, bases, dct):
         cls = type.__new__(meta, name, bases, dct)
@@ -100,11 +379,28 @@ class DocumentMeta(type):
                 cls._user_fields[name] = attr_field
             cls._fields[name] = attr_field
             cls._field_name_map[field._name] = attr_field
+            for cached_attr in ('_hydrator', '_serializer'):
+                if cached_attr in cls.__dict__:
+                    super(DocumentMeta, cls).__delattr__(cached_attr)
 
             value = attr_field
 
         super(DocumentMeta, cls).__setattr__(name, value)
 
+    def _get_hydrator(cls):
+        hydrator = cls.__dict__.get('_hydrator')
+        if hydrator is None:
+            hydrator = _make_hydrator(cls)
+            super(DocumentMeta, cls).__setattr__('_hydrator', hydrator)
+        return hydrator
+
+    def _get_serializer(cls):
+        serializer = cls.__dict__.get('_serializer')
+        if serializer is None:
+            serializer = _make_serializer(cls)
+            super(DocumentMeta, cls).__setattr__('_serializer', serializer)
+        return serializer
+
     @property
     def fields(cls):
         return cls._fields
@@ -152,83 +448,45 @@ class Document(with_metaclass(DocumentMeta)):
 
     __mapping_options__ = {}
 
+    # take a snapshot of values of documents created from hits
+    __track_changes__ = False
+
     def __init__(self, _hit=None, _result=None, **kwargs):
-        self.__hit_fields = None
-        self.__highlight = None
-        self.__matched_queries = None
-        self.__explanation = None
-        self._index = self._type = self._id = self._score = None
         if _hit:
-            self._score = _hit.get('_score')
-            source = _hit.get('_source')
-            fields = _hit.get('fields')
-            self.__sort_values = _hit.get('sort')
-            if fields:
-                custom_doc_type = fields.get(
-                    DOC_TYPE_NAME_FIELD, fields.get(DOC_TYPE_JOIN_FIELD)
-                )
-            else:
-                custom_doc_type = None
-
-            for attr_field in self._mapping_fields:
-                setattr(
-                    self,
-                    attr_field._attr_name,
-                    _hit.get(attr_field._field._name)
-                )
-
-            if custom_doc_type:
-                doc_type = custom_doc_type[0]
-                _, _, self._id = _hit['_id'].rpartition(DOC_TYPE_ID_DELIMITER)
-                self._type = doc_type
-
-                custom_parent_id = fields.get(DOC_TYPE_PARENT_FIELD)
-                if not custom_parent_id:
-                    parent_field_prefix = '%s#' % DOC_TYPE_JOIN_FIELD
-                    for field_name, field_value in fields.items():
-                        if not field_name.startswith(parent_field_prefix):
-                            continue
-                        if field_name == '%s%s' % (
-                                parent_field_prefix, doc_type
-                        ):
-                            continue
-                        custom_parent_id = field_value
-                        break
-
-                if custom_parent_id:
-                    parent_id = custom_parent_id[0]
-                    _, _, self._parent = parent_id.rpartition(
-                        DOC_TYPE_ID_DELIMITER
-                    )
-
-            if source:
-                for hit_key, hit_value in source.items():
-                    setattr(
-                        self,
-                        *self._process_source_key_value(hit_key, hit_value)
-                    )
-
-            if fields:
-                # we cannot construct document from fields
-                # in next example we cannot decide
-                # which tag has name and which has not:
-                # {"tags.id": [1, 2], "tags.name": ["Test"]}
-                self.__hit_fields = self._process_fields(fields)
-
-            if _hit.get('highlight'):
-                self.__highlight = _hit['highlight']
-
-            if _hit.get('matched_queries'):
-                self.__matched_queries = _hit['matched_queries']
-
-            if _hit.get('_explanation'):
-                self.__explanation = _hit['_explanation']
+            self.__class__._get_hydrator()(self, _hit)
+            if self.__track_changes__:
+                self.track_changes()
+        else:
+            self.__hit_fields = None
+            self.__highlight = None
+            self.__matched_queries = None
+            self.__explanation = None
+            self._index = self._type = self._id = self._score = None
 
         for fkey, fvalue in kwargs.items():
             setattr(self, fkey, fvalue)
 
         self.__result = _result
 
+    def _process_custom_doc_type(self, _hit, fields, doc_type):
+        _, _, self._id = _hit['_id'].rpartition(DOC_TYPE_ID_DELIMITER)
+        self._type = doc_type
+
+        custom_parent_id = fields.get(DOC_TYPE_PARENT_FIELD)
+        if not custom_parent_id:
+            parent_field_prefix = '%s#' % DOC_TYPE_JOIN_FIELD
+            for field_name, field_value in fields.items():
+                if not field_name.startswith(parent_field_prefix):
+                    continue
+                if field_name == '%s%s' % (parent_field_prefix, doc_type):
+                    continue
+                custom_parent_id = field_value
+                break
+
+        if custom_parent_id:
+            parent_id = custom_parent_id[0]
+            _, _, self._parent = parent_id.rpartition(DOC_TYPE_ID_DELIMITER)
+
     def _process_source_key_value(self, key, value):
         if key in self._field_name_map:
             attr_field = self._field_name_map[key]
@@ -279,6 +537,50 @@ class Document(with_metaclass(DocumentMeta)):
         source_compiler = compiler.compiled_bulk.compiled_source
         return source_compiler(self, validate=validate).body
 
+    def _get_source_snapshot(self):
+        fields = self.__class__._fields
+        mapping_fields = self.__class__._mapping_fields
+        return {
+            key: _snapshot_value(value)
+            for key, value in self.__dict__.items()
+            if (
+                not key.startswith('_Document__') and
+                key not in mapping_fields and
+                fields.get(key)
+            )
+        }
+
+    def track_changes(self):
+        """Remembers current values of the document fields. Fields that
+        are modified after that are returned by
+        :meth:`get_changed_fields`.
+
+        Documents created from hits take a snapshot automatically when
+        ``__track_changes__`` of the document class is ``True``.
+        """
+        self.__snapshot = self._get_source_snapshot()
+
+    def get_changed_fields(self):
+        """Returns names of attributes that were modified since
+        :meth:`track_changes` was called.
+        """
+        snapshot = self.__dict__.get('_Document__snapshot')
+        if snapshot is None:
+            raise ValueError('Changes of the document are not tracked')
+        current = self._get_source_snapshot()
+        changed = [
+            key for key, value in current.items()
+            if (
+                snapshot[key] != value if key in snapshot
+                else value is not None
+            )
+        ]
+        changed.extend(
+            key for key, value in snapshot.items()
+            if key not in current and value is not None
+        )
+        return changed
+
     def get_highlight(self):
         return self.__highlight or {}
 
@@ -0,0 +1,76 @@
+import json
+
+from elasticsearch.serializer import JSONSerializer
+
+from .attribute import AttributedField
+from .compat import text_type
+from .expression import Field
+from .expression import Literal
+from .expression import Params
+
+
+class JSONBytesEncoder(object):
+    """Serializes compiled bodies into bytes that are passed to
+    the Elasticsearch client as is, so the client skips its own serializer.
+
+    Compilers still build bodies as python dicts, the encoder only replaces
+    the serialization step that the client would perform: it does not
+    avoid building the dicts.
+
+    Besides plain python objects the encoder understands leaf expressions
+    that can remain in a compiled body: :class:`.expression.Params`,
+    :class:`.expression.Literal` and fields. Dates, decimals and other values
+    returned by :meth:`.types.Type.from_python` are encoded the same way as
+    the Elasticsearch client does.
+    """
+    def __init__(self):
+        self._serializer = JSONSerializer()
+        self._init_encoder()
+
+    def _init_encoder(self):
+        self._encoder = json.JSONEncoder(
+            default=self.default,
+            ensure_ascii=False,
+            separators=(',', ':'),
+        )
+
+    def __getstate__(self):
+        # encoders are passed to worker processes of an executor, but bound
+        # methods cannot be pickled on python 2
+        state = self.__dict__.copy()
+        state.pop('_encoder', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_encoder()
+
+    def default(self, data):
+        if isinstance(data, Params):
+            return data._params
+        if isinstance(data, Literal):
+            return data.obj
+        if isinstance(data, Field):
+            return data._name
+        if isinstance(data, AttributedField):
+            return data._field._name
+        if isinstance(data, (set, frozenset)):
+            return list(data)
+        return self._serializer.default(data)
+
+    def encode(self, data):
+        """Returns JSON encoded bytes.
+        """
+        data = self._encoder.encode(data)
+        if isinstance(data, text_type):
+            data = data.encode('utf-8', 'surrogatepass')
+        return data
+
+    def encode_ndjson(self, lines):
+        """Returns newline delimited JSON for bulk and multi search apis.
+        """
+        buf = bytearray()
+        for line in lines:
+            buf += self.encode(line)
+            buf += b'\n'
+        return bytes(buf)
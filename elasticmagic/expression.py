@@ -58,6 +58,44 @@ class Params(Expression, Mapping):
         return key in self._params
 
 
+class UnboundParamError(Exception):
+    pass
+
+
+class Param(object):
+    """Named placeholder that can be used instead of a literal value.
+
+    Search query with placeholders must be prepared via
+    :meth:`.SearchQuery.prepare` and values are bound on every execution:
+
+    .. code-block:: python
+
+       prepared_sq = (
+           index.search_query()
+           .filter(UserDocument.group_id == Param('group_id'))
+           .limit(Param('size'))
+           .prepare()
+       )
+       prepared_sq.execute(group_id=1, size=10)
+    """
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def _unbound(self, *args):
+        raise UnboundParamError(
+            'Value of the parameter is not bound: {!r}'.format(self)
+        )
+
+    __str__ = __format__ = __hash__ = _unbound
+    __eq__ = __ne__ = __lt__ = __le__ = __gt__ = __ge__ = _unbound
+    __bool__ = __nonzero__ = __len__ = _unbound
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self.name)
+
+
 class ParamsExpression(Expression):
     def __init__(self, **kwargs):
         super(ParamsExpression, self).__init__()
@@ -123,7 +161,10 @@ class Terms(FieldExpression):
             field, minimum_should_match=minimum_should_match, boost=boost,
             **kwargs
         )
-        self.terms = list(terms)
+        if isinstance(terms, Param):
+            self.terms = terms
+        else:
+            self.terms = list(terms)
 
 
 class Match(FieldQueryExpression):
@@ -626,6 +667,7 @@ class Field(Expression, FieldOperators):
         self._fields = kwargs.pop('fields', {})
         self._count = kwargs.pop('_counter', next(self._counter))
         self._mapping_options = kwargs
+        self._type = self._type.apply_mapping_options(kwargs)
 
     def clone(self, cls=None):
         cls = cls or self.__class__
@@ -0,0 +1,151 @@
+import asyncio
+
+from elasticsearch import TransportError
+
+from ...bulk import _make_result
+from ...bulk import _store_items
+from ...bulk import encode_actions
+from ...bulk import get_backoff
+from ...bulk import RETRY_STATUSES
+from ...encoder import JSONBytesEncoder
+
+_DONE = object()
+
+
+async def _aiter_actions(actions):
+    if hasattr(actions, '__aiter__'):
+        async for action in actions:
+            yield action
+    else:
+        for action in actions:
+            yield action
+
+
+class AsyncBulkStream(object):
+    """Sends actions from an asynchronous iterable in chunks keeping up to
+    ``max_in_flight`` bulk requests at once.
+
+    The source is read only while there is a free slot, and a slot is freed
+    when the results of its chunk are consumed, so a slow consumer or a
+    slow cluster stops reading of the source.
+
+    With ``serialize_executor`` chunks are encoded by the executor, see
+    :func:`elasticmagic.bulk.encode_actions`.
+    """
+
+    def __init__(
+            self, cluster, actions, params, chunk_size=500, max_in_flight=4,
+            max_retries=3, initial_backoff=0.5, max_backoff=30,
+            retry_statuses=RETRY_STATUSES, serialize_executor=None,
+    ):
+        self._cluster = cluster
+        self._actions = actions
+        self._params = params
+        self.chunk_size = chunk_size
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.retry_statuses = frozenset(retry_statuses)
+        self.serialize_executor = serialize_executor
+
+    async def __aiter__(self):
+        compiler = await self._cluster.get_compiler()
+        compiled_bulk = compiler.compiled_bulk([])
+        encoder = compiler.body_encoder or JSONBytesEncoder()
+        slots = asyncio.Semaphore(self.max_in_flight)
+        results = asyncio.Queue()
+        senders = set()
+
+        async def send(actions, payloads):
+            try:
+                if self.serialize_executor is not None:
+                    payloads = await asyncio.get_event_loop().run_in_executor(
+                        None, encode_actions, compiler, actions,
+                        self.serialize_executor
+                    )
+                result = await self._send_chunk(payloads)
+            except Exception as e:
+                await results.put((None, None, e))
+            else:
+                await results.put((actions, result, None))
+
+        def start_sender(actions, payloads):
+            sender = asyncio.ensure_future(send(actions, payloads))
+            senders.add(sender)
+            sender.add_done_callback(senders.discard)
+
+        async def produce():
+            try:
+                actions = []
+                payloads = []
+                async for action in _aiter_actions(self._actions):
+                    if not actions:
+                        await slots.acquire()
+                    actions.append(action)
+                    if self.serialize_executor is None:
+                        payloads.append(encoder.encode_ndjson(
+                            compiled_bulk.compile_action(action)
+                        ))
+                    if len(actions) >= self.chunk_size:
+                        start_sender(actions, payloads)
+                        actions = []
+                        payloads = []
+                if actions:
+                    start_sender(actions, payloads)
+                if senders:
+                    await asyncio.wait(list(senders))
+                await results.put(_DONE)
+            except Exception as e:
+                await results.put((None, None, e))
+
+        producer = asyncio.ensure_future(produce())
+        try:
+            while True:
+                res = await results.get()
+                if res is _DONE:
+                    break
+                actions, result, error = res
+                if error is not None:
+                    raise error
+                for action, item in zip(actions, result.items):
+                    yield action, item
+                slots.release()
+        finally:
+            producer.cancel()
+            for sender in list(senders):
+                sender.cancel()
+            await asyncio.gather(
+                producer, *senders, return_exceptions=True
+            )
+
+    async def _send_chunk(self, payloads):
+        client = self._cluster.get_client()
+        raw_items = [None] * len(payloads)
+        took = 0
+        pending = list(range(len(payloads)))
+        retries = 0
+        while True:
+            try:
+                raw_result = await self._cluster._do_api_call(
+                    client.bulk, dict(self._params),
+                    b''.join(payloads[ix] for ix in pending)
+                )
+            except TransportError as e:
+                if (
+                        e.status_code not in self.retry_statuses or
+                        retries >= self.max_retries
+                ):
+                    raise
+            else:
+                took += raw_result.get('took') or 0
+                pending = _store_items(
+                    raw_items, pending, raw_result, self.retry_statuses
+                )
+                if not pending or retries >= self.max_retries:
+                    break
+            await asyncio.sleep(get_backoff(
+                retries, self.initial_backoff, self.max_backoff
+            ))
+            retries += 1
+        return _make_result(took, raw_items)
@@ -1,6 +1,11 @@
+import asyncio
+import functools
+
 from elasticmagic.compiler import get_compiler_by_es_version
 
+from ...bulk import RETRY_STATUSES
 from ...cluster import BaseCluster
+from .bulk import AsyncBulkStream
 from .index import AsyncIndex
 from .search import AsyncSearchQuery
 
@@ -10,10 +15,13 @@ class AsyncCluster(BaseCluster):
     _search_query_cls = AsyncSearchQuery
 
     async def _do_request(self, compiler, *args, **kwargs):
-        compiled_query = compiler(*args, **kwargs)
+        return await self._do_compiled_request(compiler(*args, **kwargs))
+
+    async def _do_compiled_request(self, compiled_query):
         api_method = compiled_query.api_method(self._client)
         raw_res = await self._do_api_call(
-            api_method, compiled_query.params, compiled_query.body
+            api_method, compiled_query.params,
+            compiled_query.get_request_body()
         )
         return compiled_query.process_result(raw_res)
 
@@ -31,9 +39,10 @@ class AsyncCluster(BaseCluster):
 
     async def get_compiler(self):
         if self._compiler:
-            return self._compiler
+            compiler = self._compiler
         else:
-            return get_compiler_by_es_version(await self.get_es_version())
+            compiler = get_compiler_by_es_version(await self.get_es_version())
+        return self._wrap_compiler(compiler)
 
     async def get(
             self, doc_or_id, index=None, doc_cls=None, doc_type=None,
@@ -49,11 +58,12 @@ class AsyncCluster(BaseCluster):
     async def multi_get(
             self, docs_or_ids, index=None, doc_cls=None, doc_type=None,
             source=None, parent=None, routing=None, preference=None,
-            realtime=None, refresh=None, **kwargs
+            realtime=None, refresh=None, raw_hits=False, **kwargs
     ):
+        params, raw_hits = self._multi_get_params(locals())
         return await self._do_request(
             (await self.get_compiler()).compiled_multi_get,
-            docs_or_ids, self._multi_get_params(locals()), doc_cls=doc_cls
+            docs_or_ids, params, doc_cls=doc_cls, raw_hits=raw_hits
         )
 
     mget = multi_get
@@ -61,10 +71,26 @@ class AsyncCluster(BaseCluster):
     async def search(
             self, q, index=None, doc_type=None, routing=None, preference=None,
             timeout=None, search_type=None, query_cache=None,
-            terminate_after=None, scroll=None, stats=None, **kwargs
+            terminate_after=None, scroll=None, stats=None, raw_hits=None,
+            **kwargs
     ):
+        params, raw_hits = self._search_query_params(locals())
         return await self._do_request(
             (await self.get_compiler()).compiled_search_query,
+            q, params, raw_hits=raw_hits
+        )
+
+    async def search_prepared(
+            self, q, bindings=None, index=None, doc_type=None, routing=None,
+            preference=None, search_type=None, scroll=None, **kwargs
+    ):
+        return await self._do_request(
+            q.bind, bindings, self._search_prepared_params(locals())
+        )
+
+    async def put_search_template(self, q, **kwargs):
+        return await self._do_request(
+            (await self.get_compiler()).compiled_put_search_template,
             q, self._search_params(locals())
         )
 
@@ -96,13 +122,14 @@ class AsyncCluster(BaseCluster):
 
     async def scroll(
             self, scroll_id, scroll, doc_cls=None, instance_mapper=None,
-            **kwargs
+            raw_hits=False, **kwargs
     ):
         return await self._do_request(
             (await self.get_compiler()).compiled_scroll,
             self._scroll_params(locals()),
             doc_cls=doc_cls,
             instance_mapper=instance_mapper,
+            raw_hits=raw_hits,
         )
 
     async def clear_scroll(self, scroll_id, **kwargs):
@@ -111,15 +138,33 @@ class AsyncCluster(BaseCluster):
             await self._client.clear_scroll(**params)
         )
 
+    async def open_point_in_time(
+            self, index=None, keep_alive=None, routing=None,
+            preference=None, **kwargs
+    ):
+        params = self._preprocess_params(locals())
+        return self._open_point_in_time_result(
+            await self._client.open_point_in_time(**params)
+        )
+
+    async def close_point_in_time(self, pit_id, **kwargs):
+        params = self._close_point_in_time_params(locals())
+        return self._close_point_in_time_result(
+            await self._client.close_point_in_time(**params)
+        )
+
     async def multi_search(
             self, queries, index=None, doc_type=None,
             routing=None, preference=None, search_type=None,
-            raise_on_error=None, **kwargs
+            raise_on_error=None, raw_hits=None, **kwargs
     ):
-        params, raise_on_error = self._multi_search_params(locals())
+        params, raise_on_error, raw_hits = self._multi_search_params(
+            locals()
+        )
         return await self._do_request(
             (await self.get_compiler()).compiled_multi_search,
-            queries, params, raise_on_error=raise_on_error
+            queries, params,
+            raise_on_error=raise_on_error, raw_hits=raw_hits
         )
 
     msearch = multi_search
@@ -174,11 +219,55 @@ class AsyncCluster(BaseCluster):
 
     async def bulk(
             self, actions, index=None, doc_type=None, refresh=None,
-            timeout=None, consistency=None, replication=None, **kwargs
+            timeout=None, consistency=None, replication=None, stream=False,
+            serialize_executor=None, **kwargs
     ):
-        return await self._do_request(
-            (await self.get_compiler()).compiled_bulk,
-            actions, self._bulk_params(locals())
+        compiled_bulk = (await self.get_compiler()).compiled_bulk
+        params = self._bulk_params(locals())
+        if serialize_executor is None:
+            return await self._do_request(
+                compiled_bulk, actions, params, stream=stream
+            )
+        # wait for the executor in a thread not to block the event loop
+        compiled_query = await asyncio.get_event_loop().run_in_executor(
+            None, functools.partial(
+                compiled_bulk, actions, params, executor=serialize_executor
+            )
+        )
+        return await self._do_compiled_request(compiled_query)
+
+    def bulk_stream(
+            self, actions, chunk_size=500, max_in_flight=4, index=None,
+            doc_type=None, refresh=None, timeout=None, max_retries=3,
+            initial_backoff=0.5, max_backoff=30,
+            retry_statuses=RETRY_STATUSES, serialize_executor=None, **kwargs
+    ):
+        """Sends actions from an iterable or an asynchronous iterable in
+        chunks of ``chunk_size`` and yields ``(action, result)`` pairs
+        where ``result`` is an :class:`elasticmagic.result.ActionResult`.
+
+        Up to ``max_in_flight`` chunks are sent concurrently. Items rejected
+        with one of ``retry_statuses`` are resent with exponential backoff,
+        as well as whole chunks when a bulk request fails with one of these
+        statuses.
+
+        .. code-block:: python
+
+           async for action, result in cluster.bulk_stream(actions):
+               if result.error:
+                   log_error(action, result.error)
+        """
+        params = self._preprocess_params(
+            locals(), 'actions', 'chunk_size', 'max_in_flight',
+            'max_retries', 'initial_backoff', 'max_backoff',
+            'retry_statuses', 'serialize_executor',
+        )
+        return AsyncBulkStream(
+            self, actions, params, chunk_size=chunk_size,
+            max_in_flight=max_in_flight, max_retries=max_retries,
+            initial_backoff=initial_backoff, max_backoff=max_backoff,
+            retry_statuses=retry_statuses,
+            serialize_executor=serialize_executor,
         )
 
     async def refresh(self, index=None, **kwargs):
@@ -45,6 +45,19 @@ class AsyncIndex(BaseIndex):
             **kwargs
         )
 
+    async def search_prepared(
+            self, q, bindings=None, doc_type=None, routing=None,
+            preference=None, search_type=None, scroll=None, **kwargs
+    ):
+        return await self._cluster.search_prepared(
+            q, bindings, index=self._name, doc_type=doc_type,
+            routing=routing, preference=preference, search_type=search_type,
+            scroll=scroll, **kwargs
+        )
+
+    async def put_search_template(self, q, **kwargs):
+        return await self._cluster.put_search_template(q, **kwargs)
+
     async def explain(
             self, q, doc_or_id, doc_cls=None, routing=None, **kwargs
     ):
@@ -95,6 +108,17 @@ class AsyncIndex(BaseIndex):
     async def clear_scroll(self, scroll_id, **kwargs):
         return await self._cluster.clear_scroll(scroll_id, **kwargs)
 
+    async def open_point_in_time(
+            self, keep_alive=None, routing=None, preference=None, **kwargs
+    ):
+        return await self._cluster.open_point_in_time(
+            index=self._name, keep_alive=keep_alive, routing=routing,
+            preference=preference, **kwargs
+        )
+
+    async def close_point_in_time(self, pit_id, **kwargs):
+        return await self._cluster.close_point_in_time(pit_id, **kwargs)
+
     async def put_mapping(
             self, doc_cls_or_mapping, doc_type=None, allow_no_indices=None,
             expand_wildcards=None, ignore_conflicts=None,
@@ -153,6 +177,9 @@ class AsyncIndex(BaseIndex):
             **kwargs
         )
 
+    def bulk_stream(self, actions, **kwargs):
+        return self._cluster.bulk_stream(actions, index=self._name, **kwargs)
+
     async def refresh(self, **kwargs):
         return await self._cluster.refresh(index=self._name, **kwargs)
 
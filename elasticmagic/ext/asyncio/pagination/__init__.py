@@ -1,3 +1,4 @@
+from elasticmagic.ext.pagination import BaseCursorSearchQueryWrapper
 from elasticmagic.ext.pagination import BaseSearchQueryWrapper
 
 
@@ -26,3 +27,22 @@ class AsyncSearchQueryWrapper(BaseSearchQueryWrapper):
         if self.sliced_query is None:
             raise ValueError('Slice first')
         return await self.sliced_query.get_result()
+
+
+class AsyncCursorSearchQueryWrapper(BaseCursorSearchQueryWrapper):
+
+    async def get_page(self, cursor=None):
+        direction, has_cursor = self._prepare_page(cursor)
+        return self._process_result(
+            direction, has_cursor, await self.page_query.get_result()
+        )
+
+    def __iter__(self):
+        if self.items is None:
+            raise ValueError('Get page first')
+        return iter(self.items)
+
+    async def get_result(self):
+        if self.page_query is None:
+            raise ValueError('Get page first')
+        return await self.page_query.get_result()
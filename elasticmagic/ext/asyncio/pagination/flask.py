@@ -1,6 +1,8 @@
 from elasticmagic.cluster import MAX_RESULT_WINDOW
 
+from . import AsyncCursorSearchQueryWrapper
 from . import AsyncSearchQueryWrapper
+from ...pagination.flask import BaseCursorPagination
 from ...pagination.flask import BasePagination
 
 
@@ -32,3 +34,36 @@ class AsyncPagination(BasePagination):
         return await self.create(
             self.original_query, **self._next_page_params()
         )
+
+
+class AsyncCursorPagination(BaseCursorPagination):
+    """Asynchronous version of the
+    :class:`elasticmagic.ext.pagination.flask.CursorPagination`
+    """
+
+    @classmethod
+    async def create(
+            cls, query, tiebreaker_field, secret_key, cursor=None,
+            per_page=10, track_total_hits=False,
+    ):
+        self = cls()
+        self.original_query = query
+        self.query = AsyncCursorSearchQueryWrapper(
+            query, tiebreaker_field, secret_key, per_page=per_page,
+            track_total_hits=track_total_hits,
+        )
+        self.cursor = cursor
+        self.per_page = per_page
+        self.items = await self.query.get_page(cursor)
+        self.total = self.query.count
+        return self
+
+    async def prev(self):
+        return await self.create(
+            self.original_query, **self._page_params(self.prev_cursor)
+        )
+
+    async def next(self):
+        return await self.create(
+            self.original_query, **self._page_params(self.next_cursor)
+        )
@@ -1,4 +1,7 @@
+import asyncio
+
 from ...search import BaseSearchQuery
+from ...search import PreparedSearchQuery
 
 
 class AsyncSearchQuery(BaseSearchQuery):
@@ -53,6 +56,113 @@ class AsyncSearchQuery(BaseSearchQuery):
             **kwargs
         )
 
+    async def prepare(self, template_id=None):
+        compiled_query = (await self.get_compiler()).compiled_prepared_query(
+            self, template_id=template_id
+        )
+        if template_id is not None:
+            await self._index_or_cluster.put_search_template(compiled_query)
+        return PreparedSearchQuery(self, compiled_query)
+
+    def iter_scroll(self, scroll='1m', size=None, prefetch=1, pages=False):
+        """Asynchronous version of the :meth:`.SearchQuery.iter_scroll`.
+        Returns an asynchronous iterator, the next page is requested
+        in a background task while the current one is being processed.
+
+        When the iteration is interrupted use ``aclose`` method
+        of the returned iterator to clear the scroll context immediately.
+        """
+        result_pages = self._iter_scroll_pages(
+            self._prepare_scroll(scroll, size), scroll, prefetch
+        )
+        if pages:
+            return result_pages
+        return self._iter_page_hits(result_pages)
+
+    async def _iter_scroll_pages(self, search_query, scroll, prefetch):
+        index_or_cluster = self._index_or_cluster
+        scroll_kwargs = search_query._get_scroll_kwargs()
+
+        async def fetch(scroll_id):
+            return await index_or_cluster.scroll(
+                scroll_id, scroll, **scroll_kwargs
+            )
+
+        result = await index_or_cluster.search(search_query)
+        scroll_id = result.scroll_id
+        prefetcher = None
+        try:
+            if prefetch and result.hits:
+                prefetcher = _AsyncScrollPrefetcher(fetch, scroll_id, prefetch)
+            while result.hits:
+                yield result
+                if prefetcher is not None:
+                    result = await prefetcher.get()
+                else:
+                    result = await fetch(scroll_id)
+                scroll_id = result.scroll_id or scroll_id
+        finally:
+            if prefetcher is not None:
+                scroll_id = await prefetcher.stop()
+            if scroll_id is not None:
+                await index_or_cluster.clear_scroll(scroll_id)
+
+    def iter_search_after(
+            self, page_size, tiebreaker_field, pit_keep_alive=None,
+            pages=False,
+    ):
+        """Asynchronous version of the
+        :meth:`.SearchQuery.iter_search_after`.
+
+        When the iteration is interrupted use ``aclose`` method
+        of the returned iterator to close the point in time immediately.
+        """
+        result_pages = self._iter_search_after_pages(
+            self._prepare_search_after(page_size, tiebreaker_field),
+            page_size, pit_keep_alive
+        )
+        if pages:
+            return result_pages
+        return self._iter_page_hits(result_pages)
+
+    async def _iter_search_after_pages(
+            self, search_query, page_size, pit_keep_alive
+    ):
+        index_or_cluster = self._index_or_cluster
+        pit_id = None
+        if pit_keep_alive is not None:
+            pit_id = (
+                await index_or_cluster.open_point_in_time(
+                    keep_alive=pit_keep_alive
+                )
+            ).id
+        try:
+            sort_values = None
+            while True:
+                result = await index_or_cluster.search(
+                    self._get_search_after_query(
+                        search_query, pit_id, pit_keep_alive, sort_values
+                    )
+                )
+                pit_id = result.pit_id or pit_id
+                if not result.hits:
+                    break
+                yield result
+                if len(result.hits) < page_size:
+                    break
+                sort_values = self._get_last_sort_values(result)
+        finally:
+            if pit_id is not None:
+                await index_or_cluster.close_point_in_time(pit_id)
+
+    async def _iter_page_hits(self, result_pages):
+        try:
+            async for result in result_pages:
+                for hit in self._iter_result(result):
+                    yield hit
+        finally:
+            await result_pages.aclose()
+
     async def _iter_result_async(self):
         return self._iter_result(await self.get_result())
 
@@ -68,3 +178,44 @@ class AsyncSearchQuery(BaseSearchQuery):
 
     def __getitem__(self, k):
         return self._getitem_async(k)
+
+
+class _AsyncScrollPrefetcher(object):
+    """Fetches scroll pages in a background task.
+    """
+
+    def __init__(self, fetch, scroll_id, size):
+        self._fetch = fetch
+        self.scroll_id = scroll_id
+        self._pages = asyncio.Queue(size)
+        self._stopped = False
+        self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        while not self._stopped:
+            try:
+                result = await self._fetch(self.scroll_id)
+            except Exception as e:
+                await self._pages.put((None, e))
+                return
+            if result.scroll_id:
+                self.scroll_id = result.scroll_id
+            await self._pages.put((result, None))
+            if not result.hits:
+                return
+
+    async def get(self):
+        result, error = await self._pages.get()
+        if error is not None:
+            raise error
+        return result
+
+    async def stop(self):
+        """Stops fetching and returns the last scroll id.
+        """
+        self._stopped = True
+        # free the queue so a blocked task can put its page and exit
+        while not self._pages.empty():
+            self._pages.get_nowait()
+        await self._task
+        return self.scroll_id
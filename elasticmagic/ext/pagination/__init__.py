@@ -1,6 +1,11 @@
 import warnings
 
 from ...cluster import MAX_RESULT_WINDOW
+from .cursor import CursorSigner
+from .cursor import get_sort_values
+from .cursor import NEXT
+from .cursor import PREV
+from .cursor import reverse_order
 
 
 class BaseSearchQueryWrapper(object):
@@ -69,3 +74,108 @@ class SearchQueryWrapper(BaseSearchQueryWrapper):
             DeprecationWarning
         )
         return self.get_result()
+
+
+class BaseCursorSearchQueryWrapper(object):
+    """Paginates the query with ``search_after`` instead of offsets so
+    every page costs the same regardless of its depth.
+
+    Pages are addressed by opaque signed cursors. A cursor of the previous
+    page reverses the sorting of the query. Total hits are not counted
+    unless ``track_total_hits`` is ``True``.
+    """
+    def __init__(
+            self, query, tiebreaker_field, secret_key, per_page=10,
+            track_total_hits=False,
+    ):
+        self.query = query
+        self.tiebreaker_field = tiebreaker_field
+        self.signer = CursorSigner(secret_key)
+        self.per_page = per_page
+        self.track_total_hits = track_total_hits
+        self.page_query = None
+        self.items = None
+        self.count = None
+        self.has_next = False
+        self.has_prev = False
+        self.next_cursor = None
+        self.prev_cursor = None
+
+    def _prepare_page(self, cursor):
+        if cursor:
+            direction, sort_values = self.signer.loads(cursor)
+        else:
+            direction, sort_values = NEXT, None
+
+        # fetch one more hit to find out if there is one more page
+        page_query = self.query._prepare_search_after(
+            self.per_page + 1, self.tiebreaker_field
+        )
+        if not self.track_total_hits:
+            page_query = page_query.with_track_total_hits(False)
+        if direction == PREV:
+            page_query = page_query.order_by(None).order_by(*[
+                reverse_order(order)
+                for order in page_query.get_context().order_by
+            ])
+        else:
+            page_query = page_query.clone()
+        if sort_values:
+            page_query.search_after(*sort_values)
+        self.page_query = page_query
+        return direction, bool(cursor)
+
+    def _process_result(self, direction, has_cursor, result):
+        hits = list(result.hits)
+        has_more = len(hits) > self.per_page
+        hits = hits[:self.per_page]
+        if direction == PREV:
+            hits.reverse()
+            self.has_prev = has_more
+            self.has_next = True
+        else:
+            self.has_prev = has_cursor
+            self.has_next = has_more
+
+        self.next_cursor = None
+        self.prev_cursor = None
+        if hits:
+            if self.has_next:
+                self.next_cursor = self.signer.dumps(
+                    NEXT, get_sort_values(hits[-1])
+                )
+            if self.has_prev:
+                self.prev_cursor = self.signer.dumps(
+                    PREV, get_sort_values(hits[0])
+                )
+
+        if self.page_query.get_context().iter_instances:
+            self.items = [doc.instance for doc in hits if doc.instance]
+        else:
+            self.items = hits
+        self.count = result.total if self.track_total_hits else None
+        return self.items
+
+
+class CursorSearchQueryWrapper(BaseCursorSearchQueryWrapper):
+    def get_page(self, cursor=None):
+        """Fetches the page pointed by the ``cursor`` or the first page
+        and returns its items.
+
+        :raises .cursor.InvalidCursor: if the cursor is malformed or was
+           not signed with the same secret key
+        """
+        direction, has_cursor = self._prepare_page(cursor)
+        return self._process_result(
+            direction, has_cursor, self.page_query.get_result()
+        )
+
+    def __iter__(self):
+        if self.items is None:
+            raise ValueError('Get page first')
+        return iter(self.items)
+
+    def get_result(self):
+        if self.page_query is None:
+            raise ValueError('Get page first')
+        return self.page_query.get_result()
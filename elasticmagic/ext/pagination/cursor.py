@@ -0,0 +1,113 @@
+import base64
+import hashlib
+import hmac
+import json
+
+from ...compat import text_type
+from ...expression import Sort
+from ...expression import SortScript
+from ...search import _get_sort_field_name
+
+
+NEXT = 'n'
+PREV = 'p'
+
+# sort fields that do not support the missing parameter
+SPECIAL_SORT_FIELDS = frozenset(['_score', '_doc', '_shard_doc'])
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(data):
+    data = data.encode('ascii')
+    return base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+
+
+class CursorSigner(object):
+    """Encodes a direction and sort values of a page boundary into an opaque
+    url safe token signed with ``secret_key``, so clients cannot forge
+    ``search_after`` values.
+    """
+
+    def __init__(self, secret_key):
+        if isinstance(secret_key, text_type):
+            secret_key = secret_key.encode('utf-8')
+        self.secret_key = secret_key
+
+    def _sign(self, payload):
+        return hmac.new(self.secret_key, payload, hashlib.sha256).digest()
+
+    def dumps(self, direction, sort_values):
+        payload = json.dumps(
+            [direction, sort_values], separators=(',', ':')
+        ).encode('utf-8')
+        return '{}.{}'.format(
+            _b64encode(payload), _b64encode(self._sign(payload))
+        )
+
+    def loads(self, cursor):
+        """Returns a direction and sort values of the ``cursor``.
+
+        :raises InvalidCursor: if the cursor is malformed or its signature
+           does not match
+        """
+        try:
+            payload, signature = cursor.split('.')
+            payload = _b64decode(payload)
+            signature = _b64decode(signature)
+        except (AttributeError, ValueError, TypeError):
+            raise InvalidCursor('Malformed cursor')
+        if not hmac.compare_digest(self._sign(payload), signature):
+            raise InvalidCursor('Invalid cursor signature')
+        try:
+            direction, sort_values = json.loads(payload.decode('utf-8'))
+        except ValueError:
+            raise InvalidCursor('Malformed cursor')
+        if direction not in (NEXT, PREV) or not isinstance(sort_values, list):
+            raise InvalidCursor('Malformed cursor')
+        return direction, sort_values
+
+
+def reverse_order(order):
+    """Returns sorting criterion with the opposite order. Missing values that
+    are sorted last by default are placed first.
+    """
+    if isinstance(order, SortScript):
+        return SortScript(
+            order.script, script_type=order.script_type,
+            order='asc' if order.order == 'desc' else 'desc',
+        )
+
+    if isinstance(order, Sort):
+        expr = order.expr
+        direction = order.order
+        params = dict(order.params)
+    else:
+        expr = order
+        direction = None
+        params = {}
+
+    name = _get_sort_field_name(expr)
+    if direction is None:
+        direction = 'desc' if name == '_score' else 'asc'
+    if name not in SPECIAL_SORT_FIELDS:
+        missing = params.get('missing')
+        if missing is None or missing == '_last':
+            params['missing'] = '_first'
+        elif missing == '_first':
+            params['missing'] = '_last'
+    return Sort(
+        expr, order='asc' if direction == 'desc' else 'desc', **params
+    )
+
+
+def get_sort_values(hit):
+    if isinstance(hit, dict):
+        return hit.get('sort') or []
+    return hit.get_sort_values()
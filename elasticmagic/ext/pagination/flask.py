@@ -4,6 +4,7 @@ from __future__ import unicode_literals
 from abc import ABCMeta
 from math import ceil
 
+from . import CursorSearchQueryWrapper
 from . import SearchQueryWrapper
 from ...cluster import MAX_RESULT_WINDOW
 from ...compat import with_metaclass
@@ -114,3 +115,64 @@ class Pagination(BasePagination):
         return type(self)(
             self.original_query, **self._next_page_params()
         )
+
+
+class BaseCursorPagination(object):
+    def _page_params(self, cursor):
+        return {
+            'tiebreaker_field': self.query.tiebreaker_field,
+            'secret_key': self.query.signer.secret_key,
+            'cursor': cursor,
+            'per_page': self.per_page,
+            'track_total_hits': self.query.track_total_hits,
+        }
+
+    @property
+    def has_prev(self):
+        return self.query.has_prev
+
+    @property
+    def prev_cursor(self):
+        return self.query.prev_cursor
+
+    @property
+    def has_next(self):
+        return self.query.has_next
+
+    @property
+    def next_cursor(self):
+        return self.query.next_cursor
+
+
+class CursorPagination(BaseCursorPagination):
+    """Pagination that navigates between pages using ``search_after``
+    cursors instead of page numbers. Pass :attr:`next_cursor` or
+    :attr:`prev_cursor` to a client and create the pagination with the
+    cursor it sends back.
+
+    Total hits are not counted by default so :attr:`total` is ``None``
+    unless ``track_total_hits`` is ``True``.
+    """
+    def __init__(
+            self, query, tiebreaker_field, secret_key, cursor=None,
+            per_page=10, track_total_hits=False,
+    ):
+        self.original_query = query
+        self.query = CursorSearchQueryWrapper(
+            query, tiebreaker_field, secret_key, per_page=per_page,
+            track_total_hits=track_total_hits,
+        )
+        self.cursor = cursor
+        self.per_page = per_page
+        self.items = self.query.get_page(cursor)
+        self.total = self.query.count
+
+    def prev(self):
+        return type(self)(
+            self.original_query, **self._page_params(self.prev_cursor)
+        )
+
+    def next(self):
+        return type(self)(
+            self.original_query, **self._page_params(self.next_cursor)
+        )
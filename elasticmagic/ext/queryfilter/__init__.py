@@ -1,4 +1,5 @@
 from .queryfilter import QueryFilter, FacetFilter, RangeFilter
+from .queryfilter import QueryFilterState
 from .queryfilter import FacetQueryFilter, FacetQueryValue
 from .queryfilter import SimpleFilter, SimpleQueryFilter, SimpleQueryValue
 from .queryfilter import OrderingFilter, OrderingValue
@@ -18,6 +19,7 @@ __all__ = [
     'OrderingValue',
     'PageFilter',
     'QueryFilter',
+    'QueryFilterState',
     'RangeFilter',
     'SimpleFilter',
     'SimpleQueryFilter',
@@ -1,10 +1,11 @@
 import datetime
+import functools
 import math
 from collections import defaultdict
 
-import dateutil.parser
-
 from elasticmagic.types import instantiate
+from elasticmagic.types import parse_date
+from elasticmagic.types import Date
 from elasticmagic.types import Type
 from elasticmagic.compat import force_unicode
 from elasticmagic.compat import int_types
@@ -89,7 +90,9 @@ class DateCodec(TypeCodec):
     def decode(self, value, es_type=None):
         if isinstance(value, (datetime.datetime, datetime.date)):
             return value
-        return dateutil.parser.parse(value)
+        if isinstance(es_type, Date):
+            return es_type.to_python(value)
+        return parse_date(value)
 
 
 def wrap_list(v):
@@ -113,12 +116,23 @@ class BaseCodec(object):
 
 
 class SimpleCodec(BaseCodec):
+    """Decodes parameters like ``price__gte=100`` into
+    ``{'price': {'gte': [100]}}``.
+
+    Values of parameters that are missing in ``types`` are decoded as
+    strings. Decoders of the names and their operators are compiled once
+    for every ``types`` mapping. At most ``max_values``
+    values of a parameter are decoded, pass ``None`` to decode all of them.
+    """
+
     OP_SEP = '__'
 
     NULL_VAL = 'null'
 
     DEFAULT_OP = 'exact'
 
+    OPERATORS = ('exact', 'gte', 'gt', 'lte', 'lt')
+
     CODECS = {
         None: StringCodec,
         float: FloatCodec,
@@ -127,6 +141,15 @@ class SimpleCodec(BaseCodec):
         datetime.datetime: DateCodec,
     }
 
+    MAX_PLANS = 64
+
+    MAX_VALUES = 300
+
+    max_values = MAX_VALUES
+
+    def __init__(self, max_values=MAX_VALUES):
+        self.max_values = max_values
+
     @staticmethod
     def _normalize_params(params):
         if hasattr(params, 'getall'):
@@ -173,25 +196,75 @@ class SimpleCodec(BaseCodec):
         value_codec = self.CODECS.get(python_type, StringCodec)()
         return value_codec.decode(value, es_type=es_type)
 
+    def _make_value_decoder(self, es_type):
+        for cls in self.__class__.__mro__:
+            if cls is SimpleCodec:
+                break
+            if 'decode_value' in cls.__dict__:
+                return functools.partial(self.decode_value, es_type=es_type)
+
+        es_type, python_type = self._get_es_and_python_types(es_type)
+        value_codec = self.CODECS.get(python_type, StringCodec)()
+        null_value = self.NULL_VAL
+
+        def decode_value(value):
+            if value is None or value == null_value:
+                return None
+            return value_codec.decode(value, es_type=es_type)
+
+        return decode_value
+
+    def _compile(self, types):
+        # maps parameter names to their name, operator and value decoder,
+        # None key holds a decoder for parameters of unknown types
+        plan = {None: (None, None, self._make_value_decoder(None))}
+        for name, es_type in types.items():
+            decode_value = self._make_value_decoder(es_type)
+            plan[name] = (name, self.DEFAULT_OP, decode_value)
+            for op in self.OPERATORS:
+                plan[name + self.OP_SEP + op] = (name, op, decode_value)
+        return plan
+
+    def _get_plan(self, types):
+        # subclasses may not call __init__ so the cache is created lazily
+        plans = self.__dict__.setdefault('_plans', {})
+        key = frozenset(types.items())
+        plan = plans.get(key)
+        if plan is None:
+            plan = self._compile(types)
+            if len(plans) >= self.MAX_PLANS:
+                plans.clear()
+            plans[key] = plan
+        return plan
+
     def decode(self, params, types=None):
         params = self._normalize_params(params)
-        types = types or {}
+        plan = self._get_plan(types or {})
+        max_values = self.max_values
         decoded_params = {}
-        for name, v in params.items():
-            name, _, op = name.partition(self.OP_SEP)
-            if not op:
-                op = self.DEFAULT_OP
-            es_type = types.get(name)
-            for w in wrap_list(v):
+        for key, v in params.items():
+            decoder = plan.get(key)
+            if decoder is None:
+                name, _, op = key.partition(self.OP_SEP)
+                name_decoder = plan.get(name) or plan[None]
+                decoder = (name, op or self.DEFAULT_OP, name_decoder[2])
+            name, op, decode_value = decoder
+
+            values = wrap_list(v)
+            if max_values is not None and len(values) > max_values:
+                values = values[:max_values]
+            decoded_values = []
+            for w in values:
                 try:
-                    decoded_value = self.decode_value(w, es_type=es_type)
-                    decoded_params \
-                        .setdefault(name, {}) \
-                        .setdefault(op, []) \
-                        .append(decoded_value)
+                    decoded_values.append(decode_value(w))
                 except ValueError:
                     # just ignore values we cannot decode
                     pass
+            if decoded_values:
+                decoded_params \
+                    .setdefault(name, {}) \
+                    .setdefault(op, []) \
+                    .extend(decoded_values)
 
         return decoded_params
 
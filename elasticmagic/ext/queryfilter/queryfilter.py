@@ -1,6 +1,7 @@
 import functools
 import logging
 import operator
+from collections import OrderedDict
 from math import ceil
 from itertools import chain
 
@@ -47,41 +48,75 @@ class QueryFilterMeta(type):
     def __setattr__(cls, name, value):
         if isinstance(value, UnboundFilter):
             cls._unbound_filters.append((name, value))
+            cls._reset_filter_plan()
         else:
             type.__setattr__(cls, name, value)
 
+    def _reset_filter_plan(cls):
+        if '_filter_plan' in cls.__dict__:
+            type.__delattr__(cls, '_filter_plan')
+        for subclass in cls.__subclasses__():
+            subclass._reset_filter_plan()
+
+    def _get_filter_plan(cls):
+        """Returns filters of the class bound once and shared by all its
+        instances. They must not be changed, instances and request states
+        work with their copies.
+        """
+        plan = cls.__dict__.get('_filter_plan')
+        if plan is None:
+            filters = []
+            for base_cls in reversed(cls.__mro__):
+                for filter_name, unbound_filter in base_cls.__dict__.get(
+                        '_unbound_filters', ()
+                ):
+                    filters = [f for f in filters if f.name != filter_name]
+                    filters.append(unbound_filter.bind(filter_name))
+            plan = tuple(filters)
+            type.__setattr__(cls, '_filter_plan', plan)
+        return plan
+
+
+class QueryFilterState(object):
+    """Holds parameters, selected values and filters of a single request.
+
+    A query filter keeps the state of the last request by itself, so an
+    instance cannot be used by several requests at once. Pass a state
+    created by :meth:`QueryFilter.create_state` into
+    :meth:`QueryFilter.apply` and :meth:`QueryFilter.process_result` to
+    share one query filter between threads:
+
+    .. code-block:: python
+
+       qf = CarQueryFilter()
+
+       def search(params):
+           state = qf.create_state()
+           sq = qf.apply(index.search_query(), params, state=state)
+           return qf.process_result(sq.get_result(), state=state)
+
+    Filters of the state are copies of the query filter ones, so
+    request data such as ``state.page.total`` can be read from them.
+    """
 
-class QueryFilter(with_metaclass(QueryFilterMeta)):
-    NAME = 'qf'
-
-    CONJ_OR = 'CONJ_OR'
-    CONJ_AND = 'CONJ_AND'
-
-    def __init__(self, name=None, codec=None):
-        self._name = name or self.NAME
-        self._codec = codec or SimpleCodec()
+    def __init__(self, name, codec, filters):
+        self._name = name
+        self._codec = codec
         self._filters = []
 
         self._params = {}
         self._state = {}
         self._data = {}
+        self._agg_groups = None
 
-        for base_cls in reversed(self.__class__.__mro__):
-            if hasattr(base_cls, '_unbound_filters'):
-                for filter_name, unbound_filter in base_cls._unbound_filters:
-                    self.add_filter(unbound_filter.bind(filter_name))
-
-        self.reset()
+        for filt in filters:
+            filt = filt._bind(self)
+            self._filters.append(filt)
+            setattr(self, filt.name, filt)
 
     def get_name(self):
         return self._name
 
-    def get_types(self):
-        types = {}
-        for filt in self._filters:
-            types.update(filt._types)
-        return types
-
     def _set_selected(self, name, value):
         self._state.setdefault(name, {})[value] = True
 
@@ -94,17 +129,86 @@ class QueryFilter(with_metaclass(QueryFilterMeta)):
     def _value_data(self, name, value):
         return self._data.get(name, {}).get(value, {})
 
+    @property
+    def filters(self):
+        return self._filters
+
+    def get_filter(self, name):
+        return getattr(self, name, None)
+
+
+class QueryFilter(with_metaclass(QueryFilterMeta, QueryFilterState)):
+    NAME = 'qf'
+
+    CONJ_OR = 'CONJ_OR'
+    CONJ_AND = 'CONJ_AND'
+
+    def __init__(self, name=None, codec=None, group_aggs=False):
+        """Parameters are decoded by ``codec``, by default it is
+        :class:`.codec.SimpleCodec` that decodes at most
+        :attr:`.codec.SimpleCodec.MAX_VALUES` values of a parameter. Pass
+        ``codec=SimpleCodec(max_values=...)`` to change the limit.
+
+        When ``group_aggs`` is ``True`` aggregations of the filters
+        that are calculated on documents matching the same filters are
+        placed under a single filter aggregation, so Elasticsearch does not
+        evaluate the same filters for every one of them.
+        """
+        super(QueryFilter, self).__init__(
+            name or self.NAME, codec or SimpleCodec(), ()
+        )
+        self._group_aggs = group_aggs
+
+        for filt in self.__class__._get_filter_plan():
+            self.add_filter(filt._bind(self))
+
+    def __getattr__(self, name):
+        # filters waiting for the result are hidden until the first access,
+        # see process_result
+        pending = self.__dict__.get('_pending_filters')
+        if pending and name in pending:
+            filt = pending.pop(name)
+            setattr(self, name, filt)
+            self._pending_result.get_filter(name)
+            return filt
+        raise AttributeError(
+            "'{}' object has no attribute '{}'".format(
+                self.__class__.__name__, name
+            )
+        )
+
+    def _restore_pending_filters(self):
+        pending = self.__dict__.pop('_pending_filters', None)
+        for name, filt in (pending or {}).items():
+            setattr(self, name, filt)
+        self._pending_result = None
+
+    @property
+    def filters(self):
+        for name in list(self.__dict__.get('_pending_filters', ())):
+            getattr(self, name)
+        return self._filters
+
+    def get_types(self):
+        types = {}
+        for filt in self._filters:
+            types.update(filt._types)
+        return types
+
+    def create_state(self):
+        """Creates a state for a single request, see
+        :class:`QueryFilterState`.
+        """
+        return QueryFilterState(self._name, self._codec, self._filters)
+
     def reset(self):
+        self._restore_pending_filters()
         self._params = {}
         self._state = {}
         self._data = {}
         for filt in self._filters:
             filt._reset()
 
-    @property
-    def filters(self):
-        return self._filters
-
     def add_filter(self, filter):
         self.remove_filter(filter.name)
         filter.qf = self
@@ -119,44 +223,153 @@ class QueryFilter(with_metaclass(QueryFilterMeta)):
                     break
             self._filters = self._filters[:ix] + self._filters[ix + 1:]
 
-    def apply(self, search_query, params):
-        self._params = self._codec.decode(params, self.get_types())
+    def apply(self, search_query, params, state=None):
+        if state is None:
+            self._restore_pending_filters()
+            state = self
+        state._params = self._codec.decode(params, self.get_types())
+
+        state._agg_groups = (
+            FilterAggGroups(self._name) if self._group_aggs else None
+        )
+
+        # filters change the same copy of the query
+        search_query = search_query.builder()
 
         # First filter query with all filters
-        for f in self._filters:
-            search_query = f._apply_filter(search_query, self._params)
+        for f in state._filters:
+            search_query = f._apply_filter(search_query, state._params)
 
         # then add aggregations
-        for f in self._filters:
+        for f in state._filters:
             search_query = f._apply_agg(search_query)
+        if state._agg_groups is not None:
+            search_query = state._agg_groups.apply(search_query)
+
+        return search_query.build()
+
+    def process_result(self, result, state=None, only=None):
+        """Returns a :class:`QueryFilterResult` with results of the filters.
+
+        Results of the filters are processed on first access, so filters
+        that are not rendered cost nothing. Without a ``state`` accessing
+        a filter of the query filter itself, such as ``qf.price.max``,
+        processes it as well. When ``only`` names are passed just these
+        filters are processed at once.
+        """
+        if state is None:
+            self._restore_pending_filters()
+            state = self
+        if only is None:
+            qf_result = QueryFilterResult(
+                {}, result=result, params=state._params,
+                pending=state._filters,
+            )
+            if state is self:
+                self._pending_result = qf_result
+                self._pending_filters = OrderedDict(
+                    (f.name, f) for f in self._filters
+                )
+                for name in self._pending_filters:
+                    self.__dict__.pop(name, None)
+            return qf_result
 
-        return search_query
-
-    def process_result(self, result):
+        only = set(only)
         filter_results = {}
-        for f in self._filters:
-            filter_results[f.name] = f._process_result(
-                result, self._params
-            )
+        for f in state._filters:
+            if f.name in only:
+                filter_results[f.name] = f._process_result(
+                    result, state._params
+                )
         return QueryFilterResult(filter_results)
 
     process_results = process_result
 
-    def get_filter(self, name):
-        return getattr(self, name, None)
+
+class FilterAggGroups(object):
+    """Collects aggregations of the filters grouped by the filters they
+    are calculated with. Aggregations of a group are placed under a single
+    filter aggregation that is named after the filter when it is the only
+    one in the group.
+    """
+
+    def __init__(self, qf_name):
+        self._qf_name = qf_name
+        self._groups = OrderedDict()
+        self._agg_names = {}
+
+    def add(self, filt, filters, aggs):
+        # filters with the same exclusion set get the same expressions
+        # from the search query context
+        key = tuple(map(id, filters))
+        if key not in self._groups:
+            self._groups[key] = (filters, [])
+        self._groups[key][1].append((filt, aggs))
+
+    def apply(self, search_query):
+        group_aggs = {}
+        shared_count = 0
+        for filters, members in self._groups.values():
+            if len(members) == 1:
+                filt, aggs = members[0]
+                agg_name = filt._filter_agg_name
+            else:
+                agg_name = '{}.filters.{}'.format(self._qf_name, shared_count)
+                shared_count += 1
+                aggs = {}
+                for filt, filter_aggs in members:
+                    aggs.update(filter_aggs)
+            for filt, _ in members:
+                self._agg_names[filt.name] = agg_name
+            group_aggs[agg_name] = agg.Filter(Bool.must(*filters), aggs=aggs)
+        if not group_aggs:
+            return search_query
+        return search_query.aggregations(**group_aggs)
+
+    def get_agg_name(self, filter_name):
+        return self._agg_names.get(filter_name)
 
 
 class QueryFilterResult(object):
-    def __init__(self, filters):
+    """Holds results of the filters by their names. Results of the
+    ``pending`` filters are processed from the search ``result`` on first
+    access.
+    """
+
+    def __init__(self, filters, result=None, params=None, pending=()):
         self._filters = filters
+        self._result = result
+        self._params = params
+        self._pending = OrderedDict((f.name, f) for f in pending)
         for filter_name, filter_result in self._filters.items():
             setattr(self, filter_name, filter_result)
 
+    def __getattr__(self, name):
+        # is called only for attributes that are not set yet
+        if name in self.__dict__.get('_pending', ()):
+            return self._process_filter(name)
+        raise AttributeError(
+            "'{}' object has no attribute '{}'".format(
+                self.__class__.__name__, name
+            )
+        )
+
+    def _process_filter(self, name):
+        filt = self._pending.pop(name)
+        filter_result = filt._process_result(self._result, self._params)
+        self._filters[name] = filter_result
+        setattr(self, name, filter_result)
+        return filter_result
+
     @property
     def filters(self):
+        for name in list(self._pending):
+            self._process_filter(name)
         return self._filters
 
     def get_filter(self, name):
+        if name in self._pending:
+            return self._process_filter(name)
         return self._filters.get(name)
 
 
@@ -177,11 +390,23 @@ class BaseFilter(object):
         self.alias = alias or self.name
         self.qf = None
 
+    def _bind(self, qf):
+        """Returns a copy of the filter that keeps its request data in
+        the ``qf``.
+        """
+        filt = object.__new__(self.__class__)
+        filt.__dict__.update(self.__dict__)
+        filt.qf = qf
+        filt._reset()
+        return filt
+
     def _reset(self):
         pass
 
     @property
     def _types(self):
+        # types of the parameters the filter reads, values of parameters
+        # without a type are decoded as strings
         return {}
 
     def _get_agg_filters(self, filters, exclude_tags):
@@ -192,6 +417,34 @@ class BaseFilter(object):
                 active_filters.append(filt)
         return active_filters
 
+    def _get_agg_groups(self):
+        if isinstance(self.qf, QueryFilterState):
+            return self.qf._agg_groups
+
+    def _add_filtered_aggs(self, search_query, filters, aggs):
+        """Adds aggregations that are calculated on documents matching
+        the filters.
+        """
+        if not filters:
+            return search_query.aggregations(**aggs)
+        agg_groups = self._get_agg_groups()
+        if agg_groups is not None:
+            agg_groups.add(self, filters, aggs)
+            return search_query
+        return search_query.aggregations(**{
+            self._filter_agg_name: agg.Filter(Bool.must(*filters), aggs=aggs)
+        })
+
+    def _get_filtered_aggs(self, result):
+        """Returns the result of the filter aggregation added by
+        :meth:`_add_filtered_aggs` or ``None``.
+        """
+        agg_name = None
+        agg_groups = self._get_agg_groups()
+        if agg_groups is not None:
+            agg_name = agg_groups.get_agg_name(self.name)
+        return result.get_aggregation(agg_name or self._filter_agg_name)
+
     def _apply_filter(self, search_query, params):
         raise NotImplementedError()
 
@@ -319,26 +572,17 @@ class FacetFilter(SimpleFilter):
             self.field, instance_mapper=self._instance_mapper,
             **self._agg_kwargs
         )
-        if filters or additional_filters:
-            aggs = {
-                self._filter_agg_name: agg.Filter(
-                    Bool.must(*(filters + additional_filters)),
-                    aggs={self._agg_name: terms_agg}
-                )
-            }
-        else:
-            aggs = {self._agg_name: terms_agg}
-        return search_query.aggregations(**aggs)
+        return self._add_filtered_aggs(
+            search_query, filters + additional_filters,
+            {self._agg_name: terms_agg}
+        )
 
     def _process_result(self, result, params):
         values = self._get_values_from_params(params.get(self.alias, {}))
 
-        if result.get_aggregation(self._filter_agg_name):
-            terms_agg = result \
-                .get_aggregation(self._filter_agg_name) \
-                .get_aggregation(self._agg_name)
-        else:
-            terms_agg = result.get_aggregation(self._agg_name)
+        terms_agg = (
+            self._get_filtered_aggs(result) or result
+        ).get_aggregation(self._agg_name)
 
         facet_result = FacetFilterResult(self.name, self.alias)
         processed_values = set()
@@ -478,6 +722,10 @@ class BinaryFilter(BaseFilter):
         self.selected = False
         self.count = 0
 
+    @property
+    def _types(self):
+        return {self.name if self.p_key is None else self.p_key: None}
+
     def _apply_filter(self, search_query, params):
         self.selected = self._parameters_condition(params)
         if not self.selected:
@@ -635,33 +883,21 @@ class RangeFilter(FieldFilter):
             {self.qf._name, self.name}
         )
 
-        aggs = {}
         if self._compute_enabled:
-            aggs.update({
+            search_query = search_query.aggregations(**{
                 self._enabled_agg_name: agg.Filter(self.field != None),
             })
 
         if self._compute_min_max:
-            stat_aggs = {
+            search_query = self._add_filtered_aggs(search_query, filters, {
                 self._min_agg_name: agg.Min(self.field),
                 self._max_agg_name: agg.Max(self.field),
-            }
-            if filters:
-                aggs.update({
-                    self._filter_agg_name: agg.Filter(
-                        Bool.must(*filters), aggs=stat_aggs
-                    )
-                })
-            else:
-                aggs.update(stat_aggs)
+            })
 
-        return search_query.aggregations(**aggs)
+        return search_query
 
     def _process_result(self, result, params):
-        if result.get_aggregation(self._filter_agg_name):
-            base_agg = result.get_aggregation(self._filter_agg_name)
-        else:
-            base_agg = result
+        base_agg = self._get_filtered_aggs(result) or result
 
         if self._compute_enabled:
             self.enabled = bool(
@@ -718,6 +954,12 @@ class SimpleQueryFilter(BaseFilter):
         self._conj_operator = kwargs.pop('conj_operator', QueryFilter.CONJ_OR)
         self.default = kwargs.pop('default', None)
 
+    def _bind(self, qf):
+        filt = super(SimpleQueryFilter, self)._bind(qf)
+        filt._values = [fv.bind(filt) for fv in self._values]
+        filt._values_map = {fv.value: fv for fv in filt._values}
+        return filt
+
     @property
     def all_values(self):
         return self._values
@@ -857,23 +1099,11 @@ class FacetQueryFilter(SimpleQueryFilter):
                 fv.expr, **self.agg_kwargs
             )
 
-        if filters:
-            aggs = {
-                self._filter_agg_name: agg.Filter(
-                    Bool.must(*filters), aggs=filter_aggs
-                )
-            }
-        else:
-            aggs = filter_aggs
-
-        return search_query.aggregations(**aggs)
+        return self._add_filtered_aggs(search_query, filters, filter_aggs)
 
     def _process_result(self, result, params):
         values = params.get(self.alias, {}).get('exact', [])
-        if result.get_aggregation(self._filter_agg_name):
-            filters_agg = result.get_aggregation(self._filter_agg_name)
-        else:
-            filters_agg = result
+        filters_agg = self._get_filtered_aggs(result) or result
         for fv in self.values:
             filt_agg = filters_agg.get_aggregation(
                 self._make_agg_name(fv.value)
@@ -995,6 +1225,13 @@ class OrderingFilter(BaseFilter):
         self._values_map = {fv.value: fv for fv in self.values}
         self.selected_value = None
 
+    def _bind(self, qf):
+        filt = super(OrderingFilter, self)._bind(qf)
+        filt.values = [fv.bind(filt) for fv in self.values]
+        filt.default_value = filt.get_value(self.default_value.value)
+        filt._values_map = {fv.value: fv for fv in filt.values}
+        return filt
+
     def get_value(self, value):
         for ordering_value in self.values:
             if ordering_value.value == value:
@@ -1279,35 +1516,19 @@ class NestedFacetFilter(BaseFilter):
                 **self._agg_kwargs
             )
         })
-        if filters:
-            aggs = {
-                self._filter_agg_name: agg.Filter(
-                    Bool.must(*filters), aggs={self._agg_name: terms_agg}
-                )
-            }
-        else:
-            aggs = {self._agg_name: terms_agg}
-
-        return search_query.aggregations(**aggs)
+        return self._add_filtered_aggs(
+            search_query, filters, {self._agg_name: terms_agg}
+        )
 
     def _process_result(self, result, params):
         values = self._get_values_from_params(params.get(self.alias, {}))
 
-        if result.get_aggregation(self._filter_agg_name):
-            terms_agg = (
-                result
-                .get_aggregation(self._filter_agg_name)
-                .get_aggregation(self._agg_name)
-                .get_aggregation(self._filter_key_agg_name)
-                .get_aggregation(self._filter_value_agg_name)
-            )
-        else:
-            terms_agg = (
-                result
-                .get_aggregation(self._agg_name)
-                .get_aggregation(self._filter_key_agg_name)
-                .get_aggregation(self._filter_value_agg_name)
-            )
+        terms_agg = (
+            (self._get_filtered_aggs(result) or result)
+            .get_aggregation(self._agg_name)
+            .get_aggregation(self._filter_key_agg_name)
+            .get_aggregation(self._filter_value_agg_name)
+        )
 
         facet_result = FacetFilterResult(self.name, self.alias)
         processed_values = set()
@@ -1444,9 +1665,8 @@ class NestedRangeFilter(BaseFilter):
             {self.qf._name, self.name}
         )
 
-        aggs = {}
         if self._compute_enabled:
-            aggs.update({
+            search_query = search_query.aggregations(**{
                 self._enabled_agg_name: agg.Nested(
                     path=self.path,
                     aggs={
@@ -1476,22 +1696,14 @@ class NestedRangeFilter(BaseFilter):
                     }
                 )
             }
-            if filters:
-                aggs.update({
-                    self._filter_agg_name: agg.Filter(
-                        Bool.must(*filters), aggs=stat_aggs
-                    )
-                })
-            else:
-                aggs.update(stat_aggs)
+            search_query = self._add_filtered_aggs(
+                search_query, filters, stat_aggs
+            )
 
-        return search_query.aggregations(**aggs)
+        return search_query
 
     def _process_result(self, result, params):
-        if result.get_aggregation(self._filter_agg_name):
-            base_agg = result.get_aggregation(self._filter_agg_name)
-        else:
-            base_agg = result
+        base_agg = self._get_filtered_aggs(result) or result
 
         if self._compute_enabled:
             self.enabled = bool(
@@ -92,6 +92,19 @@ class Index(BaseIndex):
             **kwargs
         )
 
+    def search_prepared(
+            self, q, bindings=None, doc_type=None, routing=None,
+            preference=None, search_type=None, scroll=None, **kwargs
+    ):
+        return self._cluster.search_prepared(
+            q, bindings, index=self._name, doc_type=doc_type,
+            routing=routing, preference=preference, search_type=search_type,
+            scroll=scroll, **kwargs
+        )
+
+    def put_search_template(self, q, **kwargs):
+        return self._cluster.put_search_template(q, **kwargs)
+
     def explain(self, q, doc_or_id, doc_cls=None, routing=None, **kwargs):
         return self._cluster.explain(
             q, doc_or_id, index=self._name, doc_cls=doc_cls, routing=routing,
@@ -141,6 +154,17 @@ class Index(BaseIndex):
     def clear_scroll(self, scroll_id, **kwargs):
         return self._cluster.clear_scroll(scroll_id, **kwargs)
 
+    def open_point_in_time(
+            self, keep_alive=None, routing=None, preference=None, **kwargs
+    ):
+        return self._cluster.open_point_in_time(
+            index=self._name, keep_alive=keep_alive, routing=routing,
+            preference=preference, **kwargs
+        )
+
+    def close_point_in_time(self, pit_id, **kwargs):
+        return self._cluster.close_point_in_time(pit_id, **kwargs)
+
     def put_mapping(
             self, doc_cls_or_mapping, doc_type=None, allow_no_indices=None,
             expand_wildcards=None, ignore_conflicts=None,
@@ -204,6 +228,9 @@ class Index(BaseIndex):
             **kwargs
         )
 
+    def bulk_indexer(self, **kwargs):
+        return self._cluster.bulk_indexer(index=self._name, **kwargs)
+
     def refresh(self, **kwargs):
         return self._cluster.refresh(index=self._name, **kwargs)
 
@@ -0,0 +1,272 @@
+import operator
+from collections import OrderedDict
+
+from .cache import SLOT_TYPES
+from .cache import make_key
+from .expression import Bool
+from .expression import BooleanExpression
+from .expression import ConstantScore
+from .expression import Exists
+from .expression import Ids
+from .expression import MatchAll
+from .expression import Range
+from .expression import Term
+from .expression import Terms
+from .expression import UnboundParamError
+
+
+FLATTEN_BOOL = 'flatten_bool'
+DEDUPLICATE_FILTERS = 'deduplicate_filters'
+MERGE_TERMS = 'merge_terms'
+DROP_MATCH_ALL = 'drop_match_all'
+MOVE_TO_FILTER = 'move_to_filter'
+
+# Queries which score does not depend on a document so they can be
+# executed in a filter context without changing an order of hits
+CONSTANT_SCORE_EXPRESSIONS = (Terms, Range, Exists, Ids, ConstantScore)
+
+CONJUNCTION_KEYS = frozenset(['must', 'filter'])
+DISJUNCTION_KEYS = frozenset(['should'])
+
+
+def _as_list(clauses):
+    if clauses is None:
+        return []
+    if isinstance(clauses, (list, tuple)):
+        return list(clauses)
+    return [clauses]
+
+
+def _from_list(orig_clauses, clauses):
+    if not clauses:
+        return None
+    if len(clauses) == 1 and not isinstance(orig_clauses, (list, tuple)):
+        return clauses[0]
+    return clauses
+
+
+def _is_match_all(expr):
+    return isinstance(expr, MatchAll) and not expr.params
+
+
+def _is_boolean(expr, op):
+    return (
+        isinstance(expr, BooleanExpression) and
+        expr.operator is op and
+        not expr.params
+    )
+
+
+def _has_only(expr, keys):
+    return isinstance(expr, Bool) and set(expr.params).issubset(keys)
+
+
+def _is_constant_score(expr):
+    return (
+        isinstance(expr, CONSTANT_SCORE_EXPRESSIONS) and
+        'boost' not in expr.params
+    )
+
+
+def _get_merge_key(expr):
+    if isinstance(expr, Term) and not expr.params:
+        values = [expr.query]
+    elif (
+            isinstance(expr, Terms) and
+            isinstance(expr.terms, list) and
+            not expr.params
+    ):
+        values = expr.terms
+    else:
+        return None, None
+    if not all(isinstance(v, SLOT_TYPES) for v in values):
+        return None, None
+    try:
+        field_key, _ = make_key(expr.field)
+    except UnboundParamError:
+        return None, None
+    return field_key, values
+
+
+class QueryOptimizer(object):
+    """Rewrites query expressions before compilation so Elasticsearch
+    receives smaller bool trees.
+
+    Applied rewrites with the number of times they were applied are
+    available via :attr:`rewrites`.
+    """
+
+    def __init__(self):
+        self.rewrites = OrderedDict()
+
+    def _applied(self, rewrite, count=1):
+        self.rewrites[rewrite] = self.rewrites.get(rewrite, 0) + count
+
+    def optimize_query(self, q, move_to_filter=True):
+        """Optimizes a query in a scoring context.
+
+        Returns optimized query and a list of clauses that must be added
+        into a filter context.
+        """
+        if q is None:
+            return None, []
+        if _is_match_all(q):
+            self._applied(DROP_MATCH_ALL)
+            return None, []
+        if move_to_filter and _is_constant_score(q):
+            self._applied(MOVE_TO_FILTER)
+            return None, [q]
+        if not isinstance(q, Bool):
+            return q, []
+
+        params = dict(q.params)
+        must_clauses = []
+        filter_clauses = _as_list(params.pop('filter', None))
+        self._flatten_must(
+            _as_list(params.pop('must', None)),
+            must_clauses, filter_clauses, move_to_filter
+        )
+        if 'must_not' in params:
+            params['must_not'] = _from_list(
+                q.params['must_not'],
+                self._deduplicate([
+                    self._optimize_clause(c)
+                    for c in _as_list(params['must_not'])
+                ])
+            )
+
+        if params:
+            # bool query has other clauses or parameters
+            # so filters must stay inside of it
+            filter_clauses = self.optimize_filters(filter_clauses)
+            if (
+                    not must_clauses and not filter_clauses and
+                    'should' in params and
+                    'minimum_should_match' not in params and
+                    ('must' in q.params or 'filter' in q.params)
+            ):
+                # without must and filter clauses at least one of should
+                # clauses is required to match
+                must_clauses = [MatchAll()]
+            return Bool(
+                must=_from_list(q.params.get('must'), must_clauses),
+                filter=_from_list(q.params.get('filter'), filter_clauses),
+                **params
+            ), []
+        if len(must_clauses) > 1:
+            return Bool(must=must_clauses), filter_clauses
+        if must_clauses:
+            return must_clauses[0], filter_clauses
+        return None, filter_clauses
+
+    def _flatten_must(self, clauses, must_clauses, filter_clauses, move):
+        for c in clauses:
+            if _is_match_all(c):
+                self._applied(DROP_MATCH_ALL)
+            elif _has_only(c, CONJUNCTION_KEYS):
+                self._applied(FLATTEN_BOOL)
+                filter_clauses.extend(_as_list(c.params.get('filter')))
+                self._flatten_must(
+                    _as_list(c.params.get('must')),
+                    must_clauses, filter_clauses, move
+                )
+            elif move and _is_constant_score(c):
+                self._applied(MOVE_TO_FILTER)
+                filter_clauses.append(c)
+            else:
+                must_clauses.append(c)
+
+    def optimize_filters(self, filters):
+        """Optimizes a list of clauses in a filter context.
+        """
+        clauses = []
+        for f in filters:
+            self._flatten_filter(f, clauses)
+        return self._deduplicate(clauses)
+
+    def _flatten_filter(self, expr, clauses):
+        if _is_match_all(expr):
+            self._applied(DROP_MATCH_ALL)
+        elif _has_only(expr, CONJUNCTION_KEYS):
+            self._applied(FLATTEN_BOOL)
+            for key in ('must', 'filter'):
+                for c in _as_list(expr.params.get(key)):
+                    self._flatten_filter(c, clauses)
+        elif _is_boolean(expr, operator.and_):
+            self._applied(FLATTEN_BOOL)
+            for c in expr.expressions:
+                self._flatten_filter(c, clauses)
+        else:
+            clauses.append(self._optimize_clause(expr))
+
+    def _optimize_clause(self, expr):
+        if _has_only(expr, DISJUNCTION_KEYS):
+            clauses = self._optimize_disjunction(
+                _as_list(expr.params['should'])
+            )
+            return Bool.should(*clauses)
+        if _is_boolean(expr, operator.or_):
+            clauses = self._optimize_disjunction(expr.expressions)
+            return BooleanExpression.or_(*clauses)
+        return expr
+
+    def _optimize_disjunction(self, clauses):
+        flat_clauses = []
+        self._flatten_disjunction(clauses, flat_clauses)
+        return self._merge_terms(self._deduplicate(flat_clauses))
+
+    def _flatten_disjunction(self, clauses, flat_clauses):
+        for c in clauses:
+            if _has_only(c, DISJUNCTION_KEYS):
+                self._applied(FLATTEN_BOOL)
+                self._flatten_disjunction(
+                    _as_list(c.params['should']), flat_clauses
+                )
+            elif _is_boolean(c, operator.or_):
+                self._applied(FLATTEN_BOOL)
+                self._flatten_disjunction(c.expressions, flat_clauses)
+            else:
+                flat_clauses.append(self._optimize_clause(c))
+
+    def _deduplicate(self, clauses):
+        seen = set()
+        unique_clauses = []
+        for c in clauses:
+            try:
+                key, values = make_key(c)
+                key = (key, tuple(values))
+                hash(key)
+            except (UnboundParamError, TypeError):
+                unique_clauses.append(c)
+                continue
+            if key in seen:
+                self._applied(DEDUPLICATE_FILTERS)
+                continue
+            seen.add(key)
+            unique_clauses.append(c)
+        return unique_clauses
+
+    def _merge_terms(self, clauses):
+        groups = OrderedDict()
+        merged_clauses = []
+        for c in clauses:
+            field_key, values = _get_merge_key(c)
+            if field_key is None:
+                merged_clauses.append(c)
+                continue
+            if field_key not in groups:
+                groups[field_key] = (len(merged_clauses), c.field, [])
+                merged_clauses.append(c)
+            groups[field_key][2].append(values)
+
+        for ix, field, values_list in groups.values():
+            if len(values_list) == 1:
+                continue
+            self._applied(MERGE_TERMS, len(values_list) - 1)
+            terms = []
+            for values in values_list:
+                for v in values:
+                    if v not in terms:
+                        terms.append(v)
+            merged_clauses[ix] = Terms(field, terms)
+        return merged_clauses
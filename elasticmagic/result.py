@@ -1,3 +1,4 @@
+from .columns import extract_columns
 from .compat import string_types
 from .document import DynamicDocument
 from .document import get_doc_type_for_hit
@@ -8,13 +9,149 @@ class Result(object):
         self.raw = raw_result
 
 
+class LazyHits(list):
+    """List of hits that keeps raw hits and creates documents only when
+    they are accessed by index or iteration. Created documents are cached.
+
+    Other list operations, for instance ``append``, ``sort`` or ``+``,
+    create all the documents first, after that the hits behave as a plain
+    list of documents. ``raw`` holds the hits as they were returned by
+    Elasticsearch.
+    """
+    __slots__ = ('raw', '_doc_cls_map', '_result', '_docs')
+
+    def __init__(self, raw_hits, doc_cls_map, result):
+        super(LazyHits, self).__init__()
+        self.raw = raw_hits
+        self._doc_cls_map = doc_cls_map
+        self._result = result
+        # documents are kept here until the list is materialized
+        self._docs = [None] * len(raw_hits)
+
+    def _get_doc_cls(self, raw_hit):
+        return self._doc_cls_map.get(
+            get_doc_type_for_hit(raw_hit), DynamicDocument
+        )
+
+    def _get_doc(self, ix):
+        doc = self._docs[ix]
+        if doc is None:
+            raw_hit = self.raw[ix]
+            doc_cls = self._get_doc_cls(raw_hit)
+            doc = doc_cls(_hit=raw_hit, _result=self._result)
+            self._docs[ix] = doc
+        return doc
+
+    def _materialize(self):
+        if self._docs is not None:
+            docs = [self._get_doc(ix) for ix in range(len(self._docs))]
+            self._docs = None
+            list.extend(self, docs)
+
+    def __len__(self):
+        if self._docs is None:
+            return list.__len__(self)
+        return len(self._docs)
+
+    def __getitem__(self, ix):
+        if self._docs is None:
+            return list.__getitem__(self, ix)
+        if isinstance(ix, slice):
+            return [self._get_doc(i) for i in range(*ix.indices(len(self)))]
+        if ix < 0:
+            ix += len(self)
+        if not 0 <= ix < len(self):
+            raise IndexError('list index out of range')
+        return self._get_doc(ix)
+
+    def __getslice__(self, i, j):
+        # python 2 calls it for simple slices
+        return self.__getitem__(slice(max(0, i), max(0, j)))
+
+    def __iter__(self):
+        if self._docs is None:
+            return list.__iter__(self)
+        return self._iter_lazy()
+
+    def _iter_lazy(self):
+        ix = 0
+        while self._docs is not None and ix < len(self._docs):
+            yield self._get_doc(ix)
+            ix += 1
+        # the list can be materialized and changed during the iteration
+        while self._docs is None and ix < list.__len__(self):
+            yield list.__getitem__(self, ix)
+            ix += 1
+
+    def __radd__(self, other):
+        if not isinstance(other, list):
+            return NotImplemented
+        self._materialize()
+        return other + list(self)
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+    def iter_docs(self, doc_cls):
+        """Iterates over documents that are instances of the ``doc_cls``
+        without creating documents of other classes.
+        """
+        if self._docs is None:
+            for doc in self:
+                if isinstance(doc, doc_cls):
+                    yield doc
+            return
+
+        for ix, raw_hit in enumerate(self.raw):
+            doc = self._docs[ix]
+            if doc is None:
+                if not issubclass(self._get_doc_cls(raw_hit), doc_cls):
+                    continue
+                doc = self._get_doc(ix)
+            if isinstance(doc, doc_cls):
+                yield doc
+
+
+def _materializing(name):
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        self._materialize()
+        for arg in args:
+            if isinstance(arg, LazyHits):
+                arg._materialize()
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+for _name in (
+        '__add__', '__iadd__', '__mul__', '__rmul__', '__imul__',
+        '__contains__', '__reversed__', '__repr__', '__setitem__',
+        '__delitem__', '__setslice__', '__delslice__',
+        '__eq__', '__ne__', '__lt__', '__le__', '__gt__', '__ge__',
+        'append', 'extend', 'insert', 'pop', 'remove', 'index', 'count',
+        'reverse', 'sort', 'clear', 'copy',
+):
+    if hasattr(list, _name):
+        setattr(LazyHits, _name, _materializing(_name))
+del _name
+
+
 class SearchResult(Result):
     def __init__(
             self, raw_result, aggregations=None, doc_cls_map=None,
-            instance_mapper=None,
+            instance_mapper=None, raw_hits=False, rewrites=None,
     ):
         super(SearchResult, self).__init__(raw_result)
 
+        if raw_hits and instance_mapper:
+            raise ValueError(
+                'Raw hits cannot be used with an instance mapper'
+            )
+
         self._query_aggs = aggregations or {}
 
         self._doc_cls_map = doc_cls_map or {}
@@ -39,11 +176,12 @@ class SearchResult(Result):
         else:
             self.total = total
         self.max_score = hits.get('max_score')
-        self.hits = []
-        for hit in hits.get('hits', []):
-            doc_type = get_doc_type_for_hit(hit)
-            doc_cls = self._doc_cls_map.get(doc_type, DynamicDocument)
-            self.hits.append(doc_cls(_hit=hit, _result=self))
+        if raw_hits:
+            self.hits = hits.get('hits', [])
+        else:
+            self.hits = LazyHits(
+                hits.get('hits', []), self._doc_cls_map, self
+            )
 
         self.aggregations = {}
         for agg_name, agg_expr in self._query_aggs.items():
@@ -55,6 +193,9 @@ class SearchResult(Result):
             self.aggregations[agg_name] = agg_result
 
         self.scroll_id = raw_result.get('_scroll_id')
+        self.pit_id = raw_result.get('pit_id')
+        # rewrites applied by the query optimizer, see SearchQuery.optimize
+        self.rewrites = rewrites
 
     def __iter__(self):
         return iter(self.hits)
@@ -65,8 +206,28 @@ class SearchResult(Result):
     def get_aggregation(self, name):
         return self.aggregations.get(name)
 
+    def to_columns(self, fields=None, use_numpy=False):
+        """Returns values of the fields for all hits as columns without
+        creating documents.
+
+        :param fields: list of document fields or field names, by default
+           all user fields of the document class
+        :param use_numpy: return ``numpy.ma.MaskedArray`` columns
+
+        See :func:`.columns.extract_columns` for details.
+        """
+        raw_hits = self.hits
+        if isinstance(raw_hits, LazyHits):
+            raw_hits = raw_hits.raw
+        return extract_columns(
+            raw_hits,
+            fields=fields,
+            doc_classes=list(set(self._doc_cls_map.values())),
+            use_numpy=use_numpy,
+        )
+
     def _populate_instances(self, doc_cls):
-        docs = [doc for doc in self.hits if isinstance(doc, doc_cls)]
+        docs = list(self.hits.iter_docs(doc_cls))
         instances = self._instance_mappers.get(doc_cls)(
             [doc._id for doc in docs]
         )
@@ -200,5 +361,24 @@ class ClearScrollResult(Result):
         self.num_freed = raw_result.get('num_freed')
 
 
+class OpenPointInTimeResult(Result):
+    def __init__(self, raw_result):
+        super(OpenPointInTimeResult, self).__init__(raw_result)
+        self.id = raw_result['id']
+
+
+class ClosePointInTimeResult(Result):
+    def __init__(self, raw_result):
+        super(ClosePointInTimeResult, self).__init__(raw_result)
+        self.succeeded = raw_result.get('succeeded')
+        self.num_freed = raw_result.get('num_freed')
+
+
 class PutMappingResult(Result):
     pass
+
+
+class PutSearchTemplateResult(Result):
+    def __init__(self, raw_result):
+        super(PutSearchTemplateResult, self).__init__(raw_result)
+        self.acknowledged = raw_result.get('acknowledged')
@@ -4,14 +4,19 @@
    from elasticmagic.compiler import Compiler_5_0
    from elasticmagic.compiler import Compiler_7_0
 """
+import threading
 import warnings
 from abc import ABCMeta
 from collections import namedtuple, OrderedDict
 
 from .compat import zip, with_metaclass, string_types
+from .compat import queue
 from .compat import Iterable
 from .util import _with_clone
+from .util import cached_property
 from .util import merge_params, collect_doc_classes
+from .attribute import AttributedField
+from .expression import Field, Sort
 from .expression import Params, Source, Highlight, Rescore, Script
 
 __all__ = [
@@ -77,6 +82,9 @@ class BaseSearchQuery(with_metaclass(ABCMeta)):
     _script_fields = Params()
     _track_total_hits = None
     _search_after = None
+    _slice = None
+    _pit = None
+    _optimize = False
 
     _cluster = None
     _index = None
@@ -87,9 +95,12 @@ class BaseSearchQuery(with_metaclass(ABCMeta)):
 
     _instance_mapper = None
     _iter_instances = False
+    _raw_hits = False
 
     _cached_result = None
 
+    _in_place = False
+
     def __init__(
             self, q=None,
             cluster=None, index=None, doc_cls=None, doc_type=None,
@@ -132,10 +143,39 @@ class BaseSearchQuery(with_metaclass(ABCMeta)):
         q = cls.__new__(cls)
         q.__dict__ = {
             k: v for k, v in self.__dict__.items()
-            if not k.startswith('_cached_')
+            if not k.startswith('_cached_') and k != '_in_place'
         }
         return q
 
+    def builder(self):
+        """Returns a copy of the query that is changed in place by its
+        methods, so a series of calls does not clone the query on every
+        step. Call :meth:`build` when all the changes are made.
+
+        .. testcode:: builder
+
+           builder = SearchQuery().builder()
+           for status in ['published', 'draft']:
+               builder.filter(PostDocument.status == status)
+           search_query = builder.limit(10).build()
+
+           assert search_query.to_dict(Compiler_5_0) == {
+               'query': {'bool': {'filter': [
+                   {'term': {'status': 'published'}},
+                   {'term': {'status': 'draft'}}]}},
+               'size': 10}
+        """
+        q = self.clone()
+        q._in_place = True
+        return q
+
+    def build(self):
+        """Finishes the changes started by :meth:`builder`. The query
+        is cloned again by the following calls.
+        """
+        self.__dict__.pop('_in_place', None)
+        return self
+
     @_with_clone
     def source(self, *fields, **kwargs):
         """Controls which fields of the document's ``_source`` field
@@ -611,6 +651,45 @@ class BaseSearchQuery(with_metaclass(ABCMeta)):
         """  # noqa:E501
         self._min_score = min_score
 
+    @_with_clone
+    def optimize(self, enabled=True):
+        """Rewrites the query before compilation: flattens nested boolean
+        queries, removes duplicated filters and ``match_all`` clauses,
+        merges ``term`` queries on the same field inside disjunctions and
+        moves non-scoring clauses of the query into a filter context.
+
+        Scores of the hits can change but not their order. The query
+        is not rewritten when :meth:`min_score` or :meth:`rescore` is used
+        or it is wrapped into a function score query.
+
+        Applied rewrites with their counts are available as
+        ``rewrites`` of the search result, it is ``None`` when the query
+        was not optimized.
+
+        .. testcode:: optimize
+
+           search_query = (
+               SearchQuery(PostDocument.status.in_([0, 1]))
+               .filter(PostDocument.rank > 0)
+               .filter(PostDocument.rank > 0)
+               .optimize()
+           )
+
+        .. testcode:: optimize
+
+           assert search_query.to_dict(Compiler_7_0) == {
+               'query': {
+                   'bool': {
+                       'filter': [
+                           {'terms': {'status': [0, 1]}},
+                           {'range': {'rank': {'gt': 0}}}
+                       ]
+                   }
+               }
+           }
+        """
+        self._optimize = enabled
+
     @_with_clone
     def rescore(self, rescorer, window_size=None):
         """Adds a rescorer for the query. See
@@ -699,6 +778,49 @@ class BaseSearchQuery(with_metaclass(ABCMeta)):
     def with_instance_mapper(self, instance_mapper):
         self._instance_mapper = instance_mapper
 
+    @_with_clone
+    def with_raw_hits(self, enabled=True):
+        """Makes the result contain raw hits from the Elasticsearch response
+        instead of documents. Aggregations, ``total``, ``max_score`` and
+        ``scroll_id`` of the result are populated as usual.
+
+        It is useful when hits are only passed further as is, for example
+        serialized into an http response, so creating documents is
+        a waste of time.
+
+        Raw hits cannot be combined with :meth:`with_instance_mapper` and
+        :meth:`instances`.
+        """
+        self._raw_hits = enabled
+
+    @_with_clone
+    def with_slice(self, slice_id, max_slices, field=None):
+        """Splits a scroll search into ``max_slices`` independent slices
+        and limits the query to the slice with ``slice_id``. See
+        `sliced scroll <https://www.elastic.co/guide/en/elasticsearch/reference/current/paginate-search-results.html#slice-scroll>`_
+
+        Pass ``None`` to remove the slice.
+        """  # noqa:E501
+        if slice_id is None:
+            if '_slice' in self.__dict__:
+                del self._slice
+            return
+        self._slice = Params(id=slice_id, max=max_slices, field=field)
+
+    @_with_clone
+    def with_point_in_time(self, pit_id, keep_alive=None):
+        """Searches in the `point in time <https://www.elastic.co/guide/en/elasticsearch/reference/current/point-in-time-api.html>`_
+        with ``pit_id``. Indexes of the point in time are used so the index
+        is not passed to the request.
+
+        Pass ``None`` to remove the point in time.
+        """  # noqa:E501
+        if pit_id is None:
+            if '_pit' in self.__dict__:
+                del self._pit
+            return
+        self._pit = Params(id=pit_id, keep_alive=keep_alive)
+
     @_with_clone
     def with_track_total_hits(self, track_total_hits):
         self._track_total_hits = track_total_hits
@@ -740,26 +862,7 @@ class BaseSearchQuery(with_metaclass(ABCMeta)):
                 self._search_params = search_params
 
     def _collect_doc_classes(self):
-        return set().union(
-            *map(
-                collect_doc_classes,
-                [
-                    self._q,
-                    self._source,
-                    self._fields,
-                    self._filters,
-                    self._post_filters,
-                    tuple(
-                        fs.functions for fs in self._function_scores.values()
-                    ),
-                    tuple(self._aggregations.values()),
-                    self._order_by,
-                    self._rescores,
-                    self._highlight,
-                    self._ext,
-                ]
-            )
-        )
+        return self.get_context()._collect_doc_classes()
 
     @property
     def _index_or_cluster(self):
@@ -812,6 +915,51 @@ class BaseSearchQuery(with_metaclass(ABCMeta)):
             clone._limit = 1
             return clone, False
 
+    def _prepare_scroll(self, scroll, size):
+        search_query = self.with_scroll(scroll)
+        if size is not None:
+            search_query = search_query.limit(size)
+        return search_query
+
+    def _get_scroll_kwargs(self):
+        query_ctx = self.get_context()
+        return {
+            'doc_cls': query_ctx.doc_classes,
+            'instance_mapper': query_ctx.instance_mapper,
+            'raw_hits': query_ctx.raw_hits,
+        }
+
+    def _prepare_search_after(self, page_size, tiebreaker_field):
+        search_query = self.limit(page_size)
+        tiebreaker_name = _get_sort_field_name(tiebreaker_field)
+        if tiebreaker_name is None or not any(
+                _get_sort_field_name(order) == tiebreaker_name
+                for order in self._order_by
+        ):
+            search_query = search_query.order_by(tiebreaker_field)
+        return search_query
+
+    @staticmethod
+    def _get_search_after_query(
+            search_query, pit_id, pit_keep_alive, sort_values
+    ):
+        if pit_id is not None:
+            search_query = search_query.with_point_in_time(
+                pit_id, keep_alive=pit_keep_alive
+            )
+        else:
+            search_query = search_query.clone()
+        if sort_values:
+            search_query.search_after(*sort_values)
+        return search_query
+
+    @staticmethod
+    def _get_last_sort_values(result):
+        last_hit = result.hits[-1]
+        if isinstance(last_hit, dict):
+            return last_hit.get('sort')
+        return last_hit.get_sort_values()
+
     def _iter_result(self, res):
         if self._iter_instances:
             return iter(
@@ -930,6 +1078,258 @@ class SearchQuery(BaseSearchQuery):
             **kwargs
         )
 
+    def prepare(self, template_id=None):
+        """Compiles the query once and returns :class:`PreparedSearchQuery`.
+
+        Literal values can be replaced with :class:`.expression.Param`
+        placeholders, their values are bound on every execution of the
+        prepared query.
+
+        :param template_id: if specified the compiled body is registered as
+           a stored search template and the prepared query sends only values
+           of the parameters using `search template api <https://www.elastic.co/guide/en/elasticsearch/reference/current/search-template.html>`_
+        """  # noqa:E501
+        compiled_query = self.get_compiler().compiled_prepared_query(
+            self, template_id=template_id
+        )
+        if template_id is not None:
+            self._index_or_cluster.put_search_template(compiled_query)
+        return PreparedSearchQuery(self, compiled_query)
+
+    def iter_scroll(self, scroll='1m', size=None, prefetch=1, pages=False):
+        """Iterates over all the hits that match the query using
+        `scroll api <https://www.elastic.co/guide/en/elasticsearch/reference/current/paginate-search-results.html#scroll-search-results>`_.
+
+        The next page is requested in a background thread while the current
+        one is being processed. The scroll context is cleared when
+        the iteration is finished or the iterator is closed or garbage
+        collected.
+
+        :param scroll: how long Elasticsearch should keep the search context
+        :param size: number of hits per page
+        :param prefetch: maximum number of pages fetched in advance,
+           ``0`` disables background fetching
+        :param pages: yield :class:`.result.SearchResult` pages instead of
+           hits
+        """  # noqa:E501
+        result_pages = self._iter_scroll_pages(
+            self._prepare_scroll(scroll, size), scroll, prefetch
+        )
+        if pages:
+            return result_pages
+        return self._iter_page_hits(result_pages)
+
+    def _iter_scroll_pages(self, search_query, scroll, prefetch):
+        index_or_cluster = self._index_or_cluster
+        scroll_kwargs = search_query._get_scroll_kwargs()
+
+        def fetch(scroll_id):
+            return index_or_cluster.scroll(scroll_id, scroll, **scroll_kwargs)
+
+        result = index_or_cluster.search(search_query)
+        scroll_id = result.scroll_id
+        prefetcher = None
+        try:
+            if prefetch and result.hits:
+                prefetcher = _ScrollPrefetcher(fetch, scroll_id, prefetch)
+            while result.hits:
+                yield result
+                if prefetcher is not None:
+                    result = prefetcher.get()
+                else:
+                    result = fetch(scroll_id)
+                scroll_id = result.scroll_id or scroll_id
+        finally:
+            if prefetcher is not None:
+                scroll_id = prefetcher.stop()
+            if scroll_id is not None:
+                index_or_cluster.clear_scroll(scroll_id)
+
+    def _iter_page_hits(self, result_pages):
+        try:
+            for result in result_pages:
+                for hit in self._iter_result(result):
+                    yield hit
+        finally:
+            result_pages.close()
+
+    def iter_sliced_scroll(
+            self, slices, executor=None, scroll='1m', size=None,
+            field=None, pages=False, callback=None,
+    ):
+        """Scrolls the query in parallel using ``slices``
+        :meth:`sliced <with_slice>` scroll searches. Every slice is driven
+        by a separate task of the ``executor``.
+
+        Without ``callback`` returns an iterator over hits (or
+        :class:`.result.SearchResult` pages when ``pages`` is ``True``)
+        of all the slices. Hits of a single slice keep their scroll order
+        but pages of different slices are mixed in the order they are
+        received, so there is no global order even for a sorted query.
+
+        With ``callback`` it is called as ``callback(slice_id, page)``
+        for every page in a worker thread and the method returns when
+        all the slices are processed. Pages of a slice are passed
+        in the scroll order.
+
+        Scroll contexts of all the slices are cleared when the iteration
+        is finished, fails or is interrupted.
+
+        :param slices: number of slices
+        :param executor: :class:`concurrent.futures.Executor` that runs
+           the slices, by default a thread pool with a worker per slice.
+           Tasks share the search query and its cluster so the executor
+           must be thread based
+        :param scroll: how long Elasticsearch should keep search contexts
+        :param size: number of hits per page of a slice
+        :param field: field to split the slices by
+        :param pages: yield pages instead of hits
+        :param callback: function that processes pages of the slices
+        """
+        slice_queries = [
+            self.with_slice(slice_id, slices, field=field)
+            for slice_id in range(slices)
+        ]
+        if callback is not None:
+            self._run_sliced_scroll(
+                slice_queries, executor, scroll, size, callback
+            )
+            return None
+
+        result_pages = self._iter_sliced_scroll_pages(
+            slice_queries, executor, scroll, size
+        )
+        if pages:
+            return result_pages
+        return self._iter_page_hits(result_pages)
+
+    def _run_sliced_scroll(
+            self, slice_queries, executor, scroll, size, callback
+    ):
+        executor, own_executor = _get_slices_executor(
+            executor, len(slice_queries)
+        )
+        stopped = threading.Event()
+        futures = []
+        try:
+            for slice_id, slice_query in enumerate(slice_queries):
+                futures.append(executor.submit(
+                    _scroll_slice, slice_id, slice_query, scroll, size,
+                    stopped, callback
+                ))
+            for future in futures:
+                future.result()
+        except BaseException:
+            stopped.set()
+            # wait until the other slices clear their scroll contexts
+            from concurrent.futures import wait
+            wait(futures)
+            raise
+        finally:
+            if own_executor:
+                executor.shutdown()
+
+    def _iter_sliced_scroll_pages(self, slice_queries, executor, scroll, size):
+        executor, own_executor = _get_slices_executor(
+            executor, len(slice_queries)
+        )
+        result_pages = queue.Queue(len(slice_queries))
+        stopped = threading.Event()
+
+        def put_page(slice_id, page):
+            result_pages.put((page, None))
+
+        def run_slice(slice_id, slice_query):
+            try:
+                _scroll_slice(
+                    slice_id, slice_query, scroll, size, stopped, put_page
+                )
+            except Exception as e:
+                result_pages.put((None, e))
+            finally:
+                result_pages.put((_SLICE_DONE, None))
+
+        running_slices = 0
+        try:
+            for slice_id, slice_query in enumerate(slice_queries):
+                executor.submit(run_slice, slice_id, slice_query)
+                running_slices += 1
+
+            while running_slices:
+                page, error = result_pages.get()
+                if error is not None:
+                    raise error
+                if page is _SLICE_DONE:
+                    running_slices -= 1
+                    continue
+                yield page
+        finally:
+            stopped.set()
+            # unblock the slices and wait until they clear scroll contexts
+            while running_slices:
+                page, _ = result_pages.get()
+                if page is _SLICE_DONE:
+                    running_slices -= 1
+            if own_executor:
+                executor.shutdown()
+
+    def iter_search_after(
+            self, page_size, tiebreaker_field, pit_keep_alive=None,
+            pages=False,
+    ):
+        """Iterates over all the hits that match the query requesting pages
+        with `search after <https://www.elastic.co/guide/en/elasticsearch/reference/current/paginate-search-results.html#search-after>`_
+        sort values of the last hit of the previous page. Unlike offset
+        pagination every page costs the same regardless of its depth.
+
+        :param page_size: number of hits per page
+        :param tiebreaker_field: field with unique values that is appended
+           to the sorting of the query if it is not already sorted by it.
+           It must have doc values, sorting by ``_id`` is deprecated by
+           recent Elasticsearch versions. With a point in time
+           ``_shard_doc`` can be used
+        :param pit_keep_alive: when specified a point in time is opened so
+           all pages see the same snapshot of the index. It is closed when
+           the iteration is finished or interrupted
+        :param pages: yield :class:`.result.SearchResult` pages instead of
+           hits
+        """  # noqa:E501
+        result_pages = self._iter_search_after_pages(
+            self._prepare_search_after(page_size, tiebreaker_field),
+            page_size, pit_keep_alive
+        )
+        if pages:
+            return result_pages
+        return self._iter_page_hits(result_pages)
+
+    def _iter_search_after_pages(
+            self, search_query, page_size, pit_keep_alive
+    ):
+        index_or_cluster = self._index_or_cluster
+        pit_id = None
+        if pit_keep_alive is not None:
+            pit_id = index_or_cluster.open_point_in_time(
+                keep_alive=pit_keep_alive
+            ).id
+        try:
+            sort_values = None
+            while True:
+                result = index_or_cluster.search(
+                    self._get_search_after_query(
+                        search_query, pit_id, pit_keep_alive, sort_values
+                    )
+                )
+                pit_id = result.pit_id or pit_id
+                if not result.hits:
+                    break
+                yield result
+                if len(result.hits) < page_size:
+                    break
+                sort_values = self._get_last_sort_values(result)
+        finally:
+            if pit_id is not None:
+                index_or_cluster.close_point_in_time(pit_id)
+
     def __iter__(self):
         return self._iter_result(self.get_result())
 
@@ -941,6 +1341,120 @@ class SearchQuery(BaseSearchQuery):
             return list(clone)[0]
 
 
+def _get_sort_field_name(order):
+    if isinstance(order, Sort):
+        order = order.expr
+    if isinstance(order, string_types):
+        return order
+    if isinstance(order, AttributedField):
+        return order.get_field_name()
+    if isinstance(order, Field):
+        return order.get_name()
+    return None
+
+
+_SLICE_DONE = object()
+
+
+def _get_slices_executor(executor, slices):
+    if executor is not None:
+        return executor, False
+    from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(max_workers=slices), True
+
+
+def _scroll_slice(slice_id, slice_query, scroll, size, stopped, on_page):
+    result_pages = slice_query.iter_scroll(
+        scroll=scroll, size=size, prefetch=0, pages=True
+    )
+    try:
+        for page in result_pages:
+            if stopped.is_set():
+                break
+            on_page(slice_id, page)
+    finally:
+        result_pages.close()
+
+
+class _ScrollPrefetcher(object):
+    """Fetches scroll pages in a background thread.
+    """
+
+    def __init__(self, fetch, scroll_id, size):
+        self._fetch = fetch
+        self.scroll_id = scroll_id
+        self._pages = queue.Queue(size)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                result = self._fetch(self.scroll_id)
+            except Exception as e:
+                self._pages.put((None, e))
+                return
+            if result.scroll_id:
+                self.scroll_id = result.scroll_id
+            self._pages.put((result, None))
+            if not result.hits:
+                return
+
+    def get(self):
+        result, error = self._pages.get()
+        if error is not None:
+            raise error
+        return result
+
+    def stop(self):
+        """Stops fetching and returns the last scroll id.
+        """
+        self._stopped.set()
+        # free the queue so a blocked thread can put its page and exit
+        while True:
+            try:
+                self._pages.get_nowait()
+            except queue.Empty:
+                break
+        self._thread.join()
+        return self.scroll_id
+
+
+class PreparedSearchQuery(object):
+    """Search query compiled with :class:`.expression.Param` placeholders.
+
+    Is usually created by calling :meth:`SearchQuery.prepare` method.
+    """
+
+    def __init__(self, search_query, compiled_query):
+        self._search_query = search_query
+        self._compiled_query = compiled_query
+
+    @property
+    def param_names(self):
+        return self._compiled_query.param_names
+
+    @property
+    def template_id(self):
+        return self._compiled_query.template_id
+
+    def to_dict(self, **bindings):
+        """Returns body of the request with bound parameters.
+        """
+        return self._compiled_query.bind(bindings).body
+
+    def execute(self, **bindings):
+        """Executes the query substituting values of the parameters.
+
+        For an asynchronous search query returns a coroutine.
+        """
+        return self._search_query._index_or_cluster.search_prepared(
+            self._compiled_query, bindings
+        )
+
+
 class SearchQueryContext(object):
     __visit_name__ = 'search_query_context'
 
@@ -964,37 +1478,71 @@ class SearchQueryContext(object):
         self.highlight = search_query._highlight
         self.track_total_hits = search_query._track_total_hits
         self.search_after = search_query._search_after
+        self.slice = search_query._slice
+        self.pit = search_query._pit
+        self.optimize = search_query._optimize
 
         self.cluster = search_query._cluster
         self.index = search_query._index
-        doc_cls = search_query._doc_cls
+        self._doc_cls = search_query._doc_cls
+        self._doc_type = search_query._doc_type
+
+        self.docvalue_fields = search_query._docvalue_fields
+        self.script_fields = search_query._script_fields
+
+        self.search_params = search_query._search_params
+
+        self.instance_mapper = search_query._instance_mapper
+        self.iter_instances = search_query._iter_instances
+        self.raw_hits = search_query._raw_hits
+        if self.raw_hits and (self.instance_mapper or self.iter_instances):
+            raise ValueError('Raw hits cannot be used with instances')
+
+    # collecting document classes walks all the expressions of the query,
+    # so it is done only when they are needed
+
+    @cached_property
+    def doc_classes(self):
+        doc_cls = self._doc_cls
         if not doc_cls:
-            doc_classes = search_query._collect_doc_classes()
+            doc_classes = self._collect_doc_classes()
         elif not isinstance(doc_cls, Iterable):
             doc_classes = [doc_cls]
         else:
             doc_classes = doc_cls
-        self.doc_classes = tuple(doc_classes)
+        return tuple(doc_classes)
 
-        if not search_query._doc_type:
+    @cached_property
+    def doc_types(self):
+        if not self._doc_type:
             doc_types = []
-        elif isinstance(search_query._doc_type, string_types):
-            doc_types = [
-                t.strip() for t in search_query._doc_type.split(',')
-            ]
+        elif isinstance(self._doc_type, string_types):
+            doc_types = [t.strip() for t in self._doc_type.split(',')]
         else:
-            doc_types = list(search_query._doc_type)
-        self.doc_types = self._get_unique_doc_types(
-            doc_types, self.doc_classes
-        )
+            doc_types = list(self._doc_type)
+        return self._get_unique_doc_types(doc_types, self.doc_classes)
 
-        self.docvalue_fields = search_query._docvalue_fields
-        self.script_fields = search_query._script_fields
-
-        self.search_params = search_query._search_params
-
-        self.instance_mapper = search_query._instance_mapper
-        self.iter_instances = search_query._iter_instances
+    def _collect_doc_classes(self):
+        return set().union(
+            *map(
+                collect_doc_classes,
+                [
+                    self.q,
+                    self.source,
+                    self.fields,
+                    self.filters,
+                    self.post_filters,
+                    tuple(
+                        fs.functions for fs in self.function_scores.values()
+                    ),
+                    tuple(self.aggregations.values()),
+                    self.order_by,
+                    self.rescores,
+                    self.highlight,
+                    self.ext,
+                ]
+            )
+        )
 
     @staticmethod
     def _get_unique_doc_types(doc_types=None, doc_classes=None):
@@ -5,6 +5,7 @@ import re
 import copy
 
 import dateutil.parser
+import dateutil.tz
 
 try:
     import geohash
@@ -12,7 +13,7 @@ try:
 except ImportError:
     GEOHASH_IMPORTED = False
 
-from .compat import binary_type, text_type, string_types
+from .compat import binary_type, int_types, text_type, string_types
 
 
 def instantiate(typeobj, *args, **kwargs):
@@ -42,6 +43,17 @@ class Type(object):
     def to_python_single(self, value):
         return self.to_python(value)
 
+    def apply_mapping_options(self, mapping_options):
+        """Returns a type that takes into account mapping options
+        of a field.
+        """
+        return self
+
+    def get_mapping_options(self):
+        """Returns mapping options defined by the type.
+        """
+        return {}
+
     def from_python(self, value, compiler, validate=False):
         return value
 
@@ -137,18 +149,186 @@ class Double(_Float):
     __visit_name__ = 'double'
 
 
+ISO_DATETIME_REGEXP = re.compile(
+    r'^(\d{4})-(\d{2})-(\d{2})'
+    r'(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:[.,](\d+))?)?'
+    r'(Z|[+-]\d{2}(?::?\d{2})?)?)?$'
+)
+
+UTC = dateutil.tz.tzutc()
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=UTC)
+
+ISO_DATE_FORMATS = frozenset([
+    'date_optional_time', 'strict_date_optional_time',
+    'strict_date_optional_time_nanos',
+    'date_time', 'strict_date_time',
+    'date_time_no_millis', 'strict_date_time_no_millis',
+    'date_hour_minute_second', 'strict_date_hour_minute_second',
+    'date_hour_minute_second_millis',
+    'strict_date_hour_minute_second_millis',
+    'date_hour_minute_second_fraction',
+    'strict_date_hour_minute_second_fraction',
+    'date', 'strict_date',
+])
+
+JODA_TO_STRPTIME = [
+    ('yyyy', '%Y'), ('uuuu', '%Y'), ('yy', '%y'),
+    ('MM', '%m'), ('dd', '%d'), ('HH', '%H'), ('mm', '%M'), ('ss', '%S'),
+    ('SSSSSS', '%f'), ('SSS', '%f'),
+]
+JODA_PATTERN_REGEXP = re.compile(
+    '|'.join(re.escape(joda) for joda, _ in JODA_TO_STRPTIME) +
+    r"|'[^']*'|[A-Za-z]"
+)
+
+
+def _tz_from_iso(tz):
+    if tz == 'Z':
+        return UTC
+    sign = -1 if tz[0] == '-' else 1
+    tz = tz[1:].replace(':', '')
+    offset = sign * (int(tz[:2]) * 3600 + int(tz[2:4] or 0) * 60)
+    if offset == 0:
+        return UTC
+    return dateutil.tz.tzoffset(None, offset)
+
+
+def parse_iso_datetime(value):
+    """Parses dates and date times in ISO-8601 format, returns ``None``
+    if the value has another format.
+    """
+    m = ISO_DATETIME_REGEXP.match(value)
+    if not m:
+        return None
+    year, month, day, hour, minute, second, fraction, tz = m.groups()
+    return datetime.datetime(
+        int(year), int(month), int(day),
+        int(hour or 0), int(minute or 0), int(second or 0),
+        int(fraction[:6].ljust(6, '0')) if fraction else 0,
+        _tz_from_iso(tz) if tz else None,
+    )
+
+
+def parse_epoch_millis(value):
+    return EPOCH + datetime.timedelta(milliseconds=float(value))
+
+
+def parse_epoch_second(value):
+    return EPOCH + datetime.timedelta(seconds=float(value))
+
+
+def _joda_to_strptime(pattern):
+    joda_map = dict(JODA_TO_STRPTIME)
+    parts = []
+    last_pos = 0
+    for m in JODA_PATTERN_REGEXP.finditer(pattern):
+        parts.append(pattern[last_pos:m.start()].replace('%', '%%'))
+        token = m.group()
+        if token.startswith("'"):
+            parts.append(token[1:-1].replace('%', '%%') or "'")
+        elif token in joda_map:
+            parts.append(joda_map[token])
+        else:
+            return None
+        last_pos = m.end()
+    parts.append(pattern[last_pos:].replace('%', '%%'))
+    return ''.join(parts)
+
+
+def _make_date_parser(date_format):
+    date_format = date_format.strip()
+    if date_format == 'epoch_millis':
+        return parse_epoch_millis
+    if date_format == 'epoch_second':
+        return parse_epoch_second
+    if date_format in ISO_DATE_FORMATS:
+        return parse_iso_datetime
+    strptime_format = _joda_to_strptime(date_format)
+    if strptime_format is None:
+        return None
+    return lambda v: datetime.datetime.strptime(v, strptime_format)
+
+
+def make_date_parsers(date_format=None):
+    """Returns a list of parsers for the Elasticsearch date format.
+    Every parser returns ``None`` or raises :exc:`ValueError` when
+    a value does not match the format.
+    """
+    if date_format is None:
+        return [parse_iso_datetime]
+    parsers = []
+    for f in date_format.split('||'):
+        parser = _make_date_parser(f)
+        if parser is not None:
+            parsers.append(parser)
+    return parsers
+
+
+DEFAULT_DATE_PARSERS = make_date_parsers()
+NUMBER_TYPES = int_types + (float,)
+
+
+def parse_date(value, parsers=DEFAULT_DATE_PARSERS):
+    """Converts a value returned by Elasticsearch into a datetime.
+
+    Numbers are treated as milliseconds since epoch. Strings are parsed
+    using the parsers and ``dateutil`` when none of the parsers match.
+    """
+    if isinstance(value, NUMBER_TYPES) and not isinstance(value, bool):
+        return parse_epoch_millis(value)
+    for parser in parsers:
+        try:
+            dt = parser(value)
+        except (ValueError, TypeError, OverflowError):
+            continue
+        if dt is not None:
+            return dt
+    return dateutil.parser.parse(value)
+
+
 class Date(Type):
+    """Date type.
+
+    :param format: the Elasticsearch `date format <https://www.elastic.co/guide/en/elasticsearch/reference/current/mapping-date-format.html>`_,
+       it is also taken from the ``format`` mapping option of a field
+    :param cache_size: size of the cache of parsed values, useful when
+       there are a lot of repeated values, for example dates without time
+    """  # noqa:E501
     __visit_name__ = 'date'
 
     python_type = datetime.datetime
 
-    # def __init__(self, format=None):
-    #     self.format = format
+    def __init__(self, format=None, cache_size=None):
+        super(Date, self).__init__()
+        self.format = format
+        self.cache_size = cache_size
+        self._parsers = make_date_parsers(format)
+        self._cache = {} if cache_size else None
+
+    def apply_mapping_options(self, mapping_options):
+        date_format = mapping_options.get('format')
+        if self.format is None and date_format:
+            return Date(format=date_format, cache_size=self.cache_size)
+        return self
+
+    def get_mapping_options(self):
+        if self.format:
+            return {'format': self.format}
+        return {}
 
     def to_python(self, value):
         if value is None:
             return None
-        return dateutil.parser.parse(value)
+        cache = self._cache
+        if cache is None:
+            return parse_date(value, self._parsers)
+        dt = cache.get(value)
+        if dt is None:
+            dt = parse_date(value, self._parsers)
+            if len(cache) >= self.cache_size:
+                cache.clear()
+            cache[value] = dt
+        return dt
 
     def from_python(self, value, compiler, validate=True):
         if validate:
@@ -257,6 +437,15 @@ class List(Type):
     def doc_cls(self):
         return self.sub_type.doc_cls
 
+    def apply_mapping_options(self, mapping_options):
+        sub_type = self.sub_type.apply_mapping_options(mapping_options)
+        if sub_type is self.sub_type:
+            return self
+        return List(sub_type)
+
+    def get_mapping_options(self):
+        return self.sub_type.get_mapping_options()
+
     def to_python(self, value):
         if value is None:
             return None
@@ -5,9 +5,15 @@ from .compat import Iterable, Mapping
 
 
 def _with_clone(fn):
+    # objects with the _in_place flag are changed in place,
+    # see BaseSearchQuery.builder
     @wraps(fn)
     def wrapper(self, *args, **kwargs):
-        clone = self.clone()
+        if getattr(self, '_in_place', False):
+            clone = self
+            self.__dict__.pop('_cached_result', None)
+        else:
+            clone = self.clone()
         res = fn(clone, *args, **kwargs)
         if res is not None:
             return res
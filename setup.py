@@ -14,6 +14,7 @@ setup(
     install_requires=[
         "elasticsearch",
         "python-dateutil",
+        "futures; python_version<'3'",
     ],
     extras_require={
         "geo": [
@@ -22,6 +23,10 @@ setup(
         "async": [
             "elasticsearch-py-async",
         ],
+        "numpy": [
+            # elasticsearch<7.14 serializer does not support numpy 2
+            "numpy<2",
+        ],
     },
     classifiers=[
         "Development Status :: 3 - Alpha",
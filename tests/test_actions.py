@@ -303,3 +303,45 @@ def test_update_action_script_compiler_1_0():
     #         'name': 'Test via upsert',
     #     },
     # }
+
+
+def test_update_action_from_changes():
+    class TrackedOrderDocument(OrderDocument):
+        __track_changes__ = True
+
+    doc = TrackedOrderDocument(_hit={
+        '_id': '1',
+        '_type': 'order',
+        '_index': 'orders',
+        '_routing': '2',
+        '_version': 3,
+        '_source': {
+            'product_ids': [1, 2],
+            'date_created': '2019-01-01T00:00:00',
+        },
+    })
+    assert actions.Update.from_changes(doc) is None
+
+    doc.product_ids.append(3)
+    action = actions.Update.from_changes(doc, retry_on_conflict=2)
+    assert action.to_meta(compiler=Compiler_7_0) == {
+        'update': {
+            '_id': '1',
+            '_index': 'orders',
+            'routing': '2',
+            'retry_on_conflict': 2,
+        }
+    }
+    assert action.to_source(compiler=Compiler_7_0) == {
+        'doc': {'product_ids': [1, 2, 3]}
+    }
+
+    doc.track_changes()
+    del doc.product_ids
+    action = actions.Update.from_changes(doc)
+    assert action.to_source(compiler=Compiler_7_0) == {
+        'doc': {'product_ids': None}
+    }
+
+    with pytest.raises(ValueError):
+        actions.Update.from_changes(OrderDocument(_id=1))
@@ -0,0 +1,356 @@
+import json
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from elasticsearch import TransportError
+
+from mock import MagicMock
+
+import pytest
+
+from elasticmagic import actions, Cluster, Document, Field
+from elasticmagic.bulk import _get_action_state
+from elasticmagic.bulk import encode_actions
+from elasticmagic.compiler import Compiler_7_0
+from elasticmagic.compiler import with_body_encoder, with_compiled_cache
+from elasticmagic.types import Integer, Object, Text
+
+
+class ProductDoc(Document):
+    __doc_type__ = 'product'
+
+    name = Field(Text)
+    rank = Field(Integer)
+
+
+class TagDoc(Document):
+    name = Field(Text)
+
+
+class TaggedProductDoc(ProductDoc):
+    tag = Field(Object(TagDoc))
+
+
+def _parse_body(body):
+    return [json.loads(line) for line in body.decode('utf-8').splitlines()]
+
+
+def _item(name, _id, status=201, error=None):
+    data = {
+        '_index': 'test',
+        '_type': '_doc',
+        '_id': _id,
+        'status': status,
+    }
+    if error:
+        data['error'] = {'type': error, 'reason': error}
+    return {name: data}
+
+
+class BulkClient(object):
+    """Answers bulk requests with statuses from ``statuses`` by document id,
+    each status is consumed by one request.
+    """
+
+    def __init__(self, statuses=None):
+        self.statuses = statuses or {}
+        self.bodies = []
+        self.params = []
+        self._lock = threading.Lock()
+
+    def bulk(self, body, **params):
+        lines = _parse_body(body)
+        with self._lock:
+            self.bodies.append(lines)
+            self.params.append(params)
+            items = []
+            for line in lines:
+                if len(line) != 1 or not isinstance(line, dict):
+                    continue
+                name, meta = next(iter(line.items()))
+                if name not in ('index', 'create', 'update', 'delete'):
+                    continue
+                statuses = self.statuses.get(meta['_id'])
+                status = statuses.pop(0) if statuses else 201
+                items.append(_item(
+                    name, meta['_id'], status,
+                    error='rejected' if status >= 400 else None
+                ))
+        return {'took': 1, 'errors': False, 'items': items}
+
+
+@pytest.fixture
+def bulk_client():
+    return BulkClient()
+
+
+@pytest.fixture
+def cluster(bulk_client):
+    client = MagicMock()
+    client.bulk = bulk_client.bulk
+    return Cluster(client, compiler=Compiler_7_0)
+
+
+def _docs(n):
+    return [ProductDoc(_id=str(i), name='p{}'.format(i)) for i in range(n)]
+
+
+def test_chunk_size(cluster, bulk_client):
+    results = []
+    with cluster['test'].bulk_indexer(
+            chunk_size=2, refresh=True,
+            callback=lambda chunk, res: results.append((chunk, res)),
+    ) as indexer:
+        for doc in _docs(5):
+            indexer.add(actions.Index(doc))
+        indexer.add(actions.Delete(ProductDoc(_id='4')))
+
+    assert [len(body) for body in bulk_client.bodies] == [4, 4, 3]
+    assert bulk_client.bodies[0] == [
+        {'index': {'_id': '0'}},
+        {'name': 'p0'},
+        {'index': {'_id': '1'}},
+        {'name': 'p1'},
+    ]
+    assert bulk_client.bodies[2] == [
+        {'index': {'_id': '4'}},
+        {'name': 'p4'},
+        {'delete': {'_id': '4'}},
+    ]
+    assert bulk_client.params[0] == {'index': 'test', 'refresh': True}
+    assert sorted(
+        [item._id for item in res] for chunk, res in results
+    ) == [['0', '1'], ['2', '3'], ['4', '4']]
+    assert all(not res.errors for chunk, res in results)
+    assert indexer.chunks == 3
+    assert indexer.sent_actions == 6
+    assert indexer.failed_actions == 0
+
+
+def test_chunk_bytes(cluster, bulk_client):
+    docs = _docs(5)
+    size = len(
+        json.dumps({'index': {'_id': '0'}}, separators=(',', ':')) +
+        json.dumps({'name': 'p0'}, separators=(',', ':'))
+    ) + 2
+    with cluster.bulk_indexer(chunk_bytes=size * 2 + 1) as indexer:
+        indexer.add(*[actions.Index(doc) for doc in docs])
+        # the third action does not fit into the chunk
+        assert len(bulk_client.bodies) <= 1
+
+    assert [len(body) for body in bulk_client.bodies] == [4, 4, 2]
+
+
+def test_flush_interval(cluster, bulk_client):
+    indexer = cluster.bulk_indexer(flush_interval=0.01)
+    try:
+        indexer.add(actions.Index(ProductDoc(_id='1', name='p1')))
+        for _ in range(200):
+            if bulk_client.bodies:
+                break
+            time.sleep(0.01)
+        assert bulk_client.bodies == [
+            [{'index': {'_id': '1'}}, {'name': 'p1'}]
+        ]
+    finally:
+        indexer.close()
+    assert len(bulk_client.bodies) == 1
+
+
+def test_retry(cluster, bulk_client):
+    bulk_client.statuses = {
+        '1': [429, 503],
+        '2': [400],
+        '3': [429, 429, 429],
+    }
+    results = []
+    with cluster.bulk_indexer(
+            concurrency=2, max_retries=2, initial_backoff=0.001,
+            callback=lambda chunk, res: results.append(res),
+    ) as indexer:
+        indexer.add(*[actions.Index(doc) for doc in _docs(4)])
+
+    assert [
+        [line['index']['_id'] for line in body if 'index' in line]
+        for body in bulk_client.bodies
+    ] == [['0', '1', '2', '3'], ['1', '3'], ['1', '3']]
+    assert len(results) == 1
+    result = results[0]
+    assert result.took == 3
+    assert result.errors
+    assert [(item._id, item.status) for item in result] == [
+        ('0', 201), ('1', 201), ('2', 400), ('3', 429)
+    ]
+    assert result.items[2].error.type == 'rejected'
+    assert indexer.retried_actions == 4
+    assert indexer.failed_actions == 2
+
+
+def test_retry_rejected_request(cluster, bulk_client):
+    errors = [
+        TransportError(429, 'es_rejected_execution_exception'),
+        TransportError(503, 'unavailable'),
+    ]
+    bulk = bulk_client.bulk
+
+    def overloaded_bulk(body, **params):
+        if errors:
+            raise errors.pop(0)
+        return bulk(body, **params)
+
+    cluster.get_client().bulk = overloaded_bulk
+    results = []
+    with cluster.bulk_indexer(
+            max_retries=2, initial_backoff=0.001,
+            callback=lambda chunk, res: results.append(res),
+    ) as indexer:
+        indexer.add(*[actions.Index(doc) for doc in _docs(2)])
+
+    assert len(bulk_client.bodies) == 1
+    assert [(item._id, item.status) for item in results[0]] == [
+        ('0', 201), ('1', 201)
+    ]
+    assert indexer.retried_actions == 4
+    assert indexer.failed_actions == 0
+
+    errors.extend(TransportError(429, 'rejected') for _ in range(3))
+    indexer = cluster.bulk_indexer(max_retries=2, initial_backoff=0.001)
+    indexer.add(actions.Index(ProductDoc(_id='1')))
+    with pytest.raises(TransportError):
+        indexer.flush()
+    assert errors == []
+
+    errors.append(TransportError(400, 'bad_request'))
+    indexer.add(actions.Index(ProductDoc(_id='1')))
+    with pytest.raises(TransportError):
+        indexer.flush()
+    indexer.close()
+    assert len(bulk_client.bodies) == 1
+
+
+def test_concurrency(cluster, bulk_client):
+    in_flight = []
+    max_in_flight = []
+    lock = threading.Lock()
+    bulk = bulk_client.bulk
+
+    def slow_bulk(body, **params):
+        with lock:
+            in_flight.append(1)
+            max_in_flight.append(len(in_flight))
+        time.sleep(0.01)
+        with lock:
+            in_flight.pop()
+        return bulk(body, **params)
+
+    cluster.get_client().bulk = slow_bulk
+    with cluster.bulk_indexer(chunk_size=1, concurrency=3) as indexer:
+        indexer.add(*[actions.Index(doc) for doc in _docs(12)])
+
+    assert len(bulk_client.bodies) == 12
+    assert 1 < max(max_in_flight) <= 3
+
+
+def test_error(cluster, bulk_client):
+    cluster.get_client().bulk = MagicMock(side_effect=ValueError('boom'))
+    indexer = cluster.bulk_indexer(chunk_size=1)
+    indexer.add(actions.Index(ProductDoc(_id='1')))
+    with pytest.raises(ValueError):
+        indexer.flush()
+    indexer.add(actions.Index(ProductDoc(_id='2')))
+    with pytest.raises(ValueError):
+        indexer.close()
+
+
+def test_discard_on_exception(cluster, bulk_client):
+    with pytest.raises(KeyError):
+        with cluster.bulk_indexer() as indexer:
+            indexer.add(actions.Index(ProductDoc(_id='1')))
+            raise KeyError()
+    assert bulk_client.bodies == []
+
+
+def test_encode_actions():
+    compiler = with_body_encoder(with_compiled_cache(Compiler_7_0))
+    bulk_actions = [
+        actions.Index(doc, routing=1) for doc in _docs(5)
+    ] + [
+        actions.Update(
+            {'_id': '1', 'rank': 2}, script='ctx._source.rank += 1'
+        ),
+        actions.Delete(ProductDoc(_id='1')),
+    ]
+    payloads = encode_actions(compiler, bulk_actions)
+    assert payloads[0] == (
+        b'{"index":{"_id":"0","routing":1}}\n{"name":"p0"}\n'
+    )
+    assert payloads[5] == (
+        b'{"update":{"_id":"1"}}\n{"script":"ctx._source.rank += 1"}\n'
+    )
+    assert payloads[6] == b'{"delete":{"_id":"1"}}\n'
+
+    with ProcessPoolExecutor(2) as executor:
+        assert encode_actions(
+            compiler, bulk_actions, executor=executor, chunk_size=2
+        ) == payloads
+
+
+def test_encode_actions_passes_source():
+    compiler = Compiler_7_0
+    doc = TaggedProductDoc(_id='1', _routing=2, name='p1', rank=1)
+    doc.tag = TagDoc(name='new')
+    doc.track_changes()
+    doc.rank = 2
+    doc._private = object()
+    bulk_actions = [
+        actions.Index(doc),
+        actions.Update.from_changes(doc),
+        actions.Delete(doc),
+    ]
+
+    compiled_bulk = compiler.compiled_bulk([])
+    states = [
+        _get_action_state(
+            compiled_bulk.compiled_meta(None),
+            compiled_bulk.compiled_source(None),
+            action
+        )
+        for action in bulk_actions
+    ]
+    assert [state[1:3] for state in states] == [
+        (
+            {'index': {'_id': '1', 'routing': 2}},
+            {'name': 'p1', 'rank': 2, 'tag': {'name': 'new'}},
+        ),
+        ({'update': {'_id': '1', 'routing': 2}}, {'rank': 2}),
+        ({'delete': {'_id': '1', 'routing': 2}}, None),
+    ]
+
+    with ProcessPoolExecutor(1) as executor:
+        assert encode_actions(
+            compiler, bulk_actions, executor=executor
+        ) == encode_actions(compiler, bulk_actions)
+
+
+def test_serialize_executor(cluster, bulk_client):
+    with ProcessPoolExecutor(2) as executor:
+        cluster.bulk(
+            [actions.Index(doc) for doc in _docs(3)],
+            serialize_executor=executor,
+        )
+        with cluster.bulk_indexer(
+                chunk_size=2, serialize_executor=executor
+        ) as indexer:
+            indexer.add(*[actions.Index(doc) for doc in _docs(3)])
+
+    assert bulk_client.params == [{}, {}, {}]
+    chunks = [
+        [{'index': {'_id': str(i)}}, {'name': 'p{}'.format(i)}]
+        for i in range(3)
+    ]
+    assert bulk_client.bodies == [
+        chunks[0] + chunks[1] + chunks[2],
+        chunks[0] + chunks[1],
+        chunks[2],
+    ]
@@ -0,0 +1,162 @@
+import datetime
+
+from mock import Mock
+
+import pytest
+
+from elasticmagic import (
+    Cluster, Document, Field, MatchAll, SearchQuery, agg,
+)
+from elasticmagic.cache import CompiledQueryCache
+from elasticmagic.compiler import Compiler_5_0
+from elasticmagic.compiler import Compiler_6_0
+from elasticmagic.compiler import with_compiled_cache
+from elasticmagic.types import Date, Integer, Keyword
+
+
+class ProductDocument(Document):
+    __doc_type__ = 'product'
+
+    name = Field(Keyword)
+    status = Field(Integer)
+    rank = Field(Integer)
+    created_at = Field(Date)
+
+
+class QuestionDocument(Document):
+    __doc_type__ = 'question'
+
+    title = Field(Keyword)
+
+
+class AnswerDocument(Document):
+    __doc_type__ = 'answer'
+    __parent__ = QuestionDocument
+
+    rank = Field(Integer)
+
+
+def make_query(name, status, min_rank, limit):
+    return (
+        SearchQuery(ProductDocument.name.match(name))
+        .filter(
+            ProductDocument.status.in_([status, status + 1]),
+            ProductDocument.rank >= min_rank,
+            ProductDocument.created_at < datetime.datetime(2020, 1, status),
+        )
+        .post_filter(ProductDocument.status == status)
+        .aggs(ranks=agg.Terms(ProductDocument.rank, size=10))
+        .order_by(ProductDocument.rank.desc())
+        .limit(limit)
+    )
+
+
+def test_cached_compiler_rebinds_literals(compiler):
+    cached_compiler = with_compiled_cache(compiler)
+    cache = cached_compiler.compiled_cache
+
+    for i in range(1, 4):
+        sq = make_query('product {}'.format(i), i, i * 10, i * 5)
+        assert sq.to_dict(compiler=cached_compiler) == \
+            sq.to_dict(compiler=compiler)
+
+    assert len(cache) == 1
+    assert cache.misses == 1
+    assert cache.hits == 2
+
+
+def test_cached_compiler_different_structure(compiler):
+    cached_compiler = with_compiled_cache(compiler)
+    cache = cached_compiler.compiled_cache
+
+    sq1 = SearchQuery(ProductDocument.status == 1)
+    sq2 = SearchQuery(ProductDocument.rank == 1)
+    sq3 = SearchQuery(ProductDocument.status == 1).limit(10)
+    sq4 = SearchQuery(ProductDocument.status.in_([1, 2, 3]))
+    for sq in [sq1, sq2, sq3, sq4]:
+        assert sq.to_dict(compiler=cached_compiler) == \
+            sq.to_dict(compiler=compiler)
+
+    assert len(cache) == 4
+    assert cache.hits == 0
+
+
+def test_cached_compiler_uncacheable_template():
+    cached_compiler = with_compiled_cache(Compiler_6_0)
+    cache = cached_compiler.compiled_cache
+
+    for answer_id in [1, 2]:
+        # document ids are mangled when emulating document types
+        sq = SearchQuery(AnswerDocument._id == answer_id)
+        assert sq.to_dict(compiler=cached_compiler) == \
+            sq.to_dict(compiler=Compiler_6_0)
+        assert sq.to_dict(compiler=cached_compiler)['query'] == {
+
+            'bool': {
+                'must': {
+                    'ids': {'values': ['answer~{}'.format(answer_id)]}
+                },
+                'filter': {'terms': {'_doc_type_join': ['answer']}}
+            }
+        }
+    assert len(cache) == 1
+    assert cache.hits == 3
+
+
+def test_compiled_cache_lru():
+    cache = CompiledQueryCache(max_size=2)
+    compiled_query = with_compiled_cache(Compiler_5_0).compiled_search_query
+    compiled_query.compiled_cache = cache
+    try:
+        compiled_query(SearchQuery(MatchAll()))
+        compiled_query(SearchQuery(ProductDocument.status == 1))
+        compiled_query(SearchQuery(MatchAll()))
+        compiled_query(SearchQuery(ProductDocument.rank == 1))
+        assert len(cache) == 2
+        assert cache.hits == 1
+        assert cache.misses == 3
+
+        compiled_query(SearchQuery(MatchAll()))
+        assert cache.hits == 2
+        compiled_query(SearchQuery(ProductDocument.status == 2))
+        assert cache.misses == 4
+
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.hits == 0
+        assert cache.misses == 0
+    finally:
+        del compiled_query.compiled_cache
+
+
+@pytest.mark.parametrize('compiled_cache_size', [None, 10])
+def test_cluster_compiled_cache(compiled_cache_size):
+    client = Mock(
+        search=Mock(
+            return_value={
+                'hits': {'hits': [], 'max_score': None, 'total': 0}
+            }
+        )
+    )
+    cluster = Cluster(
+        client, compiler=Compiler_5_0,
+        compiled_cache_size=compiled_cache_size,
+    )
+    compiler = cluster.get_compiler()
+    assert cluster.get_compiler() is compiler
+
+    for status in [1, 2]:
+        sq = cluster.search_query(ProductDocument.status == status)
+        sq.get_result()
+        client.search.assert_called_with(
+            body={'query': {'term': {'status': status}}},
+            doc_type='product',
+        )
+
+    if compiled_cache_size:
+        assert compiler is not Compiler_5_0
+        assert compiler.compiled_cache.hits == 1
+        assert compiler.compiled_cache.misses == 1
+    else:
+        assert compiler is Compiler_5_0
+        assert compiler.compiled_cache is None
@@ -390,6 +390,130 @@ class ClusterTest(BaseTestCase):
         self.assertEqual(docs[1].post_date, '2014-12-29T16:45:58')
         self.assertEqual(docs[1].message, 'Elasticsearch the best')
 
+    def test_raw_hits(self):
+        raw_hit = {
+            '_id': '381',
+            '_type': 'product',
+            '_index': 'test',
+            '_score': 4.675524,
+            '_source': {
+                'name': 'LG',
+            },
+        }
+        raw_result = {
+            '_scroll_id': 'c2NhbjsxNjsxNTM4NDo1ajYydHRRZVNDeXBrS2RNODVYUkt',
+            'hits': {
+                'hits': [raw_hit],
+                'max_score': 4.675524,
+                'total': 1,
+            },
+            'aggregations': {
+                'names': {
+                    'buckets': [{'key': 'LG', 'doc_count': 1}]
+                }
+            },
+        }
+        self.client.search = Mock(return_value=raw_result)
+        self.client.scroll = Mock(return_value=raw_result)
+        self.client.msearch = Mock(
+            return_value={'responses': [raw_result, raw_result]}
+        )
+        self.client.mget = Mock(
+            return_value={
+                'docs': [
+                    dict(raw_hit, found=True),
+                    {'_id': '382', '_type': 'product', 'found': False},
+                ]
+            }
+        )
+        ProductDoc = self.index['product']
+        sq = (
+            self.cluster.search_query(doc_cls=ProductDoc)
+            .aggs(names=agg.Terms(ProductDoc.name))
+        )
+
+        result = sq.with_raw_hits().get_result()
+        self.assertIs(result.hits[0], raw_hit)
+        self.assertEqual(list(result), [raw_hit])
+        self.assertEqual(result.total, 1)
+        self.assertAlmostEqual(result.max_score, 4.675524)
+        self.assertEqual(
+            result.scroll_id,
+            'c2NhbjsxNjsxNTM4NDo1ajYydHRRZVNDeXBrS2RNODVYUkt'
+        )
+        self.assertEqual(
+            result.get_aggregation('names').buckets[0].key, 'LG'
+        )
+        self.assertEqual(
+            list(result.to_columns([ProductDoc.name]).keys()), ['name']
+        )
+
+        result = self.cluster.search(sq, raw_hits=True)
+        self.client.search.assert_called_with(
+            doc_type='product',
+            body={'aggregations': {'names': {'terms': {'field': 'name'}}}},
+        )
+        self.assertIs(result.hits[0], raw_hit)
+        result = self.cluster.search(sq.with_raw_hits(), raw_hits=False)
+        self.assertIsInstance(result.hits[0], ProductDoc)
+
+        results = self.cluster.multi_search(
+            [sq, sq.with_raw_hits()], raw_hits=None
+        )
+        self.assertIsInstance(results[0].hits[0], ProductDoc)
+        self.assertIs(results[1].hits[0], raw_hit)
+        results = self.cluster.multi_search([sq, sq], raw_hits=True)
+        self.assertIs(results[0].hits[0], raw_hit)
+        self.assertIs(results[1].hits[0], raw_hit)
+
+        result = self.index.scroll(
+            scroll_id='c2NhbjsxNjsxNDk2MTg6TndpSEZscTBSUnlVc2I4NkcwNUQwUTsx',
+            scroll='30m', raw_hits=True
+        )
+        self.client.scroll.assert_called_with(
+            scroll_id='c2NhbjsxNjsxNDk2MTg6TndpSEZscTBSUnlVc2I4NkcwNUQwUTsx',
+            scroll='30m'
+        )
+        self.assertIs(result.hits[0], raw_hit)
+        self.assertEqual(result.total, 1)
+
+        docs = self.index.multi_get(
+            [381, 382], doc_cls=ProductDoc, raw_hits=True
+        )
+        self.client.mget.assert_called_with(
+            index='test',
+            body={
+                'docs': [{'_id': 381}, {'_id': 382}]
+            },
+        )
+        self.assertEqual(docs, [dict(raw_hit, found=True), None])
+
+    def test_raw_hits_with_instances(self):
+        self.client.search = Mock(
+            return_value={'hits': {'hits': [], 'max_score': 0, 'total': 0}}
+        )
+        self.client.scroll = Mock(
+            return_value={'hits': {'hits': [], 'max_score': 0, 'total': 0}}
+        )
+        ProductDoc = self.index['product']
+        sq = self.cluster.search_query(doc_cls=ProductDoc).with_raw_hits()
+
+        with self.assertRaises(ValueError):
+            sq.with_instance_mapper(lambda ids: {}).get_result()
+        with self.assertRaises(ValueError):
+            list(sq.instances())
+        with self.assertRaises(ValueError):
+            self.cluster.search(
+                sq.with_raw_hits(False).with_instance_mapper(lambda ids: {}),
+                raw_hits=True
+            )
+        with self.assertRaises(ValueError):
+            self.index.scroll(
+                scroll_id='c2NhbjsxNjsxNDk2MTg', scroll='30m',
+                instance_mapper=lambda ids: {}, raw_hits=True
+            )
+        self.client.search.assert_called_once()
+
     def test_bulk(self):
         self.client.bulk = Mock(
             return_value={
@@ -543,6 +667,38 @@ class ClusterTest(BaseTestCase):
         self.assertEqual(result.items[4].status, 200)
         self.assertEqual(bool(result.items[4].error), False)
 
+    def test_bulk_stream(self):
+        consumed = []
+
+        def gen_actions():
+            for i in range(1, 4):
+                consumed.append(i)
+                yield actions.Index(
+                    self.index['car'](_id=str(i), name='car {}'.format(i))
+                )
+            yield actions.Delete(self.index['car'](_id='1'))
+
+        def bulk(body, **params):
+            # actions are compiled only when the client reads the body
+            self.assertEqual(consumed, [])
+            lines = list(body)
+            self.assertEqual(consumed, [1, 2, 3])
+            self.assertEqual(lines, [
+                {'index': {'_type': 'car', '_id': '1'}},
+                {'name': 'car 1'},
+                {'index': {'_type': 'car', '_id': '2'}},
+                {'name': 'car 2'},
+                {'index': {'_type': 'car', '_id': '3'}},
+                {'name': 'car 3'},
+                {'delete': {'_type': 'car', '_id': '1'}},
+            ])
+            self.assertEqual(params, {'index': 'test'})
+            return {'took': 1, 'errors': False, 'items': []}
+
+        self.client.bulk = bulk
+        result = self.index.bulk(gen_actions(), stream=True)
+        self.assertEqual(result.took, 1)
+
     def test_custom_index_class(self):
         class NoSourceIndex(Index):
             def search_query(self, *args, **kwargs):
@@ -141,6 +141,34 @@ def test_simple_codec_decode():
         codec.decode('')
 
 
+def test_simple_codec_decode_dates():
+    codec = SimpleCodec()
+    assert \
+        codec.decode(
+            {
+                'created_at__gte': ['2019-09-01', 'yesterday'],
+                'created_at__lte': '2019-09-01T23:59:59.999999',
+            },
+            {'created_at': Date}
+        ) == \
+        {
+            'created_at': {
+                'gte': [datetime(2019, 9, 1)],
+                'lte': [datetime(2019, 9, 1, 23, 59, 59, 999999)],
+            }
+        }
+    assert \
+        codec.decode(
+            {'created_at': ['01.09.2019', '2019-09-02']},
+            {'created_at': Date(format='dd.MM.yyyy')}
+        ) == \
+        {
+            'created_at': {
+                'exact': [datetime(2019, 9, 1), datetime(2019, 9, 2)],
+            }
+        }
+
+
 def test_simple_coded_decode_custom_type():
     class IntegerKeyword(Integer):
         """Integer that stored as keyword
@@ -161,6 +189,67 @@ def test_simple_coded_decode_custom_type():
         }
 
 
+def test_simple_codec_decode_plan():
+    codec = SimpleCodec(max_values=3)
+    types = {'category': Integer, 'price': Float, 'q': None}
+    assert \
+        codec.decode(
+            {
+                'category': ['1', '2', '3', '4'],
+                'price__gte': '10',
+                'price__from': '20',
+                'q__exact': 'phone',
+                'utm_source': 'mail',
+                'unknown__gte': '1',
+            },
+            types
+        ) == \
+        {
+            'category': {'exact': [1, 2, 3]},
+            'price': {'gte': [10.0], 'from': [20.0]},
+            'q': {'exact': ['phone']},
+            'utm_source': {'exact': ['mail']},
+            'unknown': {'gte': ['1']},
+        }
+    plan = codec._get_plan(types)
+    assert codec._get_plan(dict(types)) is plan
+    assert codec.decode({'category': ['1', '2']}, types) == \
+        {'category': {'exact': [1, 2]}}
+    assert codec._get_plan(types) is plan
+
+    assert SimpleCodec(max_values=None).decode(
+        {'category': [str(i) for i in range(1000)]}, {'category': Integer}
+    ) == {'category': {'exact': list(range(1000))}}
+    assert SimpleCodec().decode(
+        {'category': [str(i) for i in range(1000)]}, {'category': Integer}
+    ) == {'category': {'exact': list(range(SimpleCodec.MAX_VALUES))}}
+
+    class LegacyCodec(SimpleCodec):
+        def __init__(self):
+            pass
+
+    assert LegacyCodec().decode({'category': '1'}, {'category': Integer}) == \
+        {'category': {'exact': [1]}}
+    assert len(
+        LegacyCodec().decode(
+            {'category': ['1'] * 1000}, {'category': Integer}
+        )['category']['exact']
+    ) == SimpleCodec.MAX_VALUES
+
+
+def test_simple_codec_decode_value_override():
+    class UpperCodec(SimpleCodec):
+        def decode_value(self, value, es_type=None):
+            value = super(UpperCodec, self).decode_value(value, es_type)
+            if value is None:
+                return value
+            return value.upper()
+
+    codec = UpperCodec()
+    assert codec.decode({'country': ['ru', 'null']}, {'country': None}) == \
+        {'country': {'exact': ['RU', None]}}
+
+
 def test_simple_codec_encode():
     codec = SimpleCodec()
 
@@ -0,0 +1,69 @@
+from elasticmagic import Bool, Document, DynamicDocument, Field, Params
+from elasticmagic.compiler import Compiler_5_0
+from elasticmagic.types import Integer, List, Object
+
+
+class UserDocument(Document):
+    __doc_type__ = 'user'
+
+    age = Field(Integer)
+
+
+def test_visit_literals(compiler):
+    compiled = compiler.compiled_expression(None)
+    assert compiled.visit('test') == 'test'
+    assert compiled.visit(1) == 1
+    assert compiled.visit(1.5) == 1.5
+    assert compiled.visit(True) is True
+    assert compiled.visit(None) is None
+    assert compiled.visit(object) is object
+
+
+def test_visit_containers(compiler):
+    compiled = compiler.compiled_expression(None)
+    assert compiled.visit(
+        {'q': DynamicDocument.name == 'test', 'ids': (1, 2)}
+    ) == {
+        'q': {'term': {'name': 'test'}},
+        'ids': [1, 2],
+    }
+    assert compiled.visit(
+        [Params(boost=1), DynamicDocument.status.in_([0, 1])]
+    ) == [
+        {'boost': 1},
+        {'terms': {'status': [0, 1]}},
+    ]
+
+
+def test_visit_dynamic_visit_name():
+    class CompiledTypes(Compiler_5_0.compiled_expression):
+        def visit_integer(self, expr):
+            return 'integer'
+
+        def visit_object(self, expr):
+            return 'object'
+
+    compiled = CompiledTypes(None)
+    assert compiled.visit(Integer()) == 'integer'
+    assert compiled.visit(List(Integer)) == 'integer'
+    assert compiled.visit(List(Object(UserDocument))) == 'object'
+    assert compiled.visit([List(Integer), Integer]) == ['integer', 'integer']
+
+
+def test_visit_dispatch_is_per_class():
+    class CompiledExpression(Compiler_5_0.compiled_expression):
+        def visit_query_expression(self, expr, **kwargs):
+            return 'overridden'
+
+    expr = Bool.must(DynamicDocument.a == 1, DynamicDocument.b == 2)
+    expected = {
+        'bool': {
+            'must': [
+                {'term': {'a': 1}},
+                {'term': {'b': 2}},
+            ]
+        }
+    }
+    assert Compiler_5_0.compiled_expression(expr).body == expected
+    assert CompiledExpression(expr).body == 'overridden'
+    assert Compiler_5_0.compiled_expression(expr).body == expected
@@ -4,6 +4,7 @@ import dateutil
 
 from elasticmagic.attribute import AttributedField, DynamicAttributedField
 from elasticmagic.compiler import all_compilers
+from elasticmagic.compiler import Compiler_7_0
 from elasticmagic.document import Document, DynamicDocument
 from elasticmagic.expression import Field, MultiMatch
 from elasticmagic.util import collect_doc_classes
@@ -923,3 +924,190 @@ def test_document_instance__to_source_with_validation(compiler):
     with pytest.raises(ValidationError):
         doc = ProductDocument(name=123, status=1 << 31)
         doc.to_source(compiler, validate=True)
+
+
+def test_document_hydrator():
+    class ItemDocument(Document):
+        __doc_type__ = 'item'
+
+        name = Field(String)
+        count = Field(Integer)
+        price = Field(Float)
+        active = Field(Boolean)
+        ids = Field(List(Integer))
+        flags = Field(List(Boolean))
+        created = Field(Date)
+
+    hit = {
+        '_id': '1',
+        '_type': 'item',
+        '_index': 'test',
+        '_score': 1.5,
+        '_source': {
+            'name': 123,
+            'count': '2',
+            'price': 10,
+            'active': 'false',
+            'ids': ['1', 2],
+            'flags': 1,
+            'created': '2014-08-14T14:05:28Z',
+            'unknown': {'a': 1},
+        },
+    }
+    doc = ItemDocument(_hit=hit)
+    assert doc._id == '1'
+    assert doc._type == 'item'
+    assert doc._index == 'test'
+    assert doc._score == 1.5
+    assert doc.name == '123'
+    assert doc.count == 2
+    assert isinstance(doc.price, float)
+    assert doc.price == 10.0
+    assert doc.active is False
+    assert doc.ids == [1, 2]
+    assert doc.flags == [True]
+    assert doc.created == datetime.datetime(
+        2014, 8, 14, 14, 5, 28, tzinfo=dateutil.tz.tzutc()
+    )
+    assert doc.unknown == {'a': 1}
+    assert doc.get_highlight() == {}
+    assert doc.get_sort_values() == []
+
+    name = 'Test name'
+    doc = ItemDocument(_hit={'_id': '2', '_source': {'name': name}})
+    assert doc.name is name
+    assert doc.count is None
+
+    hydrator = ItemDocument._get_hydrator()
+    assert ItemDocument._get_hydrator() is hydrator
+    ItemDocument.rank = Field(Float)
+    assert ItemDocument._get_hydrator() is not hydrator
+    assert ItemDocument(_hit={'_source': {'rank': 1}}).rank == 1.0
+
+
+def test_document_serializer(compiler):
+    class ItemDocument(Document):
+        __doc_type__ = 'item'
+
+        name = Field('item_name', String)
+        count = Field(Integer)
+        active = Field(Boolean)
+        ids = Field(List(Integer))
+        names = Field(List(String))
+        group = Field(Object(GroupDocument))
+        tags = Field(List(Object(TagDocument)))
+
+    ids = [1, 2]
+    doc = ItemDocument(
+        _id='1',
+        name=123,
+        count='2',
+        active=1,
+        ids=ids,
+        names='test',
+        group=GroupDocument(id=1, name='Group'),
+        tags=[
+            TagDocument(id=1, group=GroupDocument(name='Tag group')),
+            {'id': 2},
+        ],
+        unknown='skipped',
+    )
+    source = doc.to_source(compiler)
+    assert source == {
+        'item_name': '123',
+        'count': '2',
+        'active': True,
+        'ids': [1, 2],
+        'names': ['test'],
+        'group': {'id': 1, 'test_name': 'Group'},
+        'tags': [
+            {'id': 1, 'group': {'test_name': 'Tag group'}},
+            {'id': 2},
+        ],
+    }
+    assert source['ids'] is not ids
+
+    assert doc.to_source(compiler, validate=True)['count'] == 2
+    doc.count = 'two'
+    with pytest.raises(ValidationError):
+        doc.to_source(compiler, validate=True)
+
+    serializer = ItemDocument._get_serializer()
+    assert ItemDocument._get_serializer() is serializer
+    ItemDocument.rank = Field(Float)
+    assert ItemDocument._get_serializer() is not serializer
+    assert ItemDocument(rank=1).to_source(compiler) == {'rank': 1}
+
+
+def test_document_track_changes():
+    class ItemDocument(Document):
+        __doc_type__ = 'item'
+        __track_changes__ = True
+
+        name = Field(String)
+        count = Field(Integer)
+        ids = Field(List(Integer))
+        tags = Field(List(Object(TagDocument)))
+
+    doc = ItemDocument(_hit={
+        '_id': '1',
+        '_source': {
+            'name': 'Test',
+            'ids': [1, 2],
+            'tags': [{'id': 1, 'name': 'tag'}],
+        },
+    })
+    assert doc.get_changed_fields() == []
+    # reading of missing fields is not a change
+    assert doc.count is None
+    doc._score = 2.0
+    doc.name = 'Test'
+    assert doc.get_changed_fields() == []
+
+    doc.count = 1
+    doc.ids.append(3)
+    assert sorted(doc.get_changed_fields()) == ['count', 'ids']
+
+    doc.track_changes()
+    doc.tags[0].name = 'changed tag'
+    assert doc.get_changed_fields() == ['tags']
+
+    assert ItemDocument(name='Test').to_source(Compiler_7_0) == \
+        {'name': 'Test'}
+    with pytest.raises(ValueError):
+        ItemDocument(name='Test').get_changed_fields()
+
+    doc = ProductDocument(_hit={'_id': '1', '_source': {'status': 1}})
+    with pytest.raises(ValueError):
+        doc.get_changed_fields()
+    doc.track_changes()
+    doc.status = 2
+    assert doc.get_changed_fields() == ['status']
+
+
+def test_document_hydrator_customized_document():
+    class CustomDocument(Document):
+        name = Field(String)
+
+        def __setattr__(self, key, value):
+            if key == 'name':
+                value = value.upper()
+            super(CustomDocument, self).__setattr__(key, value)
+
+        def _process_source_key_value(self, key, value):
+            key, value = super(CustomDocument, self) \
+                ._process_source_key_value(key, value)
+            if key == 'status':
+                value = value * 10
+            return key, value
+
+    doc = CustomDocument(_hit={
+        '_id': '1', '_source': {'name': 'test', 'status': 1}
+    })
+    assert doc._id == '1'
+    assert doc.name == 'TEST'
+    assert doc.status == 10
+
+    doc = DynamicDocument(_hit={'_source': {'group': {'name': 'Test'}}})
+    assert isinstance(doc.group, DynamicDocument)
+    assert doc.group.name == 'Test'
@@ -0,0 +1,160 @@
+import datetime
+import decimal
+import json
+import pickle
+import uuid
+
+from elasticsearch.serializer import JSONSerializer
+
+from mock import MagicMock
+
+from elasticmagic import (
+    actions, agg, Cluster, Document, DynamicDocument, Field, Params,
+    SearchQuery,
+)
+from elasticmagic.compiler import Compiler_5_0, with_body_encoder
+from elasticmagic.encoder import JSONBytesEncoder
+from elasticmagic.expression import Literal
+from elasticmagic.types import Date, Integer, List, Text
+
+
+class ProductDocument(Document):
+    __doc_type__ = 'product'
+
+    name = Field(Text)
+    status = Field(Integer)
+    tags = Field(List(Integer))
+    created_at = Field(Date)
+
+
+def test_encode():
+    encoder = JSONBytesEncoder()
+    assert encoder.encode(None) == b'null'
+    assert encoder.encode({'a': [1, 2.5, True, None]}) == \
+        b'{"a":[1,2.5,true,null]}'
+    assert encoder.encode(u'\u043f\u0440\u0438\u0432\u0456\u0442') == \
+        u'"\u043f\u0440\u0438\u0432\u0456\u0442"'.encode('utf-8')
+    assert encoder.encode({
+        'date': datetime.date(2020, 1, 2),
+        'datetime': datetime.datetime(2020, 1, 2, 3, 4, 5),
+        'decimal': decimal.Decimal('1.5'),
+        'uuid': uuid.UUID('12345678123456781234567812345678'),
+    }) == (
+        b'{"date":"2020-01-02",'
+        b'"datetime":"2020-01-02T03:04:05",'
+        b'"decimal":1.5,'
+        b'"uuid":"12345678-1234-5678-1234-567812345678"}'
+    )
+    assert encoder.encode({
+        'params': Params(boost=1, field=ProductDocument.name),
+        'literal': Literal([1, 2]),
+        'fields': [Field('name'), ProductDocument.status],
+    }) == (
+        b'{"params":{"boost":1,"field":"name"},'
+        b'"literal":[1,2],'
+        b'"fields":["name","status"]}'
+    )
+
+
+def test_encode_ndjson():
+    encoder = JSONBytesEncoder()
+    assert encoder.encode_ndjson([]) == b''
+    assert encoder.encode_ndjson([{'index': {'_id': 1}}, {'a': 1}]) == \
+        b'{"index":{"_id":1}}\n{"a":1}\n'
+
+
+def test_pickle():
+    for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+        encoder = pickle.loads(pickle.dumps(JSONBytesEncoder(), protocol))
+        assert encoder.encode({'a': Literal(1)}) == b'{"a":1}'
+
+
+def test_encoded_search_query(compiler):
+    encoding_compiler = with_body_encoder(compiler)
+    sq = (
+        SearchQuery(ProductDocument.name.match('test'))
+        .filter(
+            ProductDocument.status.in_([0, 1]),
+            ProductDocument.created_at >= datetime.datetime(2020, 1, 1),
+        )
+        .aggs(tags=agg.Terms(ProductDocument.tags, size=100))
+        .order_by(ProductDocument.status.desc())
+        .limit(10)
+    )
+    compiled_query = encoding_compiler.compiled_query(sq)
+    body = compiled_query.get_request_body()
+    assert isinstance(body, bytes)
+    assert json.loads(body.decode('utf-8')) == json.loads(
+        JSONSerializer().dumps(sq.to_dict(compiler=compiler))
+    )
+    assert compiler.compiled_query(sq).get_request_body() == \
+        sq.to_dict(compiler=compiler)
+
+
+def test_cluster_body_encoder():
+    client = MagicMock()
+    client.search.return_value = {
+        'hits': {'hits': [], 'max_score': None, 'total': 0}
+    }
+    client.msearch.return_value = {
+        'responses': [
+            {'hits': {'hits': [], 'max_score': None, 'total': 0}},
+            {'hits': {'hits': [], 'max_score': None, 'total': 0}},
+        ]
+    }
+    client.bulk.return_value = {'took': 1, 'errors': False, 'items': []}
+    cluster = Cluster(
+        client, compiler=Compiler_5_0, body_encoder=JSONBytesEncoder()
+    )
+    index = cluster['test']
+
+    index.search_query(ProductDocument.status == 1).get_result()
+    client.search.assert_called_once_with(
+        index='test',
+        doc_type='product',
+        body=b'{"query":{"term":{"status":1}}}',
+    )
+
+    index.multi_search([
+        index.search_query(ProductDocument.status == 1),
+        index.search_query(ProductDocument.status == 2).limit(0),
+    ])
+    msearch_body = client.msearch.call_args[1]['body']
+    assert msearch_body.splitlines() == [
+        b'{"index":"test","type":"product"}',
+        b'{"query":{"term":{"status":1}}}',
+        b'{"index":"test","type":"product"}',
+        b'{"query":{"term":{"status":2}},"size":0}',
+    ]
+    assert msearch_body.endswith(b'\n')
+
+    index.bulk([
+        actions.Index(DynamicDocument(_id=1, name='test')),
+        actions.Delete(DynamicDocument(_id=2)),
+    ])
+    client.bulk.assert_called_once_with(
+        index='test',
+        body=(
+            b'{"index":{"_id":1}}\n'
+            b'{"name":"test"}\n'
+            b'{"delete":{"_id":2}}\n'
+        ),
+    )
+
+    client.bulk.reset_mock()
+    index.bulk(
+        (
+            actions.Index(DynamicDocument(_id=i, name='test'))
+            for i in range(1, 3)
+        ),
+        stream=True,
+    )
+    client.bulk.assert_called_once_with(
+        index='test',
+        body=(
+            b'{"index":{"_id":1}}\n'
+            b'{"name":"test"}\n'
+            b'{"index":{"_id":2}}\n'
+            b'{"name":"test"}\n'
+        ),
+    )
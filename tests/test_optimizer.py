@@ -0,0 +1,312 @@
+from mock import Mock
+
+from elasticmagic import (
+    Bool, Document, Field, FunctionScore, MatchAll, Param, SearchQuery,
+)
+from elasticmagic.compiler import Compiler_1_0
+from elasticmagic.compiler import Compiler_7_0
+from elasticmagic.compiler import with_compiled_cache
+from elasticmagic.expression import And, Or
+from elasticmagic.optimizer import QueryOptimizer
+from elasticmagic.types import Integer, Keyword, Text
+
+
+class ProductDocument(Document):
+    __doc_type__ = 'product'
+
+    name = Field(Text)
+    status = Field(Integer)
+    category = Field(Integer)
+    tag = Field(Keyword)
+    rank = Field(Integer)
+
+
+def test_optimize_filters():
+    optimizer = QueryOptimizer()
+    filters = optimizer.optimize_filters([
+        ProductDocument.status == 1,
+        Bool.must(
+            MatchAll(),
+            Bool.must(ProductDocument.rank > 0, ProductDocument.status == 1),
+        ),
+        And(ProductDocument.category == 2, ProductDocument.rank > 0),
+    ])
+    assert [f.to_dict(Compiler_7_0) for f in filters] == [
+        {'term': {'status': 1}},
+        {'range': {'rank': {'gt': 0}}},
+        {'term': {'category': 2}},
+    ]
+    assert optimizer.rewrites == {
+        'flatten_bool': 3,
+        'drop_match_all': 1,
+        'deduplicate_filters': 2,
+    }
+
+
+def test_merge_terms():
+    optimizer = QueryOptimizer()
+    filters = optimizer.optimize_filters([
+        Bool.should(
+            ProductDocument.tag == 'a',
+            ProductDocument.category == 1,
+            Bool.should(
+                ProductDocument.tag.in_(['b', 'a']),
+                ProductDocument.tag == 'c',
+            ),
+        ),
+        Or(
+            ProductDocument.status == 1,
+            ProductDocument.status == 1,
+            ProductDocument.status.term(2, boost=2),
+        ),
+    ])
+    assert [f.to_dict(Compiler_7_0) for f in filters] == [
+        {
+            'bool': {
+                'should': [
+                    {'terms': {'tag': ['a', 'b', 'c']}},
+                    {'term': {'category': 1}},
+                ]
+            }
+        },
+        {
+            'bool': {
+                'should': [
+                    {'term': {'status': 1}},
+                    {'term': {'status': {'value': 2, 'boost': 2}}},
+                ]
+            }
+        },
+    ]
+    assert optimizer.rewrites == {
+        'flatten_bool': 1,
+        'merge_terms': 2,
+        'deduplicate_filters': 1,
+    }
+
+
+def test_params_are_not_merged():
+    optimizer = QueryOptimizer()
+    filters = optimizer.optimize_filters([
+        Bool.should(
+            ProductDocument.tag == Param('tag'),
+            ProductDocument.tag == Param('tag'),
+            ProductDocument.tag == 'a',
+        ),
+    ])
+    assert len(filters) == 1
+    assert len(filters[0].params['should']) == 3
+    assert optimizer.rewrites == {}
+
+
+def test_optimize_query(compiler):
+    sq = (
+        SearchQuery(
+            Bool.must(
+                ProductDocument.name.match('phone'),
+                MatchAll(),
+                Bool.must(
+                    ProductDocument.status.in_([0, 1]),
+                    ProductDocument.name.match('mobile'),
+                ),
+            )
+        )
+        .filter(ProductDocument.rank > 0)
+        .filter(ProductDocument.rank > 0)
+        .post_filter(ProductDocument.category == 1)
+        .post_filter(Bool.must(ProductDocument.category == 1))
+    )
+    query = {
+        'bool': {
+            'must': [
+                {'match': {'name': 'phone'}},
+                {'match': {'name': 'mobile'}},
+            ]
+        }
+    }
+    filters = [
+        {'terms': {'status': [0, 1]}},
+        {'range': {'rank': {'gt': 0}}},
+    ]
+    if compiler.features.supports_bool_filter:
+        expected_query = {
+            'bool': {
+                'must': query,
+                'filter': filters,
+            }
+        }
+    else:
+        expected_query = {
+            'filtered': {
+                'query': query,
+                'filter': {'bool': {'must': filters}},
+            }
+        }
+    compiled_query = compiler.compiled_query(sq.optimize())
+    assert compiled_query.body == {
+        'query': expected_query,
+        'post_filter': {'term': {'category': 1}},
+    }
+    assert compiled_query.rewrites == {
+        'drop_match_all': 1,
+        'flatten_bool': 1,
+        'move_to_filter': 1,
+        'deduplicate_filters': 2,
+    }
+
+    compiled_query = compiler.compiled_query(sq)
+    assert compiled_query.rewrites is None
+    assert len(compiled_query.body['post_filter']['bool']['must']) == 2
+
+
+def test_optimize_query_keeps_scoring_bool():
+    sq = SearchQuery(
+        Bool(
+            must=Bool.must(
+                ProductDocument.name.match('phone'),
+                ProductDocument.status == 1,
+            ),
+            should=[ProductDocument.tag == 'a', ProductDocument.tag == 'a'],
+            filter=[ProductDocument.rank > 0, ProductDocument.rank > 0],
+        )
+    )
+    assert sq.optimize().to_dict(Compiler_7_0) == {
+        'query': {
+            'bool': {
+                'must': [
+                    {'match': {'name': 'phone'}},
+                    {'term': {'status': 1}},
+                ],
+                'should': [
+                    {'term': {'tag': 'a'}},
+                    {'term': {'tag': 'a'}},
+                ],
+                'filter': [{'range': {'rank': {'gt': 0}}}],
+            }
+        }
+    }
+
+
+def test_optimize_query_keeps_should_optional():
+    should = [ProductDocument.tag == 'a']
+    for q in [
+            Bool(must=MatchAll(), should=should),
+            Bool(must=Bool.must(MatchAll()), should=should),
+            Bool(filter=[MatchAll()], should=should),
+    ]:
+        assert SearchQuery(q).optimize().to_dict(Compiler_7_0) == {
+            'query': {
+                'bool': {
+                    'must': {'match_all': {}},
+                    'should': [{'term': {'tag': 'a'}}],
+                }
+            }
+        }
+
+    sq = SearchQuery(
+        Bool(must=MatchAll(), should=should, minimum_should_match=1)
+    )
+    assert sq.optimize().to_dict(Compiler_7_0) == {
+        'query': {
+            'bool': {
+                'should': [{'term': {'tag': 'a'}}],
+                'minimum_should_match': 1,
+            }
+        }
+    }
+
+    sq = SearchQuery(
+        Bool(must=ProductDocument.status.in_([0, 1]), should=should)
+    )
+    assert sq.optimize().to_dict(Compiler_7_0) == {
+        'query': {
+            'bool': {
+                'should': [{'term': {'tag': 'a'}}],
+                'filter': {'terms': {'status': [0, 1]}},
+            }
+        }
+    }
+
+
+def test_optimize_query_min_score():
+    sq = (
+        SearchQuery(ProductDocument.status.in_([0, 1]))
+        .filter(ProductDocument.rank > 0)
+        .min_score(1)
+        .optimize()
+    )
+    assert sq.to_dict(Compiler_1_0) == {
+        'query': {
+            'filtered': {
+                'query': {'terms': {'status': [0, 1]}},
+                'filter': {'range': {'rank': {'gt': 0}}},
+            }
+        },
+        'min_score': 1,
+    }
+
+
+def test_optimize_query_rescore():
+    sq = (
+        SearchQuery(Bool.must(MatchAll(), ProductDocument.status.in_([0])))
+        .rescore({'query': {'rescore_query': {'match_all': {}}}})
+        .optimize()
+    )
+    assert sq.to_dict(Compiler_7_0)['query'] == {
+        'bool': {
+            'must': [
+                {'match_all': {}},
+                {'terms': {'status': [0]}},
+            ]
+        }
+    }
+
+
+def test_optimize_query_function_score():
+    sq = (
+        SearchQuery(Bool.must(MatchAll(), ProductDocument.status == 1))
+        .function_score({'random_score': {'seed': 1}})
+        .optimize()
+    )
+    assert sq.to_dict(Compiler_7_0) == {
+        'query': FunctionScore(
+            query=Bool.must(MatchAll(), ProductDocument.status == 1),
+            functions=[{'random_score': {'seed': 1}}],
+        ).to_dict(Compiler_7_0)
+    }
+
+
+def test_optimize_result_rewrites(index, client):
+    client.search = Mock(return_value={'hits': {'hits': [], 'total': 0}})
+    sq = (
+        index.search_query(ProductDocument.status.in_([0, 1]))
+        .filter(ProductDocument.rank > 0)
+        .filter(ProductDocument.rank > 0)
+    )
+    assert sq.optimize().get_result().rewrites == {
+        'move_to_filter': 1,
+        'deduplicate_filters': 1,
+    }
+    assert sq.get_result().rewrites is None
+
+    client.msearch = Mock(return_value={
+        'responses': [{'hits': {'hits': [], 'total': 0}}] * 2
+    })
+    results = index.multi_search([sq.optimize(), sq])
+    assert results[0].rewrites == {
+        'move_to_filter': 1,
+        'deduplicate_filters': 1,
+    }
+    assert results[1].rewrites is None
+
+
+def test_optimize_bypasses_compiled_cache():
+    compiler = with_compiled_cache(Compiler_7_0)
+    sq = SearchQuery(ProductDocument.status.in_([0, 1]))
+    assert compiler.compiled_query(sq.optimize()).body == {
+        'query': {'bool': {'filter': {'terms': {'status': [0, 1]}}}}
+    }
+    assert compiler.compiled_query(sq).body == {
+        'query': {'terms': {'status': [0, 1]}}
+    }
+    assert len(compiler.compiled_cache) == 1
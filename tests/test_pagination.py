@@ -1,6 +1,12 @@
 from mock import Mock
 
+from elasticmagic import Cluster, Index
+from elasticmagic.compiler import Compiler_7_0
+from elasticmagic.ext.pagination import CursorSearchQueryWrapper
 from elasticmagic.ext.pagination import SearchQueryWrapper
+from elasticmagic.ext.pagination.cursor import CursorSigner
+from elasticmagic.ext.pagination.cursor import InvalidCursor
+from elasticmagic.ext.pagination.flask import CursorPagination
 from elasticmagic.ext.pagination.flask import Pagination
 
 from .base import BaseTestCase
@@ -76,3 +82,157 @@ class FlaskPaginationTest(BaseTestCase):
         self.assertEqual(len(wrapper[:2]), 2)
         self.assertEqual(len([d for d in wrapper]), 2)
         self.assertEqual(len(wrapper.get_result().hits), 2)
+
+
+def _cursor_hits(*ids):
+    return {
+        "hits": {
+            "max_score": None,
+            "total": {"value": 28, "relation": "eq"},
+            "hits": [
+                {
+                    "_id": str(_id),
+                    "_type": "car",
+                    "_score": None,
+                    "sort": [_id * 10, str(_id)],
+                }
+                for _id in ids
+            ]
+        }
+    }
+
+
+class CursorPaginationTest(BaseTestCase):
+    def setUp(self):
+        super(CursorPaginationTest, self).setUp()
+        self.cluster = Cluster(self.client, compiler=Compiler_7_0)
+        self.index = Index(self.cluster, 'test')
+        self.car_cls = self.index['car']
+
+    def test_cursor_signer(self):
+        signer = CursorSigner('secret')
+        cursor = signer.dumps('n', [10, 'a'])
+        self.assertEqual(signer.loads(cursor), ('n', [10, 'a']))
+
+        payload, signature = cursor.split('.')
+        tampered = CursorSigner('secret').dumps('n', [20, 'a'])
+        for invalid_cursor in [
+                CursorSigner('other').dumps('n', [10, 'a']),
+                '{}.{}'.format(tampered.split('.')[0], signature),
+                payload,
+                'not.a.cursor',
+                '!!!.???',
+                CursorSigner('secret').dumps('x', [10]),
+        ]:
+            self.assertRaises(InvalidCursor, signer.loads, invalid_cursor)
+
+    def test_pagination(self):
+        sq = (
+            self.index.search_query(doc_cls=self.car_cls)
+            .order_by(self.car_cls.price)
+        )
+
+        self.client.search = Mock(return_value=_cursor_hits(1, 2, 3))
+        p = CursorPagination(sq, self.car_cls._id, 'secret', per_page=2)
+        self.assertEqual(
+            self.client.search.call_args[1]['body'],
+            {
+                'size': 3,
+                'sort': ['price', '_id'],
+                'track_total_hits': False,
+            }
+        )
+        self.assertEqual([doc._id for doc in p.items], ['1', '2'])
+        self.assertIs(p.total, None)
+        self.assertEqual(p.has_prev, False)
+        self.assertIs(p.prev_cursor, None)
+        self.assertEqual(p.has_next, True)
+        self.assertIsNot(p.next_cursor, None)
+
+        self.client.search = Mock(return_value=_cursor_hits(3, 4))
+        p = p.next()
+        self.assertEqual(
+            self.client.search.call_args[1]['body'],
+            {
+                'size': 3,
+                'sort': ['price', '_id'],
+                'search_after': (20, '2'),
+                'track_total_hits': False,
+            }
+        )
+        self.assertEqual([doc._id for doc in p.items], ['3', '4'])
+        self.assertEqual(p.has_next, False)
+        self.assertIs(p.next_cursor, None)
+        self.assertEqual(p.has_prev, True)
+
+        # previous page is fetched in reversed order
+        self.client.search = Mock(return_value=_cursor_hits(2, 1))
+        p = p.prev()
+        self.assertEqual(
+            self.client.search.call_args[1]['body'],
+            {
+                'size': 3,
+                'sort': [
+                    {'price': {'order': 'desc', 'missing': '_first'}},
+                    {'_id': {'order': 'desc', 'missing': '_first'}},
+                ],
+                'search_after': (30, '3'),
+                'track_total_hits': False,
+            }
+        )
+        self.assertEqual([doc._id for doc in p.items], ['1', '2'])
+        self.assertEqual(p.has_prev, False)
+        self.assertIs(p.prev_cursor, None)
+        self.assertEqual(p.has_next, True)
+        self.assertEqual(
+            CursorSigner('secret').loads(p.next_cursor), ('n', [20, '2'])
+        )
+
+        # search query is not modified
+        self.assertEqual(
+            sq.to_dict(compiler=Compiler_7_0), {'sort': ['price']}
+        )
+
+    def test_pagination_invalid_cursor(self):
+        sq = self.index.search_query(doc_cls=self.car_cls)
+        cursor = CursorSigner('other').dumps('n', [1])
+        self.assertRaises(
+            InvalidCursor,
+            lambda: CursorPagination(
+                sq, self.car_cls._id, 'secret', cursor=cursor
+            )
+        )
+        self.assertEqual(self.client.search.call_count, 0)
+
+    def test_wrapper(self):
+        self.client.search = Mock(return_value=_cursor_hits(1, 2))
+        sq = (
+            self.index.search_query(doc_cls=self.car_cls)
+            .order_by(self.car_cls.price.desc(missing='_first'), '_score')
+        )
+        wrapper = CursorSearchQueryWrapper(
+            sq, self.car_cls._id, 'secret', per_page=2,
+            track_total_hits=True,
+        )
+        self.assertRaises(ValueError, lambda: [d for d in wrapper])
+        self.assertRaises(ValueError, lambda: wrapper.get_result())
+
+        cursor = CursorSigner('secret').dumps('p', [30, '3'])
+        self.assertEqual(len(wrapper.get_page(cursor)), 2)
+        self.assertEqual(
+            self.client.search.call_args[1]['body'],
+            {
+                'size': 3,
+                'sort': [
+                    {'price': {'order': 'asc', 'missing': '_last'}},
+                    {'_score': 'asc'},
+                    {'_id': {'order': 'desc', 'missing': '_first'}},
+                ],
+                'search_after': (30, '3'),
+            }
+        )
+        self.assertEqual([d._id for d in wrapper], ['2', '1'])
+        self.assertEqual(wrapper.count, 28)
+        self.assertEqual(wrapper.has_prev, False)
+        self.assertEqual(wrapper.has_next, True)
+        self.assertEqual(len(wrapper.get_result().hits), 2)
@@ -1,5 +1,7 @@
 import datetime
-from mock import Mock
+from mock import Mock, patch
+
+import pytest
 
 from elasticmagic import agg, Document, Field, Match
 from elasticmagic.compat import text_type
@@ -18,6 +20,8 @@ from elasticmagic.ext.queryfilter import RangeFilter
 from elasticmagic.ext.queryfilter import SimpleFilter
 from elasticmagic.ext.queryfilter import SimpleQueryFilter
 from elasticmagic.ext.queryfilter import SimpleQueryValue
+from elasticmagic.ext.queryfilter.codec import SimpleCodec
+from elasticmagic.ext.queryfilter.queryfilter import BaseFilter
 
 
 class CarType(object):
@@ -85,6 +89,83 @@ def test_simple_filter(index):
         }
 
 
+def test_simple_filter_max_values(index):
+    class CarQueryFilter(QueryFilter):
+        type = SimpleFilter(index['car'].type, type=Integer)
+
+    params = {'type': [str(i) for i in range(1000)]}
+
+    sq = CarQueryFilter().apply(index.search_query(), params)
+    assert sq.to_dict(Compiler_5_0) == \
+        {
+            "query": {
+                "bool": {
+                    "filter": {
+                        "terms": {
+                            "type": list(range(SimpleCodec.MAX_VALUES))
+                        }
+                    }
+                }
+            }
+        }
+
+    qf = CarQueryFilter(codec=SimpleCodec(max_values=2))
+    sq = qf.apply(index.search_query(), params)
+    assert sq.to_dict(Compiler_5_0) == \
+        {
+            "query": {
+                "bool": {"filter": {"terms": {"type": [0, 1]}}}
+            }
+        }
+
+
+def test_custom_filter(index):
+    class DistanceFilter(BaseFilter):
+        def _apply_filter(self, search_query, params):
+            distance = params.get(self.alias, {}).get('lte')
+            units = params.get('units', {}).get('exact', ['km'])
+            if not distance:
+                return search_query
+            return search_query.filter(
+                index['car'].distance <= '{}{}'.format(distance[0], units[0])
+            )
+
+    class TypedDistanceFilter(DistanceFilter):
+        @property
+        def _types(self):
+            return {self.alias: Integer}
+
+    class CarQueryFilter(QueryFilter):
+        type = SimpleFilter(index['car'].type, type=Integer)
+        distance = DistanceFilter()
+
+    params = {'type': '1', 'distance__lte': '10', 'units': 'mi'}
+
+    sq = CarQueryFilter().apply(index.search_query(), params)
+    assert sq.to_dict(Compiler_5_0) == \
+        {
+            "query": {
+                "bool": {
+                    "filter": [
+                        {"term": {"type": 1}},
+                        {"range": {"distance": {"lte": "10mi"}}}
+                    ]
+                }
+            }
+        }
+
+    CarQueryFilter.distance = TypedDistanceFilter()
+    sq = CarQueryFilter().apply(
+        index.search_query(), dict(params, distance__lte='ten')
+    )
+    assert sq.to_dict(Compiler_5_0) == \
+        {
+            "query": {
+                "bool": {"filter": {"term": {"type": 1}}}
+            }
+        }
+
+
 def test_simple_filter_with_and_conjunction(index):
     class ClientQueryFilter(QueryFilter):
         label = SimpleFilter(index['client'].label,
@@ -1026,10 +1107,10 @@ def test_facet_query_filter(index, client):
 
     qf = CarQueryFilter()
 
-    # assert (
-    #     CarQueryFilter().get_filter('price').get_value('*-10000')
-    #     is not qf.get_filter('price').get_value('*-10000')
-    # )
+    assert (
+        CarQueryFilter().get_filter('price').get_value('*-10000')
+        is not qf.get_filter('price').get_value('*-10000')
+    )
 
     sq = index.search_query()
     sq = qf.apply(sq, {'new': ['true', 'false']})
@@ -2107,3 +2188,313 @@ def test_nested_range_filter_func(index, client):
     assert weight.enabled is None
     assert weight.min_value == 2.5
     assert weight.max_value == 38.0
+
+
+def test_query_filter_state(index, client):
+    class CarQueryFilter(QueryFilter):
+        price = RangeFilter(index['car'].price, compute_enabled=False)
+        is_new = FacetQueryFilter(
+            FacetQueryValue('true', index['car'].state == 'new'),
+            alias='new'
+        )
+        sort = OrderingFilter(
+            OrderingValue('-price', [index['car'].price.desc()]),
+            OrderingValue('price', [index['car'].price]),
+            alias='o',
+        )
+        page = PageFilter(alias='p', per_page_values=[10])
+
+    class BusQueryFilter(CarQueryFilter):
+        seats = RangeFilter(index['car'].seats, compute_enabled=False)
+
+    plan = CarQueryFilter._get_filter_plan()
+    assert [f.name for f in plan] == ['price', 'is_new', 'sort', 'page']
+    assert CarQueryFilter._get_filter_plan() is plan
+    assert [f.name for f in BusQueryFilter._get_filter_plan()] == [
+        'price', 'is_new', 'sort', 'page', 'seats'
+    ]
+    CarQueryFilter.model = SimpleFilter(index['car'].model)
+    assert [f.name for f in BusQueryFilter._get_filter_plan()] == [
+        'price', 'is_new', 'sort', 'page', 'model', 'seats'
+    ]
+
+    qf = CarQueryFilter()
+    assert qf.price is not plan[0]
+
+    client.search = Mock(
+        return_value={
+            "hits": {
+                "hits": [],
+                "max_score": 1.829381,
+                "total": 893
+            },
+            "aggregations": {
+                "qf.is_new:true": {"doc_count": 82},
+                "qf.price.filter": {
+                    "doc_count": 82,
+                    "qf.price.min": {"value": 7500},
+                    "qf.price.max": {"value": 25800}
+                },
+                "qf.price.min": {"value": 7500},
+                "qf.price.max": {"value": 25800}
+            }
+        }
+    )
+
+    state = qf.create_state()
+    other_state = qf.create_state()
+    sq = qf.apply(
+        index.search_query(),
+        {'new': ['true'], 'o': ['price'], 'p': ['3']},
+        state=state,
+    )
+    other_sq = qf.apply(index.search_query(), {}, state=other_state)
+    assert sq.to_dict(Compiler_5_0) == \
+        {
+            "aggregations": {
+                "qf.is_new:true": {
+                    "filter": {"term": {"state": "new"}}
+                },
+                "qf.price.filter": {
+                    "filter": {"term": {"state": "new"}},
+                    "aggregations": {
+                        "qf.price.min": {"min": {"field": "price"}},
+                        "qf.price.max": {"max": {"field": "price"}}
+                    }
+                }
+            },
+            "post_filter": {"term": {"state": "new"}},
+            "sort": ["price"],
+            "size": 10,
+            "from": 20
+        }
+    assert other_sq.to_dict(Compiler_5_0)['sort'] == [
+        {"price": "desc"}
+    ]
+
+    qf_res = qf.process_result(sq.get_result(), state=state)
+    other_qf_res = qf.process_result(
+        other_sq.get_result(), state=other_state
+    )
+    assert qf_res.price.min == 7500
+    assert qf_res.price.max == 25800
+    assert qf_res.is_new.get_value('true').selected is True
+    assert qf_res.sort.selected_value.value == 'price'
+    assert qf_res.page.page == 3
+    assert qf_res.page.total == 893
+    assert other_qf_res.is_new.get_value('true').selected is False
+    assert other_qf_res.sort.selected_value.value == '-price'
+    assert other_qf_res.page.page == 1
+
+    assert state.get_filter('page').page == 3
+    assert state.sort.selected_value.value == 'price'
+    assert state.is_new.get_value('true').selected is True
+    assert other_state.is_new.get_value('true').selected is False
+
+    # the query filter itself is not changed
+    assert qf._params == {}
+    assert qf.page.page is None
+    assert qf.page.total is None
+    assert qf.sort.selected_value is None
+    assert qf.price.min is None
+    assert qf.is_new.get_value('true').selected is False
+
+
+def test_group_aggs(index, client):
+    class CarQueryFilter(QueryFilter):
+        type = FacetFilter(index['car'].type, type=Integer)
+        vendor = FacetFilter(index['car'].vendor)
+        model = FacetFilter(index['car'].model)
+        price = RangeFilter(
+            index['car'].price, type=Integer, compute_enabled=False
+        )
+
+    qf = CarQueryFilter(group_aggs=True)
+    state = qf.create_state()
+    sq = qf.apply(
+        index.search_query(),
+        {'type': ['0'], 'vendor': ['Subaru']},
+        state=state,
+    )
+    assert sq.to_dict(Compiler_5_0) == \
+        {
+            "aggregations": {
+                "qf.type.filter": {
+                    "filter": {"term": {"vendor": "Subaru"}},
+                    "aggregations": {
+                        "qf.type": {"terms": {"field": "type"}}
+                    }
+                },
+                "qf.vendor.filter": {
+                    "filter": {"term": {"type": 0}},
+                    "aggregations": {
+                        "qf.vendor": {"terms": {"field": "vendor"}}
+                    }
+                },
+                "qf.filters.0": {
+                    "filter": {
+                        "bool": {
+                            "must": [
+                                {"term": {"type": 0}},
+                                {"term": {"vendor": "Subaru"}}
+                            ]
+                        }
+                    },
+                    "aggregations": {
+                        "qf.model": {"terms": {"field": "model"}},
+                        "qf.price.min": {"min": {"field": "price"}},
+                        "qf.price.max": {"max": {"field": "price"}}
+                    }
+                }
+            },
+            "post_filter": {
+                "bool": {
+                    "must": [
+                        {"term": {"type": 0}},
+                        {"term": {"vendor": "Subaru"}}
+                    ]
+                }
+            }
+        }
+
+    client.search = Mock(
+        return_value={
+            "hits": {
+                "hits": [],
+                "max_score": 1.829381,
+                "total": 8
+            },
+            "aggregations": {
+                "qf.type.filter": {
+                    "doc_count": 10,
+                    "qf.type": {
+                        "buckets": [
+                            {"key": 0, "doc_count": 8},
+                            {"key": 1, "doc_count": 2}
+                        ]
+                    }
+                },
+                "qf.vendor.filter": {
+                    "doc_count": 12,
+                    "qf.vendor": {
+                        "buckets": [
+                            {"key": "Subaru", "doc_count": 8},
+                            {"key": "Mazda", "doc_count": 4}
+                        ]
+                    }
+                },
+                "qf.filters.0": {
+                    "doc_count": 8,
+                    "qf.model": {
+                        "buckets": [
+                            {"key": "Imprezza", "doc_count": 5},
+                            {"key": "Forester", "doc_count": 3}
+                        ]
+                    },
+                    "qf.price.min": {"value": 4000},
+                    "qf.price.max": {"value": 26000}
+                }
+            }
+        }
+    )
+    qf_res = qf.process_result(sq.get_result(), state=state)
+    assert [(v.value, v.count, v.selected) for v in qf_res.type.all_values] \
+        == [(0, 8, True), (1, 2, False)]
+    assert [(v.value, v.count) for v in qf_res.vendor.all_values] == [
+        ('Subaru', 8), ('Mazda', 4)
+    ]
+    assert [(v.value, v.count) for v in qf_res.model.all_values] == [
+        ('Imprezza', 5), ('Forester', 3)
+    ]
+    assert qf_res.price.min == 4000
+    assert qf_res.price.max == 26000
+
+    # a single filter does not share its aggregations
+    sq = qf.apply(index.search_query(), {'type': ['0']})
+    assert set(sq.to_dict(Compiler_5_0)['aggregations']) == {
+        'qf.type', 'qf.filters.0'
+    }
+    sq = CarQueryFilter().apply(index.search_query(), {'type': ['0']})
+    assert set(sq.to_dict(Compiler_5_0)['aggregations']) == {
+        'qf.type', 'qf.vendor.filter', 'qf.model.filter', 'qf.price.filter'
+    }
+
+
+def test_lazy_result(index, client):
+    class CarQueryFilter(QueryFilter):
+        type = FacetFilter(index['car'].type, type=Integer)
+        price = RangeFilter(index['car'].price, compute_enabled=False)
+        page = PageFilter(alias='p', per_page_values=[10])
+
+    client.search = Mock(
+        return_value={
+            "hits": {"hits": [], "max_score": 1, "total": 35},
+            "aggregations": {
+                "qf.type": {
+                    "buckets": [
+                        {"key": 0, "doc_count": 20},
+                        {"key": 1, "doc_count": 15}
+                    ]
+                },
+                "qf.price.min": {"value": 4000},
+                "qf.price.max": {"value": 26000}
+            }
+        }
+    )
+
+    qf = CarQueryFilter()
+    state = qf.create_state()
+    sq = qf.apply(index.search_query(), {'p': ['2']}, state=state)
+    qf_res = qf.process_result(sq.get_result(), state=state)
+    assert state.type.all_values == []
+    assert state.page.total is None
+    assert qf_res.page.total == 35
+    assert qf_res.page.page == 2
+    assert state.page.total == 35
+    assert state.type.all_values == []
+    assert qf_res.get_filter('price').max == 26000
+    assert qf_res.get_filter('unknown') is None
+    assert set(qf_res.filters) == {'type', 'price', 'page'}
+    assert [(v.value, v.count) for v in qf_res.type.all_values] == [
+        (0, 20), (1, 15)
+    ]
+    assert qf_res.filters['type'] is qf_res.type
+    with pytest.raises(AttributeError):
+        qf_res.unknown
+
+    state = qf.create_state()
+    sq = qf.apply(index.search_query(), {}, state=state)
+    qf_res = qf.process_result(
+        sq.get_result(), state=state, only=['type', 'page']
+    )
+    assert set(qf_res.filters) == {'type', 'page'}
+    assert qf_res.page.total == 35
+    assert state.price.max is None
+    assert qf_res.get_filter('price') is None
+    with pytest.raises(AttributeError):
+        qf_res.price
+
+    # without a state filters of the query filter are processed on access
+    sq = qf.apply(index.search_query(), {})
+    with patch.object(
+            PageFilter, '_process_result', autospec=True,
+            side_effect=PageFilter._process_result
+    ) as process_page:
+        qf_res = qf.process_result(sq.get_result())
+        assert qf.price.max == 26000
+        assert not process_page.called
+        assert qf.page.total == 35
+        assert qf_res.page.total == 35
+        assert qf.get_filter('page') is qf.page
+        assert process_page.call_count == 1
+    assert len(qf.type.all_values) == 2
+    assert len(qf_res.type.all_values) == 2
+    assert [f.name for f in qf.filters] == ['type', 'price', 'page']
+    with pytest.raises(AttributeError):
+        qf.unknown
+
+    sq = qf.apply(index.search_query(), {'p': ['3']})
+    qf.process_result(sq.get_result())
+    qf.reset()
+    assert qf.page.total is None
+    assert qf.price.max is None
@@ -1,4 +1,12 @@
-from elasticmagic import agg, types
+import copy
+from array import array
+
+from mock import Mock
+
+import pytest
+
+from elasticmagic import agg, types, Document, Field
+from elasticmagic.columns import INT64_TYPECODE
 from elasticmagic.result import SearchResult
 
 
@@ -9,3 +17,213 @@ def test_search_result_with_error_and_aggregations():
         aggregations={'types': agg.Terms(field='type', type=types.Integer)}
     )
     assert res.aggregations['types'].buckets == []
+
+
+def test_search_result_lazy_hits():
+    class ProductDocument(Document):
+        __doc_type__ = 'product'
+
+        name = Field(types.Text)
+
+    class UserDocument(Document):
+        __doc_type__ = 'user'
+
+    raw_result = {
+        'hits': {
+            'total': 3,
+            'max_score': 1,
+            'hits': [
+                {
+                    '_id': '1', '_type': 'product', '_index': 'test',
+                    '_score': 1, '_source': {'name': 'Phone'},
+                },
+                {'_id': '2', '_type': 'user', '_index': 'test', '_score': 1},
+                {
+                    '_id': '3', '_type': 'product', '_index': 'test',
+                    '_score': 1, '_source': {'name': 'Tablet'},
+                },
+            ]
+        }
+    }
+    product_mapper = Mock(return_value={'1': 'phone', '3': 'tablet'})
+    res = SearchResult(
+        raw_result,
+        doc_cls_map={'product': ProductDocument, 'user': UserDocument},
+        instance_mapper={ProductDocument: product_mapper},
+    )
+    assert res.total == 3
+    assert len(res.hits) == 3
+    assert res.hits.raw is raw_result['hits']['hits']
+    assert res.hits._docs == [None, None, None]
+
+    doc = res.hits[-1]
+    assert isinstance(doc, ProductDocument)
+    assert doc._id == '3'
+    assert doc.name == 'Tablet'
+    assert res.hits[2] is doc
+    assert res.hits._docs[:2] == [None, None]
+    with pytest.raises(IndexError):
+        res.hits[3]
+
+    assert doc.instance == 'tablet'
+    product_mapper.assert_called_once_with(['1', '3'])
+    assert res.hits._docs[1] is None
+
+    assert [d._id for d in res.hits[:2]] == ['1', '2']
+    assert isinstance(res.hits[1], UserDocument)
+    assert res.hits[0].instance == 'phone'
+    assert list(res) == res.hits
+    assert res.hits == list(res.hits)
+    assert res.hits != []
+    assert SearchResult({}).hits == []
+
+
+def test_search_result_hits_list_api():
+    def make_result(ids):
+        return SearchResult(
+            {
+                'hits': {
+                    'hits': [
+                        {'_id': _id, '_type': 'product', '_source': {}}
+                        for _id in ids
+                    ]
+                }
+            }
+        )
+
+    hits = make_result(['2', '3', '1']).hits
+    assert isinstance(hits, list)
+    assert hits._docs == [None, None, None]
+    other_hits = make_result(['4']).hits
+    assert [d._id for d in hits + other_hits] == ['2', '3', '1', '4']
+    assert [d._id for d in [] + hits] == ['2', '3', '1']
+    assert hits._docs is None
+    assert other_hits._docs is None
+
+    hits = make_result(['2', '3', '1']).hits
+    hits.sort(key=lambda d: d._id)
+    assert [d._id for d in hits] == ['1', '2', '3']
+    hits.append(other_hits[0])
+    assert len(hits) == 4
+    assert hits[-1]._id == '4'
+    assert [d._id for d in hits[1:3]] == ['2', '3']
+    assert hits.index(other_hits[0]) == 3
+    assert list(reversed(hits))[0]._id == '4'
+    del hits[0]
+    assert [d._id for d in hits] == ['2', '3', '4']
+    assert hits == list(hits)
+    assert [d._id for d in copy.copy(hits)] == ['2', '3', '4']
+    assert hits.raw[0]['_id'] == '2'
+
+    hits = make_result(['1', '2']).hits
+    ids = []
+    for doc in hits:
+        ids.append(doc._id)
+        if doc._id == '1':
+            hits.extend(other_hits)
+    assert ids == ['1', '2', '4']
+
+
+class OrderDocument(Document):
+    __doc_type__ = 'order'
+
+    status = Field(types.Integer)
+    price = Field(types.Float)
+    paid = Field(types.Boolean)
+    created_at = Field(types.Date)
+    comment = Field(types.String)
+    tags = Field(types.List(types.Integer))
+
+
+ORDERS_RAW_RESULT = {
+    'hits': {
+        'total': 3,
+        'max_score': 1,
+        'hits': [
+            {
+                '_id': '1', '_type': 'order', '_index': 'test', '_score': 1,
+                '_source': {
+                    'status': 1,
+                    'price': 10,
+                    'paid': True,
+                    'created_at': '2020-01-01T00:00:01Z',
+                    'comment': 'Fast',
+                    'tags': [1, 2],
+                },
+            },
+            {
+                '_id': '2', '_type': 'order', '_index': 'test', '_score': 0.5,
+                '_source': {
+                    'status': [2],
+                    'created_at': 1577836800000,
+                },
+                'fields': {'price': [1.5]},
+            },
+            {
+                '_id': '3', '_type': 'order', '_index': 'test',
+                '_source': {'paid': 'false'},
+            },
+        ]
+    }
+}
+
+
+def test_search_result_to_columns():
+    res = SearchResult(
+        ORDERS_RAW_RESULT, doc_cls_map={'order': OrderDocument}
+    )
+    columns = res.to_columns()
+    assert list(columns) == [
+        'status', 'price', 'paid', 'created_at', 'comment', 'tags'
+    ]
+    assert columns['status'] == (
+        array(INT64_TYPECODE, [1, 2, 0]), array('B', [0, 0, 1])
+    )
+    assert columns['price'] == (
+        array('d', [10.0, 1.5, 0.0]), array('B', [0, 0, 1])
+    )
+    assert columns['paid'] == (
+        array('b', [1, 0, 0]), array('B', [0, 1, 0])
+    )
+    assert columns['created_at'] == (
+        array(INT64_TYPECODE, [1577836801000, 1577836800000, 0]),
+        array('B', [0, 0, 1])
+    )
+    assert columns['comment'] == (['Fast', None, None], array('B', [0, 1, 1]))
+    assert columns['tags'] == ([[1, 2], None, None], array('B', [0, 1, 1]))
+
+    columns = res.to_columns(
+        [OrderDocument._id, OrderDocument._score, 'price', 'unknown']
+    )
+    assert columns['_id'] == (['1', '2', '3'], array('B', [0, 0, 0]))
+    assert columns['_score'] == (
+        array('d', [1.0, 0.5, 0.0]), array('B', [0, 0, 1])
+    )
+    assert columns['price'].values == array('d', [10.0, 1.5, 0.0])
+    assert columns['unknown'] == ([None, None, None], array('B', [1, 1, 1]))
+
+    assert res.hits._docs == [None, None, None]
+
+    with pytest.raises(ValueError):
+        SearchResult(ORDERS_RAW_RESULT).to_columns()
+
+
+def test_search_result_to_numpy_columns():
+    numpy = pytest.importorskip('numpy')
+
+    res = SearchResult(
+        ORDERS_RAW_RESULT, doc_cls_map={'order': OrderDocument}
+    )
+    columns = res.to_columns(use_numpy=True)
+    assert columns['status'].dtype == numpy.int64
+    assert columns['status'].tolist() == [1, 2, None]
+    assert columns['price'].dtype == numpy.float64
+    assert columns['price'].tolist() == [10.0, 1.5, None]
+    assert columns['paid'].dtype == numpy.bool_
+    assert columns['paid'].tolist() == [True, None, False]
+    assert columns['created_at'].dtype == numpy.dtype('datetime64[ms]')
+    assert columns['created_at'][0] == numpy.datetime64('2020-01-01T00:00:01')
+    assert columns['created_at'].mask.tolist() == [False, False, True]
+    assert columns['comment'].dtype == object
+    assert columns['tags'][0] == [1, 2]
+    assert columns['tags'].mask.tolist() == [False, True, True]
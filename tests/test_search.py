@@ -1,13 +1,16 @@
 import datetime
+import time
 import warnings
 from mock import Mock
 
 from elasticmagic import (
-    Document, DynamicDocument,
-    SearchQuery, Params, Term, MultiMatch,
+    Cluster, Document, DynamicDocument,
+    SearchQuery, Params, Param, Term, MultiMatch,
     FunctionScore, Sort, QueryRescorer, agg
 )
-from elasticmagic.compiler import Compiler_5_0, Compiler_7_0
+from elasticmagic.compiler import CompilationError
+from elasticmagic.compiler import Compiler_2_0, Compiler_5_0, Compiler_7_0
+from elasticmagic.compiler import with_compiled_cache
 from elasticmagic.search import FunctionScoreSettings
 from elasticmagic.function import FieldValueFactor, Weight
 from elasticmagic.util import collect_doc_classes
@@ -1407,6 +1410,244 @@ class SearchQueryTest(BaseTestCase):
         self.assertEqual(result.scroll_id, 'c2Nhbjs2OzM0NDg1ODpzRlBLc0FXNlNyNm5JWUc1')
         self.assertEqual(list(result), [])
 
+    def _mock_scroll_pages(self, *pages):
+        def raw_page(scroll_id, ids):
+            return {
+                '_scroll_id': scroll_id,
+                'hits': {
+                    'total': 3,
+                    'max_score': 0,
+                    'hits': [
+                        {
+                            '_id': str(_id),
+                            '_type': 'product',
+                            '_index': 'test',
+                            '_source': {'name': 'product {}'.format(_id)},
+                        }
+                        for _id in ids
+                    ]
+                },
+            }
+        raw_pages = [raw_page(scroll_id, ids) for scroll_id, ids in pages]
+        self.client.search = Mock(return_value=raw_pages[0])
+        self.client.scroll = Mock(side_effect=raw_pages[1:])
+        self.client.clear_scroll = Mock(return_value={'succeeded': True})
+
+    def test_iter_scroll(self):
+        ProductDoc = self.index['product']
+        for prefetch in [0, 1, 2]:
+            self._mock_scroll_pages(
+                ('scroll1', [1, 2]), ('scroll2', [3]), ('scroll2', [])
+            )
+            sq = self.index.search_query(doc_cls=ProductDoc)
+            docs = list(sq.iter_scroll(size=2, prefetch=prefetch))
+
+            self.client.search.assert_called_once_with(
+                index='test',
+                doc_type='product',
+                body={'size': 2},
+                scroll='1m',
+            )
+            self.assertEqual(
+                [c[1] for c in self.client.scroll.call_args_list],
+                [
+                    {'scroll_id': 'scroll1', 'scroll': '1m'},
+                    {'scroll_id': 'scroll2', 'scroll': '1m'},
+                ]
+            )
+            self.client.clear_scroll.assert_called_once_with(
+                scroll_id='scroll2'
+            )
+            self.assertEqual([doc._id for doc in docs], ['1', '2', '3'])
+            self.assertIsInstance(docs[2], ProductDoc)
+            self.assertEqual(docs[2].name, 'product 3')
+
+    def test_iter_scroll_pages(self):
+        self._mock_scroll_pages(('scroll1', [1, 2]), ('scroll1', []))
+        sq = self.index.search_query(doc_cls=self.index['product'])
+        pages = list(sq.with_raw_hits().iter_scroll(scroll='5m', pages=True))
+
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(pages[0].total, 3)
+        self.assertEqual(
+            [hit['_id'] for hit in pages[0].hits], ['1', '2']
+        )
+        self.client.scroll.assert_called_once_with(
+            scroll_id='scroll1', scroll='5m'
+        )
+        self.client.clear_scroll.assert_called_once_with(scroll_id='scroll1')
+
+    def test_iter_scroll_close(self):
+        self._mock_scroll_pages(
+            ('scroll1', [1]), ('scroll2', [2]), ('scroll3', [3]),
+            ('scroll3', [])
+        )
+        sq = self.index.search_query(doc_cls=self.index['product'])
+        hits = sq.iter_scroll(prefetch=1)
+        self.assertEqual(next(hits)._id, '1')
+        self.assertEqual(next(hits)._id, '2')
+        hits.close()
+
+        self.assertLessEqual(self.client.scroll.call_count, 3)
+        last_scroll_id = self.client.scroll.call_args[1]['scroll_id']
+        self.client.clear_scroll.assert_called_once_with(
+            scroll_id={'scroll1': 'scroll2', 'scroll2': 'scroll3'}[
+                last_scroll_id
+            ]
+        )
+
+    def test_iter_scroll_error(self):
+        self._mock_scroll_pages(('scroll1', [1]))
+        self.client.scroll = Mock(side_effect=ValueError('expired'))
+        sq = self.index.search_query(doc_cls=self.index['product'])
+        hits = sq.iter_scroll()
+        self.assertEqual(next(hits)._id, '1')
+        self.assertRaises(ValueError, lambda: next(hits))
+        self.client.clear_scroll.assert_called_once_with(scroll_id='scroll1')
+
+    def test_iter_scroll_no_hits(self):
+        self._mock_scroll_pages(('scroll1', []))
+        sq = self.index.search_query(doc_cls=self.index['product'])
+        self.assertEqual(list(sq.iter_scroll()), [])
+        self.assertFalse(self.client.scroll.called)
+        self.client.clear_scroll.assert_called_once_with(scroll_id='scroll1')
+
+    def test_with_slice(self):
+        sq = SearchQuery().with_slice(1, 4)
+        self.assert_expression(
+            sq, {'slice': {'id': 1, 'max': 4}}, compiler=Compiler_7_0
+        )
+        self.assert_expression(
+            sq.with_slice(0, 2, field='date'),
+            {'slice': {'id': 0, 'max': 2, 'field': 'date'}},
+            compiler=Compiler_7_0
+        )
+        self.assert_expression(
+            sq.with_slice(None, None), {}, compiler=Compiler_7_0
+        )
+        with self.assertRaises(CompilationError):
+            sq.to_dict(compiler=Compiler_2_0)
+
+    def _mock_sliced_scroll(self, slice_pages, scroll_error=None):
+        def raw_page(scroll_id, ids):
+            return {
+                '_scroll_id': scroll_id,
+                'hits': {
+                    'total': len(ids),
+                    'hits': [
+                        {'_id': str(_id), '_type': 'product', '_source': {}}
+                        for _id in ids
+                    ]
+                },
+            }
+
+        def search(body, **kwargs):
+            slice_id = body['slice']['id']
+            self.assertEqual(body['slice']['max'], len(slice_pages))
+            return raw_page(
+                'slice{}-0'.format(slice_id), slice_pages[slice_id][0]
+            )
+
+        def scroll(scroll_id, scroll):
+            slice_id, page_ix = map(int, scroll_id[5:].split('-'))
+            if scroll_error is not None and slice_id == 1:
+                raise scroll_error
+            page_ix += 1
+            ids = []
+            if page_ix < len(slice_pages[slice_id]):
+                ids = slice_pages[slice_id][page_ix]
+            return raw_page('slice{}-{}'.format(slice_id, page_ix), ids)
+
+        self.client.search = Mock(side_effect=search)
+        self.client.scroll = Mock(side_effect=scroll)
+        self.client.clear_scroll = Mock(return_value={'succeeded': True})
+
+    def _cleared_scroll_ids(self):
+        return sorted(
+            c[1]['scroll_id'] for c in self.client.clear_scroll.call_args_list
+        )
+
+    def test_iter_sliced_scroll(self):
+        self._mock_sliced_scroll([[[1, 2], [3]], [[4]], [[]]])
+        sq = self.index.search_query(doc_cls=self.index['product'])
+
+        docs = list(sq.iter_sliced_scroll(3, size=2))
+        self.assertEqual(
+            sorted(doc._id for doc in docs), ['1', '2', '3', '4']
+        )
+        self.assertIsInstance(docs[0], self.index['product'])
+        ids = [doc._id for doc in docs]
+        self.assertLess(ids.index('1'), ids.index('2'))
+        self.assertLess(ids.index('2'), ids.index('3'))
+        self.assertEqual(self.client.search.call_count, 3)
+        self.assertEqual(
+            self._cleared_scroll_ids(),
+            ['slice0-2', 'slice1-1', 'slice2-0']
+        )
+
+    def test_iter_sliced_scroll_callback(self):
+        self._mock_sliced_scroll([[[1, 2], [3]], [[4]]])
+        sq = self.index.search_query(doc_cls=self.index['product'])
+        slice_pages = {0: [], 1: []}
+
+        def collect(slice_id, page):
+            slice_pages[slice_id].append([doc._id for doc in page])
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            self.assertIsNone(
+                sq.iter_sliced_scroll(2, executor=executor, callback=collect)
+            )
+        self.assertEqual(slice_pages, {0: [['1', '2'], ['3']], 1: [['4']]})
+        self.assertEqual(
+            self._cleared_scroll_ids(), ['slice0-2', 'slice1-1']
+        )
+
+    def test_iter_sliced_scroll_close(self):
+        self._mock_sliced_scroll([[[1], [2], [3]], [[4], [5], [6]]])
+        sq = self.index.search_query(doc_cls=self.index['product'])
+
+        pages = sq.iter_sliced_scroll(2, pages=True)
+        self.assertEqual(len(next(pages).hits), 1)
+        pages.close()
+        cleared_scroll_ids = self._cleared_scroll_ids()
+        self.assertEqual(len(cleared_scroll_ids), 2)
+        self.assertTrue(cleared_scroll_ids[0].startswith('slice0-'))
+        self.assertTrue(cleared_scroll_ids[1].startswith('slice1-'))
+
+    def test_iter_sliced_scroll_error(self):
+        self._mock_sliced_scroll(
+            [[[1], [2]], [[3], [4]]], scroll_error=ValueError('expired')
+        )
+        sq = self.index.search_query(doc_cls=self.index['product'])
+
+        with self.assertRaises(ValueError):
+            list(sq.iter_sliced_scroll(2))
+        self.assertEqual(len(self._cleared_scroll_ids()), 2)
+
+        with self.assertRaises(ValueError):
+            sq.iter_sliced_scroll(2, callback=lambda slice_id, page: None)
+
+    def test_iter_sliced_scroll_error_waits_slices(self):
+        self._mock_sliced_scroll(
+            [[[1]], [[2], [3]], [[4], [5], [6]]],
+            scroll_error=ValueError('expired')
+        )
+        sq = self.index.search_query(doc_cls=self.index['product'])
+
+        def slow_callback(slice_id, page):
+            if slice_id == 2:
+                time.sleep(0.05)
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            with self.assertRaises(ValueError):
+                sq.iter_sliced_scroll(
+                    3, executor=executor, callback=slow_callback
+                )
+            # the failed slice does not leave the others running
+            self.assertEqual(len(self._cleared_scroll_ids()), 3)
+
     def test_delete(self):
         self.index.query(self.index['car'].vendor == 'Focus').delete()
         self.client.delete_by_query.assert_called_with(
@@ -1631,3 +1872,358 @@ class SearchQueryTest(BaseTestCase):
             {},
             compiler=Compiler_7_0,
         )
+
+
+    def test_builder(self):
+        sq = self.index.search_query(self.index['car'].name.match('test'))
+        builder = sq.builder()
+        self.assertIsNot(builder, sq)
+        self.assertIs(
+            builder.filter(self.index['car'].status == 0), builder
+        )
+        ctx = builder.get_context()
+        self.assertIs(
+            builder
+            .post_filter(self.index['car'].vendor == 'Subaru')
+            .aggregations(vendors=agg.Terms(self.index['car'].vendor))
+            .order_by(self.index['car'].price)
+            .limit(10),
+            builder
+        )
+        self.assertEqual(len(ctx.post_filters), 0)
+        self.assertEqual(
+            [doc_cls.get_doc_type() for doc_cls in ctx.doc_classes], ['car']
+        )
+
+        # a clone of the builder is not changed in place
+        branch = builder.clone()
+        self.assertIsNot(branch.limit(5), branch)
+        self.assertEqual(branch.get_context().limit, 10)
+
+        search_query = builder.build()
+        self.assertIs(search_query, builder)
+        self.assertIsNot(search_query.limit(20), search_query)
+        self.assert_expression(sq, {'query': {'match': {'name': 'test'}}})
+        self.assert_expression(
+            search_query,
+            {
+                "query": {
+                    "bool": {
+                        "must": {"match": {"name": "test"}},
+                        "filter": {"term": {"status": 0}}
+                    }
+                },
+                "post_filter": {"term": {"vendor": "Subaru"}},
+                "aggregations": {
+                    "vendors": {"terms": {"field": "vendor"}}
+                },
+                "sort": ["price"],
+                "size": 10
+            }
+        )
+
+    def test_with_point_in_time(self):
+        sq = SearchQuery().with_point_in_time('pit1', keep_alive='1m')
+        self.assert_expression(
+            sq, {'pit': {'id': 'pit1', 'keep_alive': '1m'}},
+            compiler=Compiler_7_0
+        )
+        self.assert_expression(
+            sq.with_point_in_time(None), {}, compiler=Compiler_7_0
+        )
+        with self.assertRaises(CompilationError):
+            sq.to_dict(compiler=Compiler_5_0)
+
+        compiler = with_compiled_cache(Compiler_7_0)
+        self.assertEqual(
+            compiler.compiled_query(sq).body,
+            {'pit': {'id': 'pit1', 'keep_alive': '1m'}}
+        )
+        self.assertEqual(
+            compiler.compiled_query(sq.with_point_in_time('pit2')).body,
+            {'pit': {'id': 'pit2'}}
+        )
+        self.assertEqual(
+            compiler.compiled_query(
+                sq.with_point_in_time('pit3', keep_alive='1m')
+            ).body,
+            {'pit': {'id': 'pit3', 'keep_alive': '1m'}}
+        )
+
+    def _mock_search_after(self, ids, pit_ids=None):
+        def search(body, **kwargs):
+            search_after = body.get('search_after')
+            start = ids.index(search_after[1]) + 1 if search_after else 0
+            page_ids = ids[start:start + body['size']]
+            raw_result = {
+                'hits': {
+                    'total': len(ids),
+                    'hits': [
+                        {
+                            '_id': str(_id),
+                            '_type': 'product',
+                            '_source': {'rank': 1, 'id': _id},
+                            'sort': [1, _id],
+                        }
+                        for _id in page_ids
+                    ]
+                }
+            }
+            if pit_ids:
+                raw_result['pit_id'] = pit_ids.pop(0)
+            return raw_result
+
+        self.client.search = Mock(side_effect=search)
+        self.client.open_point_in_time = Mock(return_value={'id': 'pit0'})
+        self.client.close_point_in_time = Mock(
+            return_value={'succeeded': True, 'num_freed': 1}
+        )
+
+    def test_iter_search_after(self):
+        self._mock_search_after([1, 2, 3, 4])
+        ProductDoc = self.index['product']
+        sq = (
+            self.index.search_query(doc_cls=ProductDoc)
+            .order_by(ProductDoc.rank.desc())
+        )
+
+        docs = list(sq.iter_search_after(2, ProductDoc.id))
+        self.assertEqual([doc._id for doc in docs], ['1', '2', '3', '4'])
+        self.assertEqual(
+            [c[1] for c in self.client.search.call_args_list],
+            [
+                {
+                    'index': 'test',
+                    'doc_type': 'product',
+                    'body': {
+                        'sort': [{'rank': 'desc'}, 'id'],
+                        'size': 2,
+                    },
+                },
+                {
+                    'index': 'test',
+                    'doc_type': 'product',
+                    'body': {
+                        'sort': [{'rank': 'desc'}, 'id'],
+                        'size': 2,
+                        'search_after': (1, 2),
+                    },
+                },
+                {
+                    'index': 'test',
+                    'doc_type': 'product',
+                    'body': {
+                        'sort': [{'rank': 'desc'}, 'id'],
+                        'size': 2,
+                        'search_after': (1, 4),
+                    },
+                },
+            ]
+        )
+        self.assertFalse(self.client.open_point_in_time.called)
+
+        self._mock_search_after([1, 2, 3])
+        sq = sq.order_by(ProductDoc.id.asc())
+        pages = list(
+            sq.with_raw_hits().iter_search_after(2, ProductDoc.id, pages=True)
+        )
+        self.assertEqual(
+            [[hit['_id'] for hit in page.hits] for page in pages],
+            [['1', '2'], ['3']]
+        )
+        self.assertEqual(self.client.search.call_count, 2)
+        self.assertEqual(
+            self.client.search.call_args[1]['body']['sort'],
+            [{'rank': 'desc'}, {'id': 'asc'}]
+        )
+
+    def test_iter_search_after_point_in_time(self):
+        self._mock_search_after([1, 2, 3], pit_ids=['pit1', 'pit2'])
+        cluster = Cluster(self.client, compiler=Compiler_7_0)
+        ProductDoc = cluster['test']['product']
+        sq = cluster['test'].search_query(doc_cls=ProductDoc)
+
+        docs = list(sq.iter_search_after(2, '_shard_doc', pit_keep_alive='1m'))
+        self.assertEqual([doc._id for doc in docs], ['1', '2', '3'])
+        self.client.open_point_in_time.assert_called_once_with(
+            index='test', keep_alive='1m'
+        )
+        self.assertEqual(
+            [c[1] for c in self.client.search.call_args_list],
+            [
+                {
+                    'body': {
+                        'sort': ['_shard_doc'],
+                        'size': 2,
+                        'pit': {'id': 'pit0', 'keep_alive': '1m'},
+                    },
+                },
+                {
+                    'body': {
+                        'sort': ['_shard_doc'],
+                        'size': 2,
+                        'pit': {'id': 'pit1', 'keep_alive': '1m'},
+                        'search_after': (1, 2),
+                    },
+                },
+            ]
+        )
+        self.client.close_point_in_time.assert_called_once_with(
+            body={'id': 'pit2'}
+        )
+
+        self._mock_search_after([1, 2, 3])
+        hits = sq.iter_search_after(2, '_shard_doc', pit_keep_alive='1m')
+        self.assertEqual(next(hits)._id, '1')
+        hits.close()
+        self.client.close_point_in_time.assert_called_once_with(
+            body={'id': 'pit0'}
+        )
+
+
+class PreparedSearchQueryTest(BaseTestCase):
+    def setUp(self):
+        super(PreparedSearchQueryTest, self).setUp()
+        self.client.search = Mock(
+            return_value={
+                'hits': {
+                    'hits': [
+                        {
+                            '_id': '1',
+                            '_type': 'user',
+                            '_score': None,
+                            '_source': {'group_id': 1},
+                        }
+                    ],
+                    'max_score': None,
+                    'total': 1,
+                }
+            }
+        )
+
+    def test_prepare(self):
+        class UserDocument(Document):
+            __doc_type__ = 'user'
+
+            group_id = Field(Integer)
+            rank = Field(Float)
+
+        prepared_sq = (
+            self.index.search_query()
+            .filter(
+                UserDocument.group_id == Param('group_id'),
+                UserDocument.rank.range(gte=Param('min_rank')),
+            )
+            .order_by(UserDocument.rank.desc())
+            .limit(Param('size'))
+            .with_search_params(routing=1)
+            .prepare()
+        )
+        self.assertIsNone(prepared_sq.template_id)
+        self.assertEqual(
+            prepared_sq.param_names, {'group_id', 'min_rank', 'size'}
+        )
+        self.assertEqual(
+            prepared_sq.to_dict(group_id=1, min_rank=0.5, size=10),
+            {
+                'query': {
+                    'bool': {
+                        'filter': [
+                            {'term': {'group_id': 1}},
+                            {'range': {'rank': {'gte': 0.5}}},
+                        ]
+                    }
+                },
+                'sort': [{'rank': 'desc'}],
+                'size': 10,
+            }
+        )
+
+        sr = prepared_sq.execute(group_id=2, min_rank=1, size=1)
+        self.client.search.assert_called_once_with(
+            index='test',
+            doc_type='user',
+            routing=1,
+            body={
+                'query': {
+                    'bool': {
+                        'filter': [
+                            {'term': {'group_id': 2}},
+                            {'range': {'rank': {'gte': 1}}},
+                        ]
+                    }
+                },
+                'sort': [{'rank': 'desc'}],
+                'size': 1,
+            }
+        )
+        self.assertEqual(len(sr.hits), 1)
+        self.assertIsInstance(sr.hits[0], UserDocument)
+        self.assertEqual(sr.hits[0].group_id, 1)
+
+        with self.assertRaises(ValueError):
+            prepared_sq.execute(group_id=2, min_rank=1)
+        with self.assertRaises(ValueError):
+            prepared_sq.execute(group_id=2, min_rank=1, size=1, offset=1)
+
+    def test_prepare_unsupported_param(self):
+        class QuestionDocument(Document):
+            __doc_type__ = 'question'
+
+        class AnswerDocument(Document):
+            __doc_type__ = 'answer'
+            __parent__ = QuestionDocument
+
+        sq = SearchQuery(AnswerDocument._id == Param('id'))
+        with self.assertRaises(CompilationError):
+            Compiler_7_0.compiled_prepared_query(sq)
+
+    def test_prepare_search_template(self):
+        cluster = Cluster(self.client, compiler=Compiler_7_0)
+        self.client.put_script = Mock(return_value={'acknowledged': True})
+        self.client.search_template = self.client.search
+
+        class UserDocument(Document):
+            __doc_type__ = 'user'
+
+            name = Field(String)
+            status = Field(Integer)
+
+        prepared_sq = (
+            cluster['test'].search_query(
+                UserDocument.name.match(Param('name'))
+            )
+            .filter(UserDocument.status.in_(Param('statuses')))
+            .prepare(template_id='search_users')
+        )
+        self.assertEqual(prepared_sq.template_id, 'search_users')
+        self.client.put_script.assert_called_once_with(
+            id='search_users',
+            body={
+                'script': {
+                    'lang': 'mustache',
+                    'source': (
+                        '{"query":{"bool":{'
+                        '"must":{"match":{"name":'
+                        '{{#toJson}}name{{/toJson}}}},'
+                        '"filter":{"terms":{"status":'
+                        '{{#toJson}}statuses{{/toJson}}}}}}}'
+                    )
+                }
+            }
+        )
+
+        prepared_sq.execute(name='Alex', statuses=[0, 1])
+        self.client.search_template.assert_called_once_with(
+            index='test',
+            body={
+                'id': 'search_users',
+                'params': {'name': 'Alex', 'statuses': [0, 1]},
+            }
+        )
+
+        with self.assertRaises(CompilationError):
+            Compiler_5_0.compiled_prepared_query(
+                SearchQuery(UserDocument.name == Param('name')),
+                template_id='search_users'
+            )
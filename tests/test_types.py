@@ -2,11 +2,14 @@ import binascii
 import datetime
 import unittest
 
+import dateutil.tz
+
 import pytest
 
 from elasticmagic.compat import PY2
 from elasticmagic.compiler import Compiler_5_0
 from elasticmagic.document import DynamicDocument
+from elasticmagic.expression import Field
 from elasticmagic.types import (
     Type, String, Byte, Short, Integer, Long, Float, Double, Date, Boolean,
     Binary, Ip, Object, List, GeoPoint, Completion, ValidationError,
@@ -127,6 +130,69 @@ def test_date():
         datetime.datetime(2009, 11, 15, 14, 12, 12)
 
 
+def test_date_fast_path():
+    t = Date()
+    assert t.to_python('2009-11-15') == datetime.datetime(2009, 11, 15)
+    assert t.to_python('2009-11-15T14:12:12.123Z') == \
+        datetime.datetime(
+            2009, 11, 15, 14, 12, 12, 123000, dateutil.tz.tzutc()
+        )
+    assert t.to_python('2009-11-15T14:12:12.1234567+02:00') == \
+        datetime.datetime(
+            2009, 11, 15, 14, 12, 12, 123456,
+            dateutil.tz.tzoffset(None, 7200)
+        )
+    assert t.to_python('2009-11-15T14:12:12-0530').utcoffset() == \
+        -datetime.timedelta(hours=5, minutes=30)
+    assert t.to_python(1258294332000) == \
+        datetime.datetime(2009, 11, 15, 14, 12, 12, tzinfo=dateutil.tz.tzutc())
+    # falls back to dateutil
+    assert t.to_python('Nov 15 2009') == datetime.datetime(2009, 11, 15)
+    with pytest.raises(ValueError):
+        t.to_python('2009-13-15')
+
+    t = Date(format='dd.MM.yyyy HH:mm||epoch_second')
+    assert t.to_python('15.11.2009 14:12') == \
+        datetime.datetime(2009, 11, 15, 14, 12)
+    assert t.to_python('1258294332') == \
+        datetime.datetime(2009, 11, 15, 14, 12, 12, tzinfo=dateutil.tz.tzutc())
+    assert t.to_python('2009-11-15') == datetime.datetime(2009, 11, 15)
+    assert t.get_mapping_options() == {
+        'format': 'dd.MM.yyyy HH:mm||epoch_second'
+    }
+
+    t = Date(format="yyyy-MM-dd'T'HH:mm:ss.SSS||strict_date")
+    assert t.to_python('2009-11-15T14:12:12.123') == \
+        datetime.datetime(2009, 11, 15, 14, 12, 12, 123000)
+    assert t.to_python('2009-11-15') == datetime.datetime(2009, 11, 15)
+
+
+def test_date_cache():
+    t = Date(cache_size=2)
+    dt = t.to_python('2009-11-15')
+    assert t.to_python('2009-11-15') is dt
+    t.to_python('2009-11-16')
+    t.to_python('2009-11-17')
+    assert len(t._cache) <= 2
+    assert t.to_python('2009-11-15') == dt
+
+
+def test_date_format_from_field():
+    field = Field('created_at', Date, format='dd.MM.yyyy')
+    assert field.get_type().format == 'dd.MM.yyyy'
+    assert field.get_type().to_python('15.11.2009') == \
+        datetime.datetime(2009, 11, 15)
+    field = Field('dates', List(Date), format='dd.MM.yyyy')
+    assert field.get_type().sub_type.format == 'dd.MM.yyyy'
+    assert field.get_type().to_python('15.11.2009') == \
+        [datetime.datetime(2009, 11, 15)]
+
+    field = Field('created_at', Date(format='dd.MM.yyyy', cache_size=10))
+    assert field.to_mapping(Compiler_5_0) == {
+        'created_at': {'type': 'date', 'format': 'dd.MM.yyyy'}
+    }
+
+
 def test_boolean():
     t = Boolean()
     assert t.to_python(None) is None
@@ -1,9 +1,16 @@
+import asyncio
+import json
+
+from elasticsearch import TransportError
+
 import pytest
 
 from elasticmagic.actions import Create
 from elasticmagic.actions import Delete
 from elasticmagic.actions import Index
 from elasticmagic.actions import Update
+from elasticmagic.compiler import Compiler_7_0
+from elasticmagic.ext.asyncio.cluster import AsyncCluster
 
 from .conftest import Car
 
@@ -72,3 +79,177 @@ async def test_bulk_create_params(es_index):
     assert doc._routing == '2'
     assert doc._version == 1
     assert doc.name == 'Doc Hudson'
+
+
+@pytest.mark.asyncio
+async def test_bulk_stream(es_index):
+    async def gen_actions():
+        for i in range(1, 11):
+            yield Index(Car(_id=i, name='Car {}'.format(i)))
+        yield Create(Car(_id=1, name='Duplicate'))
+
+    results = {}
+    async for action, res in es_index.bulk_stream(
+            gen_actions(), chunk_size=3, max_in_flight=2, refresh=True
+    ):
+        results[(action.__action_name__, res._id)] = res.status
+
+    assert len(results) == 11
+    assert results[('create', '1')] == 409
+    assert all(
+        status == 201
+        for (name, _id), status in results.items() if name == 'index'
+    )
+    assert (await es_index.count()).count == 10
+
+
+class BulkClient(object):
+    """Answers bulk requests with statuses from ``statuses`` by document id,
+    each status is consumed by one request. Requests fail with errors from
+    ``errors`` while there are any.
+    """
+
+    def __init__(self, delay=0):
+        self.statuses = {}
+        self.errors = []
+        self.bodies = []
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def bulk(self, body, **params):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        if self.errors:
+            raise self.errors.pop(0)
+        lines = [
+            json.loads(line) for line in body.decode('utf-8').splitlines()
+        ]
+        self.bodies.append(lines)
+        items = []
+        for line in lines:
+            name, meta = next(iter(line.items()))
+            if name not in ('index', 'create', 'update', 'delete'):
+                continue
+            _id = str(meta['_id'])
+            statuses = self.statuses.get(_id)
+            status = statuses.pop(0) if statuses else 201
+            item = {
+                '_index': 'test', '_type': '_doc', '_id': _id,
+                'status': status,
+            }
+            if status >= 400:
+                item['error'] = {'type': 'rejected', 'reason': 'rejected'}
+            items.append({name: item})
+        return {'took': 1, 'errors': False, 'items': items}
+
+
+def _bulk_cluster(client):
+    return AsyncCluster(client, compiler=Compiler_7_0)
+
+
+def _index_actions(n):
+    return [
+        Index(Car(_id=str(i), name='Car {}'.format(i))) for i in range(n)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_stream_retry():
+    client = BulkClient()
+    client.statuses = {'1': [429, 503], '2': [400], '3': [429, 429, 429]}
+    results = [
+        (action.doc._id, res.status)
+        async for action, res in _bulk_cluster(client).bulk_stream(
+            _index_actions(4), max_retries=2, initial_backoff=0.001
+        )
+    ]
+
+    assert results == [('0', 201), ('1', 201), ('2', 400), ('3', 429)]
+    assert [
+        [line['index']['_id'] for line in body if 'index' in line]
+        for body in client.bodies
+    ] == [['0', '1', '2', '3'], ['1', '3'], ['1', '3']]
+
+
+@pytest.mark.asyncio
+async def test_bulk_stream_retry_rejected_request():
+    client = BulkClient()
+    client.errors = [
+        TransportError(429, 'es_rejected_execution_exception'),
+        TransportError(503, 'unavailable'),
+    ]
+    results = [
+        (action.doc._id, res.status)
+        async for action, res in _bulk_cluster(client).bulk_stream(
+            _index_actions(2), max_retries=2, initial_backoff=0.001
+        )
+    ]
+    assert results == [('0', 201), ('1', 201)]
+    assert len(client.bodies) == 1
+
+    client.errors = [TransportError(429, 'rejected') for _ in range(3)]
+    with pytest.raises(TransportError):
+        async for _ in _bulk_cluster(client).bulk_stream(
+                _index_actions(2), max_retries=2, initial_backoff=0.001
+        ):
+            pass
+    assert client.errors == []
+
+    client.errors = [TransportError(400, 'bad_request')]
+    with pytest.raises(TransportError):
+        async for _ in _bulk_cluster(client).bulk_stream(_index_actions(2)):
+            pass
+    assert len(client.bodies) == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_stream_backpressure():
+    client = BulkClient(delay=0.01)
+    read_actions = []
+
+    async def gen_actions():
+        for action in _index_actions(20):
+            read_actions.append(action)
+            yield action
+
+    stream = _bulk_cluster(client).bulk_stream(
+        gen_actions(), chunk_size=2, max_in_flight=3
+    ).__aiter__()
+    await stream.__anext__()
+    # the consumer is slow
+    await asyncio.sleep(0.1)
+    # 3 chunks in flight and an action waiting for a free slot
+    assert len(read_actions) == 7
+    results = [(action, res) async for action, res in stream]
+    assert len(results) == 19
+    assert len(read_actions) == 20
+    assert client.max_in_flight == 3
+
+
+@pytest.mark.asyncio
+async def test_bulk_stream_order():
+    client = BulkClient(delay=0.001)
+    actions = _index_actions(10)
+    results = [
+        action
+        async for action, res in _bulk_cluster(client).bulk_stream(
+            actions, chunk_size=3, max_in_flight=1
+        )
+    ]
+    assert results == actions
+
+    results = [
+        (action, res)
+        async for action, res in _bulk_cluster(client).bulk_stream(
+            actions, chunk_size=3, max_in_flight=4
+        )
+    ]
+    assert sorted(action.doc._id for action, _ in results) == [
+        str(i) for i in range(10)
+    ]
+    assert all(action.doc._id == res._id for action, res in results)
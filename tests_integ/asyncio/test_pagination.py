@@ -2,8 +2,12 @@ import pytest
 
 from .conftest import Car
 
+from elasticmagic.ext.asyncio.pagination import AsyncCursorSearchQueryWrapper
 from elasticmagic.ext.asyncio.pagination import AsyncSearchQueryWrapper
+from elasticmagic.ext.asyncio.pagination.flask import AsyncCursorPagination
 from elasticmagic.ext.asyncio.pagination.flask import AsyncPagination
+from elasticmagic.ext.pagination.cursor import CursorSigner
+from elasticmagic.ext.pagination.cursor import InvalidCursor
 
 
 @pytest.mark.asyncio
@@ -101,3 +105,74 @@ async def test_flask_pagination_max_items(es_index, all_cars):
     assert p.has_next is False
     assert p.has_prev is True
     assert list(p.iter_pages()) == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_cursor_search_query_wrapper(es_index, all_cars):
+    sq = es_index.search_query(doc_cls=Car)
+
+    wrapped_sq = AsyncCursorSearchQueryWrapper(
+        sq, Car.number, 'secret', per_page=5, track_total_hits=True
+    )
+
+    with pytest.raises(ValueError):
+        list(wrapped_sq)
+
+    with pytest.raises(ValueError):
+        await wrapped_sq.get_result()
+
+    hits = await wrapped_sq.get_page()
+    assert [doc.number for doc in hits] == [1, 2, 3, 4, 5]
+    assert [doc.number for doc in wrapped_sq] == [1, 2, 3, 4, 5]
+    assert wrapped_sq.count == 11
+    assert wrapped_sq.has_prev is False
+    assert wrapped_sq.has_next is True
+    assert len((await wrapped_sq.get_result()).hits) == 6
+
+    with pytest.raises(InvalidCursor):
+        await wrapped_sq.get_page(CursorSigner('other').dumps('n', [5]))
+
+
+@pytest.mark.asyncio
+async def test_flask_cursor_pagination(es_index, all_cars):
+    sq = es_index.search_query(doc_cls=Car)
+    p = await AsyncCursorPagination.create(
+        sq, Car.number, 'secret', per_page=5
+    )
+
+    assert [doc.number for doc in p.items] == [1, 2, 3, 4, 5]
+    assert p.total is None
+    assert p.has_prev is False
+    assert p.prev_cursor is None
+    assert p.has_next is True
+
+    p2 = await p.next()
+    assert [doc.number for doc in p2.items] == [6, 7, 8, 9, 10]
+    assert p2.has_prev is True
+    assert p2.has_next is True
+
+    p3 = await p2.next()
+    assert [doc.number for doc in p3.items] == [11]
+    assert p3.has_prev is True
+    assert p3.has_next is False
+    assert p3.next_cursor is None
+
+    p2 = await p3.prev()
+    assert [doc.number for doc in p2.items] == [6, 7, 8, 9, 10]
+    assert p2.has_prev is True
+    assert p2.has_next is True
+
+    p1 = await p2.prev()
+    assert [doc.number for doc in p1.items] == [1, 2, 3, 4, 5]
+    assert p1.has_prev is False
+    assert p1.has_next is True
+
+    p = await AsyncCursorPagination.create(
+        sq.order_by(Car.number.desc()), Car.number, 'secret', per_page=5,
+        track_total_hits=True,
+    )
+    assert [doc.number for doc in p.items] == [11, 10, 9, 8, 7]
+    assert p.total == 11
+    p2 = await p.next()
+    assert [doc.number for doc in p2.items] == [6, 5, 4, 3, 2]
+    assert p2.total == 11
@@ -1,5 +1,7 @@
 import pytest
 
+from elasticmagic import Param
+
 from .conftest import Car
 
 
@@ -110,3 +112,66 @@ async def test_scroll(es_index, all_cars):
     assert len(res.hits) == 1
 
     await es_index.clear_scroll(scroll_id=res.scroll_id)
+
+
+@pytest.mark.asyncio
+async def test_iter_scroll(es_index, all_cars):
+    sq = es_index.search_query(doc_cls=Car)
+
+    docs = [doc async for doc in sq.iter_scroll(size=5)]
+    assert len(docs) == 11
+    assert all(isinstance(doc, Car) for doc in docs)
+
+    pages = [
+        len(page.hits)
+        async for page in sq.iter_scroll(size=5, prefetch=0, pages=True)
+    ]
+    assert pages == [5, 5, 1]
+
+    hits = sq.iter_scroll(size=2)
+    async for doc in hits:
+        break
+    await hits.aclose()
+
+
+@pytest.mark.asyncio
+async def test_iter_search_after(es_index, all_cars):
+    sq = es_index.search_query(doc_cls=Car)
+
+    docs = [doc async for doc in sq.iter_search_after(5, Car.number)]
+    assert [doc.number for doc in docs] == list(range(1, 12))
+
+    pages = [
+        len(page.hits)
+        async for page in sq.iter_search_after(5, Car.number, pages=True)
+    ]
+    assert pages == [5, 5, 1]
+
+
+@pytest.mark.asyncio
+async def test_prepare(es_index, cars):
+    prepared_sq = await (
+        es_index.search_query(Car.name.match(Param('name')))
+        .limit(Param('size'))
+        .prepare()
+    )
+
+    res = await prepared_sq.execute(name='Sally', size=1)
+    assert res.total == 1
+    assert res.hits[0]._id == '2'
+
+    res = await prepared_sq.execute(name='Lightning', size=1)
+    assert res.total == 1
+    assert res.hits[0]._id == '1'
+
+
+@pytest.mark.asyncio
+async def test_prepare_search_template(es_index, cars):
+    prepared_sq = await (
+        es_index.search_query(Car.name.match(Param('name')))
+        .prepare(template_id='{}-search-cars'.format(es_index.get_name()))
+    )
+
+    res = await prepared_sq.execute(name='Sally')
+    assert res.total == 1
+    assert res.hits[0]._id == '2'
@@ -3,7 +3,7 @@ import uuid
 import pytest
 
 from elasticmagic import Document, Field
-from elasticmagic.types import Text
+from elasticmagic.types import Integer, Text
 
 
 def pytest_addoption(parser):
@@ -22,6 +22,7 @@ class Car(Document):
     __doc_type__ = 'car'
 
     name = Field(Text())
+    number = Field(Integer())
 
 
 @pytest.fixture
@@ -40,15 +41,15 @@ def car_docs():
 @pytest.fixture
 def all_car_docs():
     yield [
-        Car(_id=1, name='Lightning McQueen'),
-        Car(_id=2, name='Sally Carerra'),
-        Car(_id=3, name='Doc Hudson'),
-        Car(_id=4, name='Ramone'),
-        Car(_id=5, name='Luigi'),
-        Car(_id=6, name='Guido'),
-        Car(_id=7, name='Flo'),
-        Car(_id=8, name='Sarge'),
-        Car(_id=9, name='Sheriff'),
-        Car(_id=10, name='Fillmore'),
-        Car(_id=11, name='Mack'),
+        Car(_id=1, name='Lightning McQueen', number=1),
+        Car(_id=2, name='Sally Carerra', number=2),
+        Car(_id=3, name='Doc Hudson', number=3),
+        Car(_id=4, name='Ramone', number=4),
+        Car(_id=5, name='Luigi', number=5),
+        Car(_id=6, name='Guido', number=6),
+        Car(_id=7, name='Flo', number=7),
+        Car(_id=8, name='Sarge', number=8),
+        Car(_id=9, name='Sheriff', number=9),
+        Car(_id=10, name='Fillmore', number=10),
+        Car(_id=11, name='Mack', number=11),
     ]